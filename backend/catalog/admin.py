@@ -1,9 +1,26 @@
-from django.contrib import admin
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.http import urlencode
 from .models import (
     Category, Product, ProductImage, ProductFeature, ProductSpec, ProductHighlight,
     AboutPage, AboutValue, AboutTeamMember, AboutTechFeature, AboutTechStat,
-    ContactPage, ContactWorkingHour, ContactFAQ, FooterSettings, ProductOffer, ContactMessage
+    ContactPage, ContactWorkingHour, ContactFAQ, FooterSettings, ProductOffer, ContactMessage,
+    AnalyticsReport, SlowQuery,
 )
+from .rollups import refresh_offer_days
+from . import exports, slow_queries
+from .phones import normalize_phone
 
 
 class ProductImageInline(admin.TabularInline):
@@ -180,18 +197,120 @@ class FooterSettingsAdmin(admin.ModelAdmin):
     make_active.short_description = "Seçiləni aktiv et"
 
 
+# -------- Large inbox tables ---------
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids a full COUNT(*) on big tables.
+
+    Tables below `estimate_threshold` rows (by the planner's pg_class estimate;
+    every table on other databases) are counted exactly. Above it, unfiltered
+    changelists use that estimate, and filtered ones count exactly up to
+    `count_cap` matches and fall back to the planner's row estimate for the
+    filtered query beyond it, so every page up to the estimate stays
+    reachable. `estimated` tells whether the total is approximate.
+    """
+    estimate_threshold = 100_000
+    count_cap = 10_000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not isinstance(qs, QuerySet):
+            return super().count
+        connection = connections[qs.db]
+        table_rows = self._table_rows(connection, qs) if connection.vendor == 'postgresql' else None
+        if table_rows is None or table_rows < self.estimate_threshold:
+            return super().count
+        if qs.query.where:
+            matches = qs.order_by()[:self.count_cap + 1].count()
+            if matches <= self.count_cap:
+                return matches
+            table_rows = max(self._planned_rows(connection, qs), matches)
+        self.estimated = True
+        return table_rows
+
+    def _table_rows(self, connection, qs):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [qs.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been analyzed
+        return int(row[0]) if row and row[0] >= 0 else None
+
+    def _planned_rows(self, connection, qs):
+        sql, params = qs.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CreatedRecentlyFilter(admin.SimpleListFilter):
+    """Fixed created_at windows; unlike a field filter it never scans for distinct values."""
+    title = "Tarix"
+    parameter_name = "created"
+    WINDOWS = {"today": 0, "7": 7, "30": 30, "90": 90}
+
+    def lookups(self, request, model_admin):
+        return (("today", "Bu gün"), ("7", "Son 7 gün"), ("30", "Son 30 gün"), ("90", "Son 90 gün"))
+
+    def queryset(self, request, queryset):
+        days = self.WINDOWS.get(self.value())
+        if days is None:
+            return queryset
+        start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        return queryset.filter(created_at__gte=start - datetime.timedelta(days=days))
+
+
+class LargeTableAdminMixin:
+    """Changelist settings for inbox tables that grow without bound."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        cl = getattr(response, 'context_data', {}).get('cl')
+        if cl is not None and getattr(cl.paginator, 'estimated', False):
+            messages.info(request, f"Nəticələrin sayı təxminidir (~{cl.result_count:,}).".replace(',', ' '))
+        return response
+
+
+class PhoneLookupAdminMixin:
+    """Phone-shaped search terms become exact phone_normalized lookups instead of icontains scans."""
+
+    def get_search_results(self, request, queryset, search_term):
+        phone = normalize_phone(search_term)
+        if phone:
+            return queryset.filter(phone_normalized=phone), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def customer_history(self, obj):
+        if not obj or not obj.phone_normalized:
+            return "—"
+        url = f"{reverse('api:admin_customer_history')}?{urlencode({'phone': obj.phone_normalized})}"
+        return format_html('<a href="{}">{} üzrə bütün müraciətlər</a>', url, obj.phone_normalized)
+    customer_history.short_description = "Müştəri tarixçəsi"
+
+
 @admin.register(ProductOffer)
-class ProductOfferAdmin(admin.ModelAdmin):
+class ProductOfferAdmin(PhoneLookupAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("get_customer_name", "get_product_name", "quantity", "city", "status", "created_at")
-    list_filter = ("status", "city", "quantity", "created_at")
+    list_filter = ("status", "city", CreatedRecentlyFilter)
+    list_select_related = ("product",)
+    autocomplete_fields = ("product",)
     search_fields = ("first_name", "last_name", "phone_number", "email", "product__name")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("customer_history", "created_at", "updated_at")
     list_editable = ("status",)
     ordering = ("-created_at",)
     
     fieldsets = (
         ("Müştəri Məlumatları", {
-            "fields": ("first_name", "last_name", "phone_number", "email", "city")
+            "fields": ("first_name", "last_name", "phone_number", "customer_history", "email", "city")
         }),
         ("Məhsul və Təklif", {
             "fields": ("product", "quantity", "offer_text")
@@ -201,7 +320,7 @@ class ProductOfferAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ["mark_as_reviewed", "mark_as_accepted", "mark_as_rejected"]
+    actions = ["mark_as_reviewed", "mark_as_accepted", "mark_as_rejected", "export_csv", "export_xlsx"]
     
     def get_customer_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
@@ -213,36 +332,47 @@ class ProductOfferAdmin(admin.ModelAdmin):
     
     def mark_as_reviewed(self, request, queryset):
         updated = queryset.update(status='reviewed')
+        refresh_offer_days(queryset)
         self.message_user(request, f"{updated} təklif nəzərdən keçirildi olaraq işarələndi.")
     mark_as_reviewed.short_description = "Nəzərdən keçirildi olaraq işarələ"
     
     def mark_as_accepted(self, request, queryset):
         updated = queryset.update(status='accepted')
+        refresh_offer_days(queryset)
         self.message_user(request, f"{updated} təklif qəbul edildi olaraq işarələndi.")
     mark_as_accepted.short_description = "Qəbul edildi olaraq işarələ"
     
     def mark_as_rejected(self, request, queryset):
         updated = queryset.update(status='rejected')
+        refresh_offer_days(queryset)
         self.message_user(request, f"{updated} təklif rədd edildi olaraq işarələndi.")
     mark_as_rejected.short_description = "Rədd edildi olaraq işarələ"
 
+    def export_csv(self, request, queryset):
+        return exports.export_offers(queryset, 'csv')
+    export_csv.short_description = "Seçilənləri CSV kimi ixrac et"
+
+    def export_xlsx(self, request, queryset):
+        return exports.export_offers(queryset, 'xlsx')
+    export_xlsx.short_description = "Seçilənləri XLSX kimi ixrac et"
+
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(PhoneLookupAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("first_name", "last_name", "email", "phone", "subject", "status", "created_at")
-    list_filter = ("status", "subject", "created_at")
+    list_filter = ("status", "subject", CreatedRecentlyFilter)
     search_fields = ("first_name", "last_name", "email", "phone", "message")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("customer_history", "created_at", "updated_at")
     list_editable = ("status",)
     ordering = ("-created_at",)
 
     fieldsets = (
-        ("Müraciətçi", {"fields": ("first_name", "last_name", "email", "phone")}),
+        ("Müraciətçi", {"fields": ("first_name", "last_name", "email", "phone", "customer_history")}),
         ("Məzmun", {"fields": ("subject", "message", "privacy_accepted")}),
         ("Status", {"fields": ("status", "created_at", "updated_at")}),
     )
 
-    actions = ["mark_as_read", "archive"]
+    actions = ["mark_as_read", "archive", "export_csv", "export_xlsx"]
 
     def mark_as_read(self, request, queryset):
         updated = queryset.update(status="read")
@@ -253,3 +383,50 @@ class ContactMessageAdmin(admin.ModelAdmin):
         updated = queryset.update(status="archived")
         self.message_user(request, f"{updated} mesaj arxivləndi.")
     archive.short_description = "Arxivlə"
+
+    def export_csv(self, request, queryset):
+        return exports.export_contact_messages(queryset, 'csv')
+    export_csv.short_description = "Seçilənləri CSV kimi ixrac et"
+
+    def export_xlsx(self, request, queryset):
+        return exports.export_contact_messages(queryset, 'xlsx')
+    export_xlsx.short_description = "Seçilənləri XLSX kimi ixrac et"
+
+
+@admin.register(AnalyticsReport)
+class AnalyticsReportAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "granularity", "days", "status", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("kind", "granularity", "days", "cache_key", "status", "file", "error", "requested_by", "created_at", "finished_at")
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Changelist opens on a per-fingerprint summary; ?fingerprint= lists that statement's captures."""
+    list_display = ("id", "duration_ms", "view", "origin", "created_at")
+    list_filter = ("view",)
+    readonly_fields = ("fingerprint", "sql", "params", "duration_ms", "view", "origin", "plan", "database", "created_at")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        if request.GET:
+            return super().changelist_view(request, extra_context)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Yavaş sorğular",
+            "groups": slow_queries.groups(),
+            "capturing": getattr(settings, "SLOW_QUERY_CAPTURE", False),
+            "threshold_ms": getattr(settings, "SLOW_QUERY_MS", 200),
+        }
+        return TemplateResponse(request, "admin/slow_query_groups.html", context)
@@ -0,0 +1,157 @@
+"""Dashboard analytics payload (charts, widgets, recent offers).
+
+Aggregates come from the daily rollups in catalog.rollups; the whole payload
+is cached per normalized (range, days) pair so concurrent dashboards and the
+PDF export share one computation.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from . import rollups
+from .caching import get_or_compute
+from .hll import STANDARD_ERROR, union_count
+from .models import ProductOffer, OfferDailyStat, ContactDailyStat, VisitDailyStat
+
+GRANULARITIES = ('day', 'week', 'month')
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+UNIQUE_VISITOR_WINDOWS = (7, 30, 90, 365)
+
+
+def normalize_params(granularity, days):
+    """Coerce raw query values into a bounded (granularity, days) pair."""
+    if granularity not in GRANULARITIES:
+        granularity = 'day'
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        days = DEFAULT_DAYS
+    days = max(1, min(days, MAX_DAYS))
+    return granularity, days
+
+
+def _daterange(start, end, step='day'):
+    cur = start
+    while cur <= end:
+        yield cur
+        if step == 'month':
+            # increment month
+            y = cur.year + (cur.month // 12)
+            m = 1 if cur.month == 12 else cur.month + 1
+            cur = cur.replace(year=y, month=m, day=1)
+        elif step == 'week':
+            cur = cur + datetime.timedelta(weeks=1)
+        else:
+            cur = cur + datetime.timedelta(days=1)
+
+
+def compute_stats(granularity, days):
+    now = timezone.now()
+    since = now - datetime.timedelta(days=days)
+    # Rollups are keyed by local (Asia/Baku) day
+    since_day = timezone.localdate(since)
+    today = timezone.localdate(now)
+
+    # Line chart: ProductOffer count grouped by day/week/month
+    if granularity == 'month':
+        trunc = TruncMonth('date')
+    elif granularity == 'week':
+        trunc = TruncWeek('date')
+    else:
+        trunc = TruncDay('date')
+
+    offers_qs = (
+        OfferDailyStat.objects.filter(date__gte=since_day)
+        .annotate(period=trunc)
+        .values('period')
+        .order_by('period')
+        .annotate(count=Sum('count'))
+    )
+    # Build continuous series with zeros
+    counts_map = {(o['period'].date() if hasattr(o['period'], 'date') else o['period']): o['count'] for o in offers_qs}
+    if granularity == 'month':
+        start_boundary = since_day.replace(day=1)
+    elif granularity == 'week':
+        # TruncWeek buckets start on Monday
+        start_boundary = since_day - datetime.timedelta(days=since_day.weekday())
+    else:
+        start_boundary = since_day
+    line_labels = []
+    line_values = []
+    for d in _daterange(start_boundary, today, granularity):
+        line_labels.append(d.isoformat())
+        line_values.append(int(counts_map.get(d, 0)))
+
+    # Pie chart: by category
+    by_category = (
+        OfferDailyStat.objects.filter(date__gte=since_day)
+        .values('category__name')
+        .annotate(count=Sum('count'))
+        .order_by('-count')
+    )
+    pie_labels = [r['category__name'] or 'Digər' for r in by_category]
+    pie_values = [r['count'] for r in by_category]
+
+    # Widgets last 90 days
+    last90 = timezone.localdate(now - datetime.timedelta(days=90))
+    total_offers_90 = OfferDailyStat.objects.filter(date__gte=last90).aggregate(v=Sum('count'))['v'] or 0
+    total_contacts_90 = ContactDailyStat.objects.filter(date__gte=last90).aggregate(v=Sum('count'))['v'] or 0
+    total_visits_90 = VisitDailyStat.objects.filter(date__gte=last90).aggregate(v=Sum('visits'))['v'] or 0
+
+    # Distinct visitors per window, merged from the daily HyperLogLog sketches
+    sketches = rollups.visit_sketches(today - datetime.timedelta(days=max(UNIQUE_VISITOR_WINDOWS) - 1), today)
+    unique_visitors = {
+        str(window): union_count(
+            sketch for day, sketch in sketches if day > today - datetime.timedelta(days=window)
+        )
+        for window in UNIQUE_VISITOR_WINDOWS
+    }
+
+    # Recent offers (last 7 days)
+    last7 = now - datetime.timedelta(days=7)
+    recent_offers = list(
+        ProductOffer.objects.filter(created_at__gte=last7)
+        .values('id', 'first_name', 'last_name', 'product__name', 'quantity', 'status', 'created_at')
+        .order_by('-created_at')[:100]
+    )
+
+    # Status counts for tabs (based on last 7 days)
+    status_counts_qs = (
+        OfferDailyStat.objects.filter(date__gte=timezone.localdate(last7))
+        .values('status')
+        .annotate(count=Sum('count'))
+        .order_by()
+    )
+    status_counts = {r['status']: r['count'] for r in status_counts_qs}
+    status_counts['all'] = sum(status_counts.values())
+
+    return {
+        'line': {'labels': line_labels, 'values': line_values},
+        'pie': {'labels': pie_labels, 'values': pie_values},
+        'widgets': {
+            'offers_90': total_offers_90,
+            'contacts_90': total_contacts_90,
+            'visits_90': total_visits_90,
+            'unique_visitors_90': unique_visitors['90'],
+        },
+        'unique_visitors': {
+            'windows': unique_visitors,
+            'relative_error': round(STANDARD_ERROR, 4),
+        },
+        'recent_offers': recent_offers,
+        'status_counts': status_counts,
+    }
+
+
+def get_stats(granularity, days):
+    """Cached `compute_stats`; callers must pass values from `normalize_params`."""
+    return get_or_compute(
+        f"analytics:stats:{granularity}:{days}",
+        lambda: compute_stats(granularity, days),
+        ttl=getattr(settings, 'ANALYTICS_CACHE_TTL', 60),
+        stale_ttl=getattr(settings, 'ANALYTICS_CACHE_STALE_TTL', 300),
+    )
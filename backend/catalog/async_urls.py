@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import async_views
+
+# Async submission endpoints (served concurrently under core.asgi). Mounted over the public
+# URLs by catalog.urls when ASYNC_SUBMISSIONS is on; benchmark_submissions uses it as ROOT_URLCONF
+urlpatterns = [
+    path('offers/', async_views.create_offer, name='async_offer_create'),
+    path('contact-messages/', async_views.create_contact_message, name='async_contact_message_create'),
+]
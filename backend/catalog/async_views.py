@@ -0,0 +1,108 @@
+"""Async (ASGI) versions of the public offer and contact submission endpoints.
+
+Same payloads, validation and responses as ProductOfferViewSet /
+ContactMessageViewSet, but the request coroutine never blocks on
+notification I/O: rows are written with the async ORM and the email +
+Telegram fan-out is handed to a small thread pool after the insert, so an
+ASGI worker keeps serving other requests while SMTP or Telegram are slow.
+Under WSGI these views still work (Django runs them in an event loop per
+request) but the concurrency gain only appears when served through
+core.asgi.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import Throttled
+
+from . import signals
+from .serializers import ProductOfferSerializer, ContactMessageSerializer
+from .throttling import submission_throttle_wait
+
+_notify_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'NOTIFY_WORKERS', 4), thread_name_prefix='notify',
+)
+_pending = set()
+
+
+def _hand_off(notify, instance):
+    future = _notify_executor.submit(notify, instance)
+    _pending.add(future)
+    future.add_done_callback(_pending.discard)
+
+
+def wait_for_notifications(timeout=None):
+    """Block until handed-off notifications have been sent (benchmarks, shutdown)."""
+    wait(list(_pending), timeout=timeout)
+
+
+def _json(data, status):
+    # Same UTF-8 output as DRF's JSONRenderer (Azerbaijani messages stay readable)
+    return JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _parse_body(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def _throttled(wait):
+    # Same localized detail and Retry-After as DRF's handler for the sync viewsets
+    exc = Throttled(wait)
+    response = _json({'detail': str(exc.detail)}, exc.status_code)
+    response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+async def _submit(request, serializer_class, scope, notify, message):
+    data = _parse_body(request)
+    if data is None:
+        return _json({'detail': 'JSON parse error.'}, 400)
+
+    wait = await sync_to_async(submission_throttle_wait)(request, scope, data)
+    if wait is not None:
+        return _throttled(wait)
+
+    serializer = serializer_class(data=data)
+    # Field validation is CPU-bound apart from the product PK lookup
+    if not await sync_to_async(serializer.is_valid)():
+        return _json(serializer.errors, 400)
+
+    model = serializer_class.Meta.model
+    instance = model(**serializer.validated_data)
+    # post_save still refreshes the rollups; notifications are sent below instead
+    instance._defer_notifications = True
+    await instance.asave()
+    serializer.instance = instance
+
+    # Related objects are already loaded (validated_data), so the notifier needs no DB access
+    _hand_off(notify, instance)
+
+    return _json({'success': True, 'message': message, 'data': serializer.data}, 201)
+
+
+@csrf_exempt  # No Session auth -> no CSRF required (same as the DRF viewsets)
+@require_POST
+async def create_offer(request):
+    return await _submit(
+        request, ProductOfferSerializer, 'offers', signals.send_product_offer_notifications,
+        'Təklifiniz uğurla göndərildi. Tezliklə sizinlə əlaqə saxlayacağıq.',
+    )
+
+
+@csrf_exempt
+@require_POST
+async def create_contact_message(request):
+    return await _submit(
+        request, ContactMessageSerializer, 'contact_messages', signals.send_contact_message_notifications,
+        'Mesajınız uğurla göndərildi.',
+    )
@@ -0,0 +1,240 @@
+"""Synthetic data sets for benchmarks.
+
+Everything generated here is tagged so it can be told apart from real data
+and removed again: category keys and product ids start with `bench-`, offer
+and contact emails end in `@bench.invalid` (the marker the submission
+benchmark already cleans up), visit session keys start with `bench`. Rows are
+written with bulk_create, so no notification signals fire; rollups are rebuilt
+for the generated window at the end. Output is deterministic for a seed.
+"""
+import datetime
+import random
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Category, Product, ProductImage, ProductFeature, ProductSpec, ProductHighlight,
+    ProductOffer, ContactMessage, SiteVisit,
+)
+from .phones import normalize_phone
+from . import caching, rollups
+
+PREFIX = 'bench-'
+EMAIL_DOMAIN = 'bench.invalid'
+VISIT_PREFIX = 'bench'
+
+WORDS = [
+    'peak', 'wave', 'pulse', 'nova', 'aero', 'flux', 'echo', 'zen', 'volt', 'orbit',
+    'prime', 'lite', 'max', 'pro', 'air', 'bass', 'core', 'edge', 'sonic', 'luna',
+]
+COLORS = ['qara', 'ağ', 'boz', 'mavi', 'qırmızı', 'yaşıl']
+SPEC_LABELS = ['Bluetooth', 'Batareya', 'Çəki', 'Zəmanət', 'Material', 'Tezlik', 'Güc', 'Kabel', 'Rəng', 'Ölçü']
+FIRST_NAMES = ['Anar', 'Aysel', 'Elvin', 'Leyla', 'Murad', 'Nigar', 'Orxan', 'Səbinə', 'Tural', 'Günay']
+LAST_NAMES = ['Əliyev', 'Həsənova', 'Məmmədov', 'Quliyeva', 'İsmayılov', 'Rzayeva']
+OPERATOR_CODES = ['50', '51', '55', '70', '77', '99', '10']
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _phone(rng):
+    return f"0{rng.choice(OPERATOR_CODES)}{rng.randrange(1000000, 9999999)}"
+
+
+def per_day(count, days):
+    """Split `count` rows over `days` days, weighted towards today (linear decay)."""
+    weights = [days - d for d in range(days)]
+    total = sum(weights)
+    split = [count * w // total for w in weights]
+    split[0] += count - sum(split)
+    return split
+
+
+def _backdate(model, pks, day):
+    """bulk_create stamps auto_now_add fields with now(); move rows back `day` days."""
+    stamp = timezone.now() - datetime.timedelta(days=day)
+    for chunk in _batches(pks, 5000):
+        model.objects.filter(pk__in=chunk).update(created_at=stamp)
+
+
+def generate_catalog(products, categories=8, images=3, features=5, specs=8, highlights=3,
+                     seed=42, batch_size=2000, log=None):
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    cats = []
+    for i in range(categories):
+        cat, _ = Category.objects.get_or_create(
+            key=f'{PREFIX}cat-{i}', defaults={'name': f'Bench kateqoriya {i}', 'description': 'Sintetik'}
+        )
+        cats.append(cat)
+
+    def product_rows():
+        for i in range(products):
+            name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {rng.choice(COLORS)} {i}"
+            price = rng.randrange(1000, 50000) / 100
+            discount = rng.choice([0, 0, 0, 10, 15, 25])
+            yield Product(
+                id=f'{PREFIX}{i}',
+                name=name,
+                category=cats[i % len(cats)],
+                description=' '.join(rng.choice(WORDS) for _ in range(rng.randrange(20, 80))),
+                price=price,
+                original_price=round(price / (1 - discount / 100), 2) if discount else None,
+                discount=discount,
+            )
+
+    created = 0
+    for batch in _batches(product_rows(), batch_size):
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+            ids = [p.id for p in batch]
+            ProductImage.objects.bulk_create([
+                ProductImage(product_id=pid, image=f'products/{PREFIX}{n}.jpg', is_main=n == 0, alt=pid, order=n)
+                for pid in ids for n in range(images)
+            ])
+            ProductFeature.objects.bulk_create([
+                ProductFeature(product_id=pid, text=f'{rng.choice(WORDS)} xüsusiyyəti {n}', order=n)
+                for pid in ids for n in range(features)
+            ])
+            ProductSpec.objects.bulk_create([
+                ProductSpec(product_id=pid, label=SPEC_LABELS[n % len(SPEC_LABELS)], value=str(rng.randrange(1, 500)), order=n)
+                for pid in ids for n in range(specs)
+            ])
+            ProductHighlight.objects.bulk_create([
+                ProductHighlight(product_id=pid, number=f'{n + 1:02d}', text=f'{rng.choice(WORDS)} üstünlüyü', order=n)
+                for pid in ids for n in range(highlights)
+            ])
+        created += len(batch)
+        log(f'products: {created}/{products}')
+    # bulk_create sends no post_save, so the cached catalog responses are dropped here
+    caching.invalidate('catalog')
+    return created
+
+
+def _generate_dated(model, count, days, make_row, batch_size, log, label):
+    created = 0
+    for day, n in enumerate(per_day(count, days)):
+        for chunk in _batches(range(n), batch_size):
+            with transaction.atomic():
+                objs = model.objects.bulk_create([make_row() for _ in chunk])
+                if day:
+                    _backdate(model, [o.pk for o in objs], day)
+            created += len(chunk)
+        if day % 30 == 0 or day == days - 1:
+            log(f'{label}: {created}/{count}')
+    return created
+
+
+def generate_offers(count, days=365, seed=42, batch_size=5000, log=None):
+    rng = random.Random(seed + 1)
+    product_ids = list(Product.objects.filter(id__startswith=PREFIX).values_list('id', flat=True))
+    if not product_ids:
+        return 0
+    cities = [c for c, _ in ProductOffer.AZERBAIJAN_CITIES]
+    statuses = [s for s, _ in ProductOffer.STATUS_CHOICES]
+
+    def make_row():
+        phone = _phone(rng)
+        return ProductOffer(
+            product_id=rng.choice(product_ids),
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            phone_number=phone,
+            phone_normalized=normalize_phone(phone) or '',
+            city=rng.choice(cities),
+            email=f'{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}@{EMAIL_DOMAIN}',
+            quantity=rng.randrange(1, 20),
+            status=rng.choices(statuses, weights=[5, 2, 2, 1])[0],
+        )
+
+    return _generate_dated(ProductOffer, count, days, make_row, batch_size, log or (lambda m: None), 'offers')
+
+
+def generate_contact_messages(count, days=365, seed=42, batch_size=5000, log=None):
+    rng = random.Random(seed + 2)
+    subjects = [s for s, _ in ContactMessage.SUBJECT_CHOICES]
+    statuses = [s for s, _ in ContactMessage.STATUS_CHOICES]
+
+    def make_row():
+        phone = _phone(rng)
+        return ContactMessage(
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            email=f'{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}@{EMAIL_DOMAIN}',
+            phone=phone,
+            phone_normalized=normalize_phone(phone) or '',
+            subject=rng.choice(subjects),
+            message=' '.join(rng.choice(WORDS) for _ in range(rng.randrange(5, 60))),
+            privacy_accepted=True,
+            status=rng.choice(statuses),
+        )
+
+    return _generate_dated(
+        ContactMessage, count, days, make_row, batch_size, log or (lambda m: None), 'contact messages'
+    )
+
+
+def generate_visits(count, days=365, seed=42, batch_size=10000, log=None):
+    """`count` unique (day, visitor) rows drawn from a pool of count/4 visitors, so people return."""
+    rng = random.Random(seed + 3)
+    log = log or (lambda message: None)
+    today = timezone.localdate()
+    visitors = max(1, count // 4)
+    created = 0
+    for day, n in enumerate(per_day(count, days)):
+        date = today - datetime.timedelta(days=day)
+        ids = rng.sample(range(visitors), min(n, visitors))
+        for chunk in _batches(ids, batch_size):
+            SiteVisit.objects.bulk_create(
+                [SiteVisit(date=date, session_key=f'{VISIT_PREFIX}{v:032x}') for v in chunk],
+                ignore_conflicts=True,
+            )
+            created += len(chunk)
+        if day % 30 == 0 or day == days - 1:
+            log(f'visits: {created}/{count}')
+    return created
+
+
+def rebuild_rollups(days):
+    today = timezone.localdate()
+    return rollups.rebuild_all(start=today - datetime.timedelta(days=days), end=today)
+
+
+def clean():
+    """Delete every generated row; returns {table: rows deleted}.
+
+    Offers, messages and visits are removed with one DELETE each (no per-row
+    rollup signals); call rebuild_rollups afterwards.
+    """
+    deleted = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model, where, value in [
+            (ProductOffer, 'email LIKE %s', f'%@{EMAIL_DOMAIN}'),
+            (ContactMessage, 'email LIKE %s', f'%@{EMAIL_DOMAIN}'),
+            (SiteVisit, 'session_key LIKE %s', f'{VISIT_PREFIX}%'),
+        ]:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE {where}', [value])
+            deleted[model._meta.db_table] = cursor.rowcount
+        deleted['products'] = Product.objects.filter(id__startswith=PREFIX).delete()[0]
+        deleted['categories'] = Category.objects.filter(key__startswith=PREFIX).delete()[0]
+    caching.invalidate('catalog')
+    return deleted
+
+
+def counts():
+    return {
+        'products': Product.objects.filter(id__startswith=PREFIX).count(),
+        'offers': ProductOffer.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').count(),
+        'contact_messages': ContactMessage.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').count(),
+        'visits': SiteVisit.objects.filter(session_key__startswith=VISIT_PREFIX).count(),
+    }
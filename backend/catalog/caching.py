@@ -0,0 +1,315 @@
+"""Cache helpers shared by views.
+
+Two tiers: the shared cache (`CACHES['default']`, seen by every worker and
+node) fronted by `local`, a bounded per-process LRU. Reads try the LRU first,
+then the shared cache; values found in the shared cache are copied into the
+LRU for at most CACHE_LOCAL_TTL seconds, which is also how stale another
+worker's copy of a key can get after a write. The LRU hands out the stored
+object itself, not a copy: callers must not mutate cached values.
+
+`cached` is a plain cache-aside lookup for data that is invalidated on write:
+keys come from `versioned`, which embeds a per-namespace generation, and
+`invalidate` moves the namespace to a new generation so every older key is
+simply never read again. Invalidations are broadcast to the other workers by
+catalog.invalidation; while that bus is up, generations and versioned values
+stay in the LRU for up to CACHE_LOCAL_SYNCED_TTL.
+
+Misses are coalesced (single flight) at two levels: threads of one process
+wait on the first thread's computation (`single_flight`), and that thread
+takes a lock in the shared cache so only one worker computes while the
+others poll for its result with backoff (`_fill`). Waiting is bounded by
+CACHE_COALESCE_WAIT; past it a caller computes on its own, so a stuck or
+crashed leader only costs latency.
+
+`get_or_compute` adds stale-while-revalidate for time-based data: entries
+carry their own freshness deadline and are kept in the cache for an extra
+`stale_ttl` seconds. Once an entry goes stale exactly one caller (whoever
+wins `cache.add` on the lock key) recomputes it, while everybody else keeps
+getting the stale value.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import invalidation, metrics
+from .instrumentation import record_cache
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.05
+_POLL_MAX_INTERVAL = 0.5
+_MISSING = object()
+_pending = threading.local()
+
+
+class LocalCache:
+    """Thread-safe LRU of at most `max_entries` keys, each with its own expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl):
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted and metrics.enabled():
+            metrics.CACHE_EVICTIONS.inc(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local = LocalCache(getattr(settings, 'CACHE_LOCAL_MAX_ENTRIES', 1000))
+
+
+def _local_ttl(ttl, versioned=False):
+    """How long the LRU may keep a copy; versioned data follows the invalidation bus while it is up."""
+    if versioned and invalidation.synced():
+        return min(ttl, getattr(settings, 'CACHE_LOCAL_SYNCED_TTL', 300))
+    return min(ttl, getattr(settings, 'CACHE_LOCAL_TTL', 5))
+
+
+def _lookup(key):
+    """(value, tier) from the LRU or the shared cache; (_MISSING, None) when neither has it."""
+    value = local.get(key, _MISSING)
+    if value is not _MISSING:
+        record_cache(True, tier='local')
+        return value, 'local'
+    value = cache.get(key, _MISSING)
+    record_cache(value is not _MISSING)
+    return value, None if value is _MISSING else 'shared'
+
+
+def stats():
+    """This process's LRU counters (shared-cache hit/miss counts are in catalog.metrics)."""
+    return {
+        'local_entries': len(local),
+        'local_max_entries': local.max_entries,
+        'local_hits': local.hits,
+        'local_misses': local.misses,
+        'local_evictions': local.evictions,
+    }
+
+
+def generation(namespace):
+    """Current generation of `namespace`; a fresh one is created if the shared cache lost it."""
+    key = f'gen:{namespace}'
+    invalidation.track(namespace)
+    value = local.get(key)
+    if value is None:
+        epoch, ttl = invalidation.epoch(), _local_ttl(float('inf'), versioned=True)
+        value = cache.get(key)
+        if value is None:
+            cache.add(key, time.time_ns(), None)
+            value = cache.get(key) or 0
+        if invalidation.epoch() == epoch:
+            local.set(key, value, ttl)
+    return value
+
+
+def versioned(namespace, *parts):
+    """Cache key for `parts` under the namespace's current generation."""
+    digest = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'{namespace}:{generation(namespace)}:{digest}'
+
+
+def invalidate(namespace):
+    """Drop every key built by `versioned(namespace, ...)`, in this worker now and in the others via the bus."""
+    key = f'gen:{namespace}'
+    cache.set(key, time.time_ns(), None)
+    local.delete(key)
+    invalidation.publish(namespace)
+
+
+def invalidate_on_commit(namespace):
+    """`invalidate` once the current transaction commits; a cascade of saves bumps each namespace once."""
+    pending = getattr(_pending, 'namespaces', None)
+    if pending is None:
+        pending = _pending.namespaces = set()
+    pending.add(namespace)
+    transaction.on_commit(_invalidate_pending)
+
+
+def _invalidate_pending():
+    # Namespaces left over from a rolled-back transaction are flushed too; an extra bump is harmless
+    pending, _pending.namespaces = getattr(_pending, 'namespaces', None), set()
+    for namespace in pending or ():
+        invalidate(namespace)
+
+
+def cached(key, compute, ttl=300):
+    """Cache-aside for `versioned` keys: the value from either tier, else `compute()` stored in both.
+
+    Concurrent misses are coalesced: one computation per key in this process
+    and, through a lock in the shared cache, across workers.
+    """
+    value, tier = _lookup(key)
+    if tier == 'shared':
+        local.set(key, value, _local_ttl(ttl, versioned=True))
+    if tier is not None:
+        return value
+
+    def store(value):
+        cache.set(key, value, ttl)
+        local.set(key, value, _local_ttl(ttl, versioned=True))
+        return value
+
+    return single_flight(key, lambda: _fill(key, compute, store))
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'failed')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _coalesced(scope, outcome):
+    if metrics.enabled():
+        metrics.CACHE_COALESCED.inc(scope=scope, outcome=outcome)
+
+
+def single_flight(key, compute, wait=None):
+    """`compute()` once per key among the threads of this process; the others get the leader's result.
+
+    A follower that waits longer than `wait` (CACHE_COALESCE_WAIT), or whose
+    leader raised, runs `compute` itself.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if leader:
+        try:
+            flight.value = compute()
+            return flight.value
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with _flights_lock:
+                del _flights[key]
+            flight.done.set()
+
+    wait = getattr(settings, 'CACHE_COALESCE_WAIT', 5.0) if wait is None else wait
+    if flight.done.wait(wait) and not flight.failed:
+        _coalesced('process', 'result')
+        return flight.value
+    if not flight.failed:
+        _coalesced('process', 'timeout')
+        logger.warning("Coalesced wait timed out for %s; computing without it", key)
+    return compute()
+
+
+def _fill(key, compute, store, wait=None):
+    """Compute and store a missing `key` once across workers; returns the stored form.
+
+    The worker that wins `cache.add` on the lock key computes; the others poll
+    the shared cache for its result, backing off from _POLL_INTERVAL to
+    _POLL_MAX_INTERVAL, and fall back to computing themselves after `wait`
+    seconds. A failed `add` with no lock in the cache is a cache error (some
+    backends swallow them), not a leader: compute right away.
+    """
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, getattr(settings, 'CACHE_LOCK_TIMEOUT', 30)):
+        try:
+            # Filled by a worker that released the lock between our miss and now
+            entry = cache.get(key, _MISSING)
+            return entry if entry is not _MISSING else store(compute())
+        finally:
+            cache.delete(lock_key)
+    if cache.get(lock_key) is None:
+        entry = cache.get(key, _MISSING)
+        return entry if entry is not _MISSING else store(compute())
+
+    deadline = time.monotonic() + (getattr(settings, 'CACHE_COALESCE_WAIT', 5.0) if wait is None else wait)
+    interval = _POLL_INTERVAL
+    while time.monotonic() < deadline:
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        interval = min(interval * 2, _POLL_MAX_INTERVAL)
+        entry = cache.get(key, _MISSING)
+        if entry is not _MISSING:
+            _coalesced('shared', 'result')
+            return entry
+        if cache.get(lock_key) is None:
+            # The leader gave up (or died) without storing a value
+            break
+    else:
+        _coalesced('shared', 'timeout')
+        logger.warning("Single-flight wait timed out for %s; computing without lock", key)
+    return store(compute())
+
+
+def _entry_store(key, ttl, stale_ttl):
+    def store(value):
+        entry = (value, time.time() + ttl)
+        cache.set(key, entry, ttl + stale_ttl)
+        local.set(key, entry, _local_ttl(ttl))
+        return entry
+    return store
+
+
+def get_or_compute(key, compute, ttl=60, stale_ttl=300, wait=None):
+    """Return the cached value for `key`, computing it at most once across concurrent callers."""
+    entry, tier = _lookup(key)
+    store = _entry_store(key, ttl, stale_ttl)
+    if tier is None:
+        return single_flight(key, lambda: _fill(key, compute, store, wait), wait)[0]
+
+    value, fresh_until = entry
+    if time.time() < fresh_until:
+        if tier == 'shared':
+            local.set(key, entry, _local_ttl(fresh_until - time.time()))
+        return value
+    # Stale: one caller revalidates, the rest serve what we have
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, getattr(settings, 'CACHE_LOCK_TIMEOUT', 30)):
+        try:
+            return store(compute())[0]
+        finally:
+            cache.delete(lock_key)
+    return value
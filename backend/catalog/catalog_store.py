@@ -0,0 +1,330 @@
+"""Read-only catalog snapshot shared by all workers through one memory-mapped file.
+
+With CATALOG_STORE on, product list/detail/by-category and category
+list/detail requests are answered from CATALOG_STORE_PATH without the ORM.
+The file holds every response fragment pre-rendered by the regular
+serializers and JSON renderer, so output is byte-for-byte what the viewsets
+produce; absolute media URLs are stored against a placeholder origin that is
+swapped for the request's scheme and host on the way out.
+
+Layout (little-endian, sections in this order):
+
+- header: magic, version, catalog generation, counts, section offsets
+- products: one fixed-size record per product in list order (Meta.ordering):
+  id, list item JSON and detail JSON, each as (offset, length) into the blob
+- id index: product positions sorted by id (the slug), for binary search
+- categories: one record per category in list order (by name): key and item
+  JSON into the blob, plus a (start, count) slice of the members array
+- members: product positions per category, in list order
+- blob: UTF-8 ids, keys and JSON
+
+Every worker maps the same file (the page cache holds one copy) and reads
+records in place. The header carries the `catalog` cache generation the
+snapshot was built from (catalog.caching); when it no longer matches, the
+request falls back to the ORM and a background rebuild is started. Rebuilds
+are serialized across processes with a file lock, written to a temporary
+file and published with an atomic rename, so readers always see a complete
+snapshot; workers notice the new file and remap it on their next request.
+"""
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+
+from . import caching
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: rebuilds are not serialized across processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DCST'
+VERSION = 1
+HEADER = struct.Struct('<4sIQIIQQQQQ')
+PRODUCT = struct.Struct('<QIQIQI')
+CATEGORY = struct.Struct('<QIQIII')
+CHUNK_SIZE = 2000
+ORIGIN = 'http://catalog-store.invalid'
+# Query parameters the snapshot can answer; anything else (search, ...) goes to the ORM
+SERVED_PARAMS = {'page', 'format'}
+
+_lock = threading.Lock()
+_build_lock = threading.Lock()
+_mapped = None
+
+
+class _BuildRequest:
+    """Stand-in request for the serializers: absolute URLs point at ORIGIN."""
+
+    def build_absolute_uri(self, location):
+        return location if '://' in location else ORIGIN + location
+
+
+class Store:
+    """One mapped snapshot; records are unpacked from the mapping on access."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.generation, self.product_count, self.category_count, self._products,
+         id_index, self._categories, members, self._blob) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} catalog store')
+        view = memoryview(self._mm)
+        self._id_index = view[id_index:id_index + 4 * self.product_count].cast('I')
+        self._members = view[members:self._blob].cast('I')
+        self._category_keys = {
+            self._text(*CATEGORY.unpack_from(self._mm, self._categories + i * CATEGORY.size)[:2]): i
+            for i in range(self.category_count)
+        }
+
+    def _bytes(self, offset, length):
+        return self._mm[self._blob + offset:self._blob + offset + length]
+
+    def _text(self, offset, length):
+        return self._bytes(offset, length).decode()
+
+    def _product(self, position):
+        return PRODUCT.unpack_from(self._mm, self._products + position * PRODUCT.size)
+
+    def _category(self, index):
+        return CATEGORY.unpack_from(self._mm, self._categories + index * CATEGORY.size)
+
+    def product_position(self, product_id):
+        target = product_id.encode()
+        lo, hi = 0, self.product_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = self._id_index[mid]
+            current = self._bytes(*self._product(position)[:2])
+            if current == target:
+                return position
+            if current < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def product_json(self, position, detail=False):
+        record = self._product(position)
+        return self._bytes(*(record[4:6] if detail else record[2:4]))
+
+    def category_index(self, key):
+        return self._category_keys.get(key)
+
+    def category_json(self, index):
+        return self._bytes(*self._category(index)[2:4])
+
+    def category_members(self, index):
+        start, count = self._category(index)[4:6]
+        return self._members[start:start + count]
+
+
+def build(path=None):
+    """Write a fresh snapshot to `path` (default CATALOG_STORE_PATH); returns (products, categories, bytes)."""
+    from .models import Category, Product
+    from .serializers import CategorySerializer, ProductDetailSerializer, ProductListSerializer
+
+    path = path or settings.CATALOG_STORE_PATH
+    # Read before the data: a change committed during the build leaves the snapshot already stale
+    generation = caching.generation('catalog')
+    context = {'request': _BuildRequest()}
+    render = JSONRenderer().render
+    blob = bytearray()
+
+    def put(data):
+        offset = len(blob)
+        blob.extend(data)
+        return offset, len(data)
+
+    products, ids, categories_by_pk = bytearray(), [], {}
+    queryset = Product.objects.select_related('category').prefetch_related('images', 'features', 'specs', 'highlights')
+    rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+    # Serialized a chunk at a time: a many=True serializer builds its fields once, not per product
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        list_items = ProductListSerializer(chunk, many=True, context=context).data
+        details = ProductDetailSerializer(chunk, many=True, context=context).data
+        for product, list_item, detail in zip(chunk, list_items, details):
+            products += PRODUCT.pack(*put(product.id.encode()), *put(render(list_item)), *put(render(detail)))
+            categories_by_pk.setdefault(product.category_id, []).append(len(ids))
+            ids.append((product.id.encode(), len(ids)))
+
+    categories, members = bytearray(), array('I')
+    category_list = list(Category.objects.order_by('name'))
+    for category in category_list:
+        positions = categories_by_pk.get(category.pk, [])
+        categories += CATEGORY.pack(
+            *put(category.key.encode()), *put(render(CategorySerializer(category, context=context).data)),
+            len(members), len(positions),
+        )
+        members.extend(positions)
+    id_index = array('I', (position for _, position in sorted(ids)))
+
+    offset = HEADER.size
+    sections = []
+    for section in (products, id_index.tobytes(), categories, members.tobytes()):
+        sections.append(offset)
+        offset += len(section)
+    header = HEADER.pack(MAGIC, VERSION, generation, len(ids), len(category_list), *sections, offset)
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.catalog-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for part in (header, products, id_index.tobytes(), categories, members.tobytes(), blob):
+                f.write(part)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(ids), len(category_list), offset + len(blob)
+
+
+def _published_generation(path):
+    try:
+        with open(path, 'rb') as f:
+            magic, version, generation = HEADER.unpack(f.read(HEADER.size))[:3]
+    except (OSError, struct.error):
+        return None
+    return generation if magic == MAGIC and version == VERSION else None
+
+
+def publish():
+    """Rebuild the snapshot unless the published one is current; one builder at a time across processes."""
+    path = settings.CATALOG_STORE_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f'{path}.lock', 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if _published_generation(path) == caching.generation('catalog'):
+            return None
+        started = time.perf_counter()
+        products, categories, size = build(path)
+        logger.info("Catalog store rebuilt: %s products, %s categories, %s bytes in %.2fs",
+                    products, categories, size, time.perf_counter() - started)
+        return products, categories, size
+
+
+def _rebuild_in_background():
+    if not _build_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            publish()
+        except Exception:
+            logger.exception("Catalog store rebuild failed")
+        finally:
+            connections.close_all()
+            _build_lock.release()
+
+    threading.Thread(target=run, name='catalog-store-build', daemon=True).start()
+
+
+def current():
+    """The mapped snapshot if it matches the catalog's current generation, else None (rebuild scheduled)."""
+    global _mapped
+    if not getattr(settings, 'CATALOG_STORE', False):
+        return None
+    generation = caching.generation('catalog')
+    store = _mapped
+    if store is not None and store.generation == generation:
+        return store
+    with _lock:
+        store = _mapped
+        try:
+            stat = os.stat(settings.CATALOG_STORE_PATH)
+            if store is None or (stat.st_ino, stat.st_mtime_ns) != (store.stat.st_ino, store.stat.st_mtime_ns):
+                # The previous mapping stays valid for requests still reading it and is freed with them
+                store = _mapped = Store(settings.CATALOG_STORE_PATH)
+        except (OSError, ValueError):
+            store = None
+    if store is None or store.generation != generation:
+        _rebuild_in_background()
+        return None
+    return store
+
+
+def _servable(request, extra=()):
+    return request.accepted_renderer.format == 'json' and set(request.query_params) <= SERVED_PARAMS.union(extra)
+
+
+def _respond(request, body):
+    origin = request.build_absolute_uri('/')[:-1]
+    return HttpResponse(body.replace(ORIGIN.encode(), origin.encode()), content_type='application/json')
+
+
+def _paginated(request, positions, item):
+    """PageNumberPagination's envelope around pre-rendered items; NotFound on a bad page, as the ORM path."""
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(positions, request)
+    head = JSONRenderer().render({
+        'count': paginator.page.paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+    })
+    return _respond(request, b''.join([head[:-1], b',"results":[', b','.join(map(item, page)), b']}']))
+
+
+def _category_products(store, key):
+    index = store.category_index(key)
+    return store.category_members(index) if index is not None else range(0)
+
+
+def product_list(request):
+    """Response for the product list (`?category=` filtered as the viewset does), or None to use the ORM."""
+    store = current()
+    if store is None or not _servable(request, extra={'category'}):
+        return None
+    category = request.query_params.get('category')
+    positions = _category_products(store, category) if category else range(store.product_count)
+    return _paginated(request, positions, store.product_json)
+
+
+def products_by_category(request, key):
+    store = current()
+    if store is None or not _servable(request):
+        return None
+    return _paginated(request, _category_products(store, key), store.product_json)
+
+
+def product_detail(request, product_id):
+    store = current()
+    if store is None or not _servable(request):
+        return None
+    position = store.product_position(product_id)
+    # Unknown ids go to the ORM for the regular 404
+    return _respond(request, store.product_json(position, detail=True)) if position is not None else None
+
+
+def category_list(request):
+    store = current()
+    if store is None or not _servable(request):
+        return None
+    return _paginated(request, range(store.category_count), store.category_json)
+
+
+def category_detail(request, key):
+    store = current()
+    if store is None or not _servable(request):
+        return None
+    index = store.category_index(key)
+    return _respond(request, store.category_json(index)) if index is not None else None
@@ -0,0 +1,164 @@
+"""Server-side analytics charts for PDF reports.
+
+Charts are drawn straight from the analytics series, so exports no longer
+need the browser to upload canvas screenshots. WeasyPrint gets inline SVG
+(cached per data version; the same series always renders the same markup),
+the ReportLab fallback gets native Drawings built from the same series.
+"""
+import hashlib
+import json
+import math
+from html import escape
+
+from django.core.cache import cache
+
+from .instrumentation import record_cache
+
+PALETTE = [
+    "#22c55e", "#3b82f6", "#f59e0b", "#ef4444", "#8b5cf6",
+    "#06b6d4", "#84cc16", "#f97316", "#e11d48",
+]
+LINE_COLOR = "#4f46e5"
+CACHE_TTL = 60 * 60 * 24
+
+
+def _nice_max(value):
+    """Round the y-axis maximum up to 1/2/5 x 10^n."""
+    if value <= 0:
+        return 1
+    exp = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if value <= step * exp:
+            return step * exp
+    return 10 * exp
+
+
+def line_svg(labels, values, width=700, height=260):
+    pad_l, pad_r, pad_t, pad_b = 40, 12, 12, 40
+    plot_w = width - pad_l - pad_r
+    plot_h = height - pad_t - pad_b
+    top = _nice_max(max(values, default=0))
+    n = len(values)
+
+    def x(i):
+        return pad_l + (plot_w * i / (n - 1) if n > 1 else plot_w / 2)
+
+    def y(v):
+        return pad_t + plot_h - plot_h * v / top
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="Arial, Helvetica, sans-serif" font-size="10">'
+    ]
+    for k in range(5):
+        v = top * k / 4
+        yy = y(v)
+        parts.append(f'<line x1="{pad_l}" y1="{yy:.1f}" x2="{width - pad_r}" y2="{yy:.1f}" stroke="#e5e7eb"/>')
+        parts.append(f'<text x="{pad_l - 6}" y="{yy + 3:.1f}" text-anchor="end" fill="#6b7280">{v:g}</text>')
+    if n:
+        points = " ".join(f"{x(i):.1f},{y(v):.1f}" for i, v in enumerate(values))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="{LINE_COLOR}" stroke-width="2"/>')
+        # Label at most ~10 ticks on the x axis
+        every = max(1, math.ceil(n / 10))
+        for i in range(0, n, every):
+            parts.append(
+                f'<text x="{x(i):.1f}" y="{height - pad_b + 14}" text-anchor="middle" fill="#6b7280">'
+                f'{escape(str(labels[i])[5:] or str(labels[i]))}</text>'
+            )
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+def pie_svg(labels, values, size=260, legend_width=200):
+    total = sum(values)
+    cx = cy = size / 2
+    r_out, r_in = size / 2 - 8, size / 4
+    width = size + legend_width
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{size}" '
+        f'viewBox="0 0 {width} {size}" font-family="Arial, Helvetica, sans-serif" font-size="11">'
+    ]
+    if total <= 0:
+        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{r_out}" fill="#e5e7eb"/>')
+    elif len([v for v in values if v]) == 1:
+        color = PALETTE[next(i for i, v in enumerate(values) if v) % len(PALETTE)]
+        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{r_out}" fill="{color}"/>')
+    else:
+        angle = -math.pi / 2
+        for i, v in enumerate(values):
+            if not v:
+                continue
+            sweep = 2 * math.pi * v / total
+            a0, a1 = angle, angle + sweep
+            large = 1 if sweep > math.pi else 0
+            p = [
+                (cx + r_out * math.cos(a0), cy + r_out * math.sin(a0)),
+                (cx + r_out * math.cos(a1), cy + r_out * math.sin(a1)),
+            ]
+            parts.append(
+                f'<path d="M{cx:.1f},{cy:.1f} L{p[0][0]:.1f},{p[0][1]:.1f} '
+                f'A{r_out:.1f},{r_out:.1f} 0 {large} 1 {p[1][0]:.1f},{p[1][1]:.1f} Z" '
+                f'fill="{PALETTE[i % len(PALETTE)]}"/>'
+            )
+            angle = a1
+    # Doughnut hole
+    parts.append(f'<circle cx="{cx}" cy="{cy}" r="{r_in}" fill="#ffffff"/>')
+    for i, (label, v) in enumerate(zip(labels, values)):
+        ly = 16 + i * 18
+        parts.append(f'<rect x="{size + 10}" y="{ly - 9}" width="10" height="10" fill="{PALETTE[i % len(PALETTE)]}"/>')
+        parts.append(f'<text x="{size + 26}" y="{ly}" fill="#111827">{escape(str(label))} ({v})</text>')
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+def chart_svgs(data):
+    """{'line_svg', 'pie_svg'} for an analytics payload, cached by the series they draw."""
+    series = {'line': data['line'], 'pie': data['pie']}
+    version = hashlib.sha1(json.dumps(series, sort_keys=True, default=str).encode()).hexdigest()
+    key = f"analytics:charts:{version}"
+    svgs = cache.get(key)
+    record_cache(svgs is not None)
+    if svgs is None:
+        svgs = {
+            'line_svg': line_svg(data['line']['labels'], data['line']['values']),
+            'pie_svg': pie_svg(data['pie']['labels'], data['pie']['values']),
+        }
+        cache.set(key, svgs, CACHE_TTL)
+    return svgs
+
+
+def reportlab_drawings(data, width, pie_size):
+    """Native ReportLab line and doughnut drawings for the fallback renderer."""
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.linecharts import HorizontalLineChart
+    from reportlab.graphics.charts.doughnut import Doughnut
+    from reportlab.lib import colors
+
+    labels, values = data['line']['labels'], data['line']['values']
+    line = Drawing(width, width * 0.37)
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 30, 25
+    chart.width, chart.height = width - 40, width * 0.37 - 35
+    chart.data = [values or [0]]
+    every = max(1, math.ceil(len(labels) / 10))
+    chart.categoryAxis.categoryNames = [l[5:] if i % every == 0 else '' for i, l in enumerate(labels)] or ['']
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = _nice_max(max(values, default=0))
+    chart.valueAxis.labels.fontSize = 7
+    chart.lines[0].strokeColor = colors.HexColor(LINE_COLOR)
+    chart.lines[0].strokeWidth = 1.5
+    line.add(chart)
+
+    pie = Drawing(pie_size * 2, pie_size)
+    pie_values = data['pie']['values']
+    if sum(pie_values) > 0:
+        doughnut = Doughnut()
+        doughnut.x, doughnut.y = 0, 0
+        doughnut.width = doughnut.height = pie_size
+        doughnut.data = pie_values
+        doughnut.labels = [f"{l} ({v})" for l, v in zip(data['pie']['labels'], pie_values)]
+        for i in range(len(pie_values)):
+            doughnut.slices[i].fillColor = colors.HexColor(PALETTE[i % len(PALETTE)])
+        pie.add(doughnut)
+    return line, pie
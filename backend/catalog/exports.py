@@ -0,0 +1,251 @@
+"""Streaming CSV/XLSX exports for offers and contact messages.
+
+Rows come from `.values_list().iterator()` with display values (product
+name, city, subject, status) resolved in SQL, and are written to the
+response as they are produced. XLSX is written as a zip stream of a single
+inline-string worksheet, so neither format ever holds the full export in
+memory. CSV text cells that would start a formula are prefixed with `'`;
+XLSX cells are inline strings, which Excel never evaluates.
+"""
+import csv
+import datetime
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Case, CharField, Value, When
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import ProductOffer, ContactMessage
+
+CHUNK_SIZE = 2000
+
+
+def _display(field, choices):
+    """SQL CASE mapping stored choice values to their labels."""
+    return Case(
+        *[When(**{field: value}, then=Value(label)) for value, label in choices],
+        default=field,
+        output_field=CharField(),
+    )
+
+
+OFFER_HEADER = ["ID", "Ad", "Soyad", "Telefon", "Email", "Şəhər", "Məhsul", "Miqdar", "Təklif mətni", "Status", "Tarix"]
+CONTACT_HEADER = ["ID", "Ad", "Soyad", "E-poçt", "Telefon", "Mövzu", "Mesaj", "Status", "Tarix"]
+
+
+def offer_rows(queryset):
+    qs = (
+        queryset.order_by()
+        .annotate(
+            city_display=_display('city', ProductOffer.AZERBAIJAN_CITIES),
+            status_display=_display('status', ProductOffer.STATUS_CHOICES),
+        )
+        .values_list(
+            'id', 'first_name', 'last_name', 'phone_number', 'email', 'city_display',
+            'product__name', 'quantity', 'offer_text', 'status_display', 'created_at',
+        )
+        .order_by('-created_at')
+    )
+    return qs.iterator(chunk_size=CHUNK_SIZE)
+
+
+def contact_rows(queryset):
+    qs = (
+        queryset.order_by()
+        .annotate(
+            subject_display=_display('subject', ContactMessage.SUBJECT_CHOICES),
+            status_display=_display('status', ContactMessage.STATUS_CHOICES),
+        )
+        .values_list(
+            'id', 'first_name', 'last_name', 'email', 'phone', 'subject_display',
+            'message', 'status_display', 'created_at',
+        )
+        .order_by('-created_at')
+    )
+    return qs.iterator(chunk_size=CHUNK_SIZE)
+
+
+# Leading characters that make spreadsheet apps treat a CSV cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Phone numbers (E.164 since normalization) and plain numbers: a leading +/- is not a formula
+PLAIN_NUMBER_RE = re.compile(r'[+-]?[\d\s().-]+')
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    return value
+
+
+def _csv_cell(value):
+    value = _cell(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not PLAIN_NUMBER_RE.fullmatch(value):
+        # Public form input: keep it text when the export is opened in Excel
+        return "'" + value
+    return value
+
+
+# -------- CSV ---------
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(header, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens UTF-8 (Azerbaijani letters) correctly
+    yield '﻿' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(v) for v in row])
+
+
+# -------- XLSX ---------
+class _ZipSink:
+    """Non-seekable sink for ZipFile; chunks are drained by the generator between writes."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        out, self.chunks = b''.join(self.chunks), []
+        return out
+
+
+_XLSX_STATIC = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for v in values:
+        v = _cell(v)
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            cells.append(f'<c t="n"><v>{v}</v></c>')
+        else:
+            # Strip control characters that are invalid in XML
+            text = ''.join(ch for ch in str(v) if ch >= ' ' or ch in '\t\n\r')
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def _xlsx_chunks(header, rows, flush_every=500):
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC.items():
+            zf.writestr(name, content)
+        yield sink.drain()
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode())
+            for i, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if i % flush_every == 0:
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def streaming_export(fmt, basename, header, rows):
+    """StreamingHttpResponse for `rows` as csv (default) or xlsx."""
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    if fmt == 'xlsx':
+        response = StreamingHttpResponse(_xlsx_chunks(header, rows), content_type=XLSX_CONTENT_TYPE)
+        filename = f"{basename}-{stamp}.xlsx"
+    else:
+        response = StreamingHttpResponse(_csv_chunks(header, rows), content_type='text/csv; charset=utf-8')
+        filename = f"{basename}-{stamp}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# -------- Filtered endpoints ---------
+def _date_filters(queryset, params):
+    date_from = parse_date(params.get('from') or '')
+    date_to = parse_date(params.get('to') or '')
+    if date_from:
+        queryset = queryset.filter(created_at__date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__date__lte=date_to)
+    return queryset
+
+
+def filter_offers(params):
+    """ProductOffer queryset for ?status=&city=&product=&from=YYYY-MM-DD&to=YYYY-MM-DD."""
+    qs = ProductOffer.objects.all()
+    for param, field in (('status', 'status'), ('city', 'city'), ('product', 'product_id')):
+        value = params.get(param)
+        if value:
+            qs = qs.filter(**{field: value})
+    return _date_filters(qs, params)
+
+
+def filter_contact_messages(params):
+    """ContactMessage queryset for ?status=&subject=&from=YYYY-MM-DD&to=YYYY-MM-DD."""
+    qs = ContactMessage.objects.all()
+    for param in ('status', 'subject'):
+        value = params.get(param)
+        if value:
+            qs = qs.filter(**{param: value})
+    return _date_filters(qs, params)
+
+
+def export_offers(queryset, fmt='csv'):
+    return streaming_export(fmt, 'offers', OFFER_HEADER, offer_rows(queryset))
+
+
+def export_contact_messages(queryset, fmt='csv'):
+    return streaming_export(fmt, 'contact-messages', CONTACT_HEADER, contact_rows(queryset))
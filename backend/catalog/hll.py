@@ -0,0 +1,72 @@
+"""Minimal HyperLogLog for distinct-visitor estimates.
+
+One sketch per day is stored as raw register bytes (2**P bytes). Sketches
+merge by register-wise max, so the union of any set of days is estimated
+without touching the raw visit rows. With P=12 the standard error is
+1.04 / sqrt(4096) ~= 1.6%.
+"""
+import hashlib
+import math
+
+P = 12
+M = 1 << P
+STANDARD_ERROR = 1.04 / math.sqrt(M)
+
+_ALPHA = 0.7213 / (1 + 1.079 / M)
+_INV_POW2 = [2.0 ** -r for r in range(65)]
+_REST_BITS = 64 - P
+
+
+class HyperLogLog:
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        if registers is None:
+            self.registers = bytearray(M)
+        elif len(registers) != M:
+            raise ValueError(f"Expected {M} registers, got {len(registers)}")
+        else:
+            self.registers = bytearray(registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Build from stored bytes; empty/missing data gives an empty sketch."""
+        return cls(data) if data else cls()
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        idx = h >> _REST_BITS
+        rest = h & ((1 << _REST_BITS) - 1)
+        rank = _REST_BITS - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def update(self, values):
+        for v in values:
+            self.add(v)
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        estimate = _ALPHA * M * M / sum(map(_INV_POW2.__getitem__, self.registers))
+        if estimate <= 2.5 * M:
+            zeros = self.registers.count(0)
+            if zeros:
+                # Small-range correction (linear counting)
+                return int(round(M * math.log(M / zeros)))
+        return int(round(estimate))
+
+
+def union_count(sketches):
+    """Estimated distinct count across stored sketch bytes."""
+    valid = [data for data in sketches if data and len(data) == M]
+    if not valid:
+        return 0
+    # One register-wise max over all days at once is much cheaper than pairwise merges
+    merged = valid[0] if len(valid) == 1 else bytes(map(max, *valid))
+    return HyperLogLog(merged).count()
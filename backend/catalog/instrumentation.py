@@ -0,0 +1,247 @@
+"""Per-request timing: SQL, serializer, render and cache counters.
+
+RequestTimingMiddleware (enabled with REQUEST_TIMING=true) keeps a
+RequestMetrics object in a context variable for the duration of a request.
+Queries are counted by an execute wrapper installed on every DB connection,
+serializer time by wrapping DRF's `.data` properties, render time around
+TemplateResponse.render, and cache hits/misses by `record_cache` calls in the
+cache helpers. Each response then carries a `Server-Timing` header and one
+JSON log line on the `catalog.instrumentation` logger; requests whose query
+count exceeds their budget (REQUEST_QUERY_BUDGETS, by URL name) log a warning.
+With METRICS_ENABLED the same counters feed catalog.metrics, and with
+SLOW_QUERY_CAPTURE queries slower than SLOW_QUERY_MS go to catalog.slow_queries
+(sampled, stored after the response).
+
+When all three are off the middleware raises MiddlewareNotUsed, nothing is
+installed, and the only remaining cost is a context-variable lookup in
+`record_cache`.
+"""
+import contextvars
+import functools
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics, slow_queries
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'db', 'serialize', 'render', 'cache_hits', 'cache_misses', 'view', 'slow')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.view = None
+        self.slow = []
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def current_metrics():
+    """RequestMetrics of the request being handled, or None outside instrumented requests."""
+    return _current.get()
+
+
+def record_cache(hit, tier='shared'):
+    """Count one cache lookup; `tier` is 'local' for the in-process LRU (catalog.caching)."""
+    current = _current.get()
+    if current is not None:
+        if hit:
+            current.cache_hits += 1
+        else:
+            current.cache_misses += 1
+    if metrics.enabled():
+        metrics.CACHE_REQUESTS.inc(tier=tier, result='hit' if hit else 'miss')
+
+
+def _record_query(execute, sql, params, many, context):
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        current.db += elapsed
+        current.queries += 1
+    if (
+        not many
+        and getattr(settings, 'SLOW_QUERY_CAPTURE', False)
+        and elapsed * 1000 >= getattr(settings, 'SLOW_QUERY_MS', 200)
+    ):
+        _capture_slow(current, context['connection'], sql, params, elapsed)
+    return result
+
+
+def _capture_slow(current, connection, sql, params, elapsed):
+    # The EXPLAIN issued while capturing must not be counted or captured itself
+    token = _current.set(None)
+    try:
+        entry = slow_queries.maybe_capture(connection, sql, params, elapsed, current.view)
+    finally:
+        _current.reset(token)
+    if entry is not None:
+        current.slow.append(entry)
+
+
+def _add_query_wrapper(connection, **kwargs):
+    # DatabaseWrapper objects outlive reconnects (and pool checkouts); wrap each once
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _timed_property(prop, field):
+    fget = prop.fget
+
+    @functools.wraps(fget)
+    def timed(self):
+        current = _current.get()
+        if current is None:
+            return fget(self)
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            setattr(current, field, getattr(current, field) + time.perf_counter() - start)
+
+    timed.__instrumented__ = True
+    return property(timed)
+
+
+@functools.lru_cache(maxsize=1)
+def install():
+    """Hook DB connections and DRF serializers; idempotent, called when the middleware loads."""
+    from rest_framework import serializers
+
+    connection_created.connect(_add_query_wrapper, dispatch_uid='catalog.instrumentation')
+    for conn in connections.all(initialized_only=True):
+        _add_query_wrapper(conn)
+    # Only top-level `.data` is timed: nested serializers go through to_representation,
+    # so this is the whole serialization (including the lazy queries it triggers)
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.data.fget, '__instrumented__', False):
+            cls.data = _timed_property(cls.data, 'serialize')
+
+
+def query_budget(resolver_match):
+    if resolver_match is None:
+        return None
+    budgets = getattr(settings, 'REQUEST_QUERY_BUDGETS', {})
+    for name in (resolver_match.view_name, resolver_match.url_name):
+        if name in budgets:
+            return budgets[name]
+    return getattr(settings, 'REQUEST_QUERY_BUDGET_DEFAULT', None) or None
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.timing = getattr(settings, 'REQUEST_TIMING', False)
+        self.metrics = metrics.enabled()
+        self.capture = getattr(settings, 'SLOW_QUERY_CAPTURE', False)
+        if not (self.timing or self.metrics or self.capture):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        current = RequestMetrics()
+        token = _current.set(current)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, current)
+        if current.slow:
+            slow_queries.store(current.slow)
+        return response
+
+    async def __acall__(self, request):
+        current = RequestMetrics()
+        token = _current.set(current)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, current)
+        if current.slow:
+            await sync_to_async(slow_queries.store)(current.slow)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current = _current.get()
+        if current is not None and request.resolver_match:
+            current.view = request.resolver_match.view_name
+
+    def process_template_response(self, request, response):
+        # Runs last among template-response hooks, immediately before render()
+        current = _current.get()
+        if current is not None:
+            started = time.perf_counter()
+
+            def rendered(_response):
+                current.render += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, response, current):
+        total = time.perf_counter() - current.started
+        if self.metrics:
+            metrics.observe_request(request, response, current, total)
+        if self.timing:
+            self._report(request, response, current, total)
+
+    def _report(self, request, response, current, total):
+        response['Server-Timing'] = current.server_timing(total)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else None
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_queries': current.queries,
+            'db_ms': round(current.db * 1000, 2),
+            'serialize_ms': round(current.serialize * 1000, 2),
+            'render_ms': round(current.render * 1000, 2),
+            'cache_hits': current.cache_hits,
+            'cache_misses': current.cache_misses,
+        }
+        budget = query_budget(match)
+        if budget is not None and current.queries > budget:
+            record['query_budget'] = budget
+            logger.warning('query budget exceeded: %s', json.dumps(record))
+        else:
+            logger.info('%s', json.dumps(record))
@@ -0,0 +1,156 @@
+"""Cross-worker invalidation bus for the local cache tier (catalog.caching).
+
+`caching.invalidate` bumps a namespace's generation in the shared cache and
+calls `publish`. Every worker runs one background thread that makes the other
+workers drop their local copy of that generation right away, instead of
+waiting for CACHE_LOCAL_TTL to expire:
+
+- `notify` (PostgreSQL): `publish` sends `pg_notify(CACHE_INVALIDATION_CHANNEL,
+  namespace)` on the writer's connection, so the message goes out when the
+  transaction commits; the thread LISTENs on its own connection.
+- `poll` (any other database): the thread re-reads the generations of the
+  namespaces this worker has used every CACHE_INVALIDATION_POLL_INTERVAL
+  seconds.
+
+While the thread is healthy (`synced()`), local generations and versioned
+entries are kept for CACHE_LOCAL_SYNCED_TTL instead of CACHE_LOCAL_TTL. When
+the listener connection drops, all local generations are forgotten and the
+short TTL applies until it is back. The thread starts lazily on first use in
+each process, so workers forked from a preloaded master each get their own.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pid = None
+_synced = threading.Event()
+# Namespaces whose generation this process has cached locally
+_namespaces = set()
+# Bumped on every drop; a generation read from the shared cache is only kept if no drop raced it
+_epoch = 0
+
+
+def mode():
+    """'notify', 'poll' or 'off' for this configuration."""
+    configured = getattr(settings, 'CACHE_INVALIDATION', 'auto')
+    if configured == 'auto':
+        return 'notify' if connections['default'].vendor == 'postgresql' else 'poll'
+    return configured
+
+
+def _channel():
+    return getattr(settings, 'CACHE_INVALIDATION_CHANNEL', 'depod_cache')
+
+
+def synced():
+    return _synced.is_set()
+
+
+def epoch():
+    return _epoch
+
+
+def track(namespace):
+    """Note that this process caches `namespace`; starts the bus thread on first use."""
+    _namespaces.add(namespace)
+    if _pid != os.getpid():
+        start()
+
+
+def start():
+    global _pid
+    with _lock:
+        if _pid == os.getpid():
+            return
+        _pid = os.getpid()
+        _synced.clear()
+        current = mode()
+        if current == 'off':
+            return
+        target = _listen if current == 'notify' else _poll
+        threading.Thread(target=target, name=f'cache-invalidation-{current}', daemon=True).start()
+
+
+def publish(namespace):
+    if mode() != 'notify':
+        return
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [_channel(), namespace])
+    except Exception:
+        # Other workers fall back to CACHE_LOCAL_SYNCED_TTL for this change
+        logger.exception("Could not publish cache invalidation for %s", namespace)
+
+
+def _drop(namespaces):
+    global _epoch
+    from .caching import local
+
+    if not namespaces:
+        return
+    with _lock:
+        _epoch += 1
+    for namespace in namespaces:
+        local.delete(f'gen:{namespace}')
+
+
+def _desync():
+    _synced.clear()
+    _drop(list(_namespaces))
+
+
+def _listen():
+    wrapper = connections['default']
+    delay = 1
+    while True:
+        conn = None
+        try:
+            conn = wrapper.Database.connect(**wrapper.get_connection_params(), autocommit=True)
+            conn.execute(f'LISTEN {wrapper.ops.quote_name(_channel())}')
+            # Changes published while we were not listening are unknown: start from the shared cache
+            _drop(list(_namespaces))
+            _synced.set()
+            delay = 1
+            while True:
+                for notification in conn.notifies(timeout=30):
+                    _drop([notification.payload])
+                # Detect a dead connection between messages
+                conn.execute('SELECT 1')
+        except Exception:
+            _desync()
+            logger.warning("Cache invalidation listener disconnected; retrying in %ss", delay, exc_info=True)
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def _poll():
+    interval = getattr(settings, 'CACHE_INVALIDATION_POLL_INTERVAL', 1.0)
+    seen = {}
+    while True:
+        try:
+            namespaces = list(_namespaces)
+            current = cache.get_many([f'gen:{namespace}' for namespace in namespaces])
+            # A namespace seen for the first time is dropped once: it may have been cached before a change
+            _drop([
+                namespace for namespace in namespaces
+                if namespace not in seen or seen[namespace] != current.get(f'gen:{namespace}')
+            ])
+            seen = {namespace: current.get(f'gen:{namespace}') for namespace in namespaces}
+            _synced.set()
+        except Exception:
+            _desync()
+            logger.warning("Cache invalidation poll failed", exc_info=True)
+            # Reconnect on the next round (the shared cache may be the database)
+            connections.close_all()
+        time.sleep(interval)
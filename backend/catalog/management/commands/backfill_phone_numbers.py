@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import ProductOffer, ContactMessage
+from catalog.phones import normalize_phone
+
+TARGETS = [
+    (ProductOffer, 'phone_number'),
+    (ContactMessage, 'phone'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill phone_normalized (E.164) on existing offers and contact messages. Walks each table "
+        "by primary key in batches and only writes rows whose value changes; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would change')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        for model, source in TARGETS:
+            changed = unparsable = 0
+            last_pk = 0
+            while True:
+                batch = list(
+                    model.objects.filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .only('pk', source, 'phone_normalized')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                dirty = []
+                for obj in batch:
+                    raw = getattr(obj, source)
+                    value = normalize_phone(raw) or ''
+                    if raw and not value:
+                        unparsable += 1
+                    if obj.phone_normalized != value:
+                        obj.phone_normalized = value
+                        dirty.append(obj)
+                changed += len(dirty)
+                if dirty and not options['dry_run']:
+                    # bulk_update bypasses save(), so updated_at is left untouched
+                    model.objects.bulk_update(dirty, ['phone_normalized'])
+
+            verb = 'Would update' if options['dry_run'] else 'Updated'
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: {verb} {changed} rows ({unparsable} numbers could not be normalized)'
+            ))
@@ -0,0 +1,233 @@
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from itertools import count
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from catalog import analytics, benchdata, caching, reports
+from catalog.models import Category, Product
+
+STATS_RANGE, STATS_DAYS = 'day', 90
+BENCH_USER = 'bench-admin'
+
+
+def _paths(pattern, values):
+    cycle = count()
+    return lambda: pattern.format(values[next(cycle) % len(values)])
+
+
+def scenarios():
+    """{name: (kind, target)}: 'get' targets return the next URL to request, 'call' targets are run directly."""
+    product_ids = list(Product.objects.filter(id__startswith=benchdata.PREFIX).values_list('id', flat=True)[:500])
+    product_ids = product_ids or list(Product.objects.values_list('id', flat=True)[:500])
+    categories = list(Category.objects.values_list('key', flat=True)) or ['none']
+    pages = max(1, min(50, Product.objects.count() // settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)))
+    stats_key = f'analytics:stats:{STATS_RANGE}:{STATS_DAYS}'
+    stats_url = f'/api/dashboard/analytics/stats/?range={STATS_RANGE}&days={STATS_DAYS}'
+
+    def stats_cold():
+        cache.delete(stats_key)
+        caching.local.delete(stats_key)
+        return stats_url
+
+    return {
+        'product-list': ('get', lambda: '/api/products/'),
+        'product-list-deep-page': ('get', lambda: f'/api/products/?page={pages}'),
+        'product-detail': ('get', _paths('/api/products/{}/', product_ids or ['missing'])),
+        'product-search': ('get', _paths('/api/products/?search={}', benchdata.WORDS)),
+        'by-category': ('get', _paths('/api/products/by-category/{}/', categories)),
+        'categories': ('get', lambda: '/api/categories/'),
+        'about': ('get', lambda: '/api/about/'),
+        'contact': ('get', lambda: '/api/contact/'),
+        'footer': ('get', lambda: '/api/footer/'),
+        'analytics-stats-cold': ('get', stats_cold),
+        'analytics-stats-warm': ('get', lambda: stats_url),
+        'pdf-export': ('call', lambda: reports.render_pdf(analytics.compute_stats(STATS_RANGE, STATS_DAYS), STATS_DAYS)),
+    }
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the catalog, singleton, analytics and PDF code paths in-process: latency "
+        "percentiles, SQL queries and allocations per scenario. Results are JSON so runs on "
+        "different commits can be compared (--output / --compare). Generate data first with "
+        "generate_benchmark_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', help='Scenario(s) to run; default all')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--alloc-iterations', type=int, default=3,
+                            help='Extra runs under tracemalloc (kept out of the timed runs)')
+        parser.add_argument('--output', help='Write the JSON result to this file')
+        parser.add_argument('--compare', help='Baseline JSON from an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='p50 slowdown (percent) reported as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--json', action='store_true', help='Print the JSON result instead of a table')
+        parser.add_argument('--list', action='store_true', help='List scenarios and exit')
+
+    def handle(self, *args, **options):
+        available = scenarios()
+        if options['list']:
+            self.stdout.write('\n'.join(available))
+            return
+        selected = options['scenario'] or list(available)
+        unknown = set(selected) - set(available)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be positive')
+
+        user, created = get_user_model().objects.get_or_create(
+            username=BENCH_USER, defaults={'is_staff': True, 'is_superuser': True},
+        )
+        client = Client()
+        client.force_login(user)
+        results = {}
+        try:
+            # Request timing/metrics/profiling stay as configured; only hosts are opened up
+            with override_settings(ALLOWED_HOSTS=['*'], CATALOG_CACHE_HOSTS=['testserver']):
+                for name in selected:
+                    kind, target = available[name]
+                    results[name] = self._run(client, kind, target, options)
+                    if not options['json']:
+                        self.stdout.write(self._format(name, results[name]))
+        finally:
+            if created:
+                user.delete()
+
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'iterations': options['iterations'],
+                'data': benchdata.counts(),
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            regressions = self._compare(baseline, report, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+    def _request(self, client, kind, target):
+        if kind == 'call':
+            target()
+            return 200
+        return client.get(target()).status_code
+
+    def _run(self, client, kind, target, options):
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries[-1] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            for _ in range(options['warmup']):
+                self._request(client, kind, target)
+        except Exception as ex:
+            return {'error': f'{type(ex).__name__}: {ex}'}
+
+        latencies, statuses = [], []
+        with connection.execute_wrapper(counter):
+            for _ in range(options['iterations']):
+                queries.append(0)
+                start = time.perf_counter()
+                statuses.append(self._request(client, kind, target))
+                latencies.append(time.perf_counter() - start)
+
+        peaks, nets = [], []
+        for _ in range(options['alloc_iterations']):
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                self._request(client, kind, target)
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peaks.append(peak - before)
+            nets.append(current - before)
+
+        ordered = sorted(latencies)
+        return {
+            'p50_ms': round(statistics.median(ordered) * 1000, 3),
+            'p95_ms': round(_percentile(ordered, 0.95) * 1000, 3),
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+            'min_ms': round(ordered[0] * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3),
+            'queries': max(queries),
+            'queries_min': min(queries),
+            'alloc_peak_kb': round(statistics.median(peaks) / 1024, 1) if peaks else None,
+            'alloc_net_kb': round(statistics.median(nets) / 1024, 1) if nets else None,
+            'errors': sum(1 for s in statuses if s >= 400),
+            'status': statuses[-1],
+        }
+
+    def _format(self, name, r):
+        if 'error' in r:
+            return f'{name:24} ERROR {r["error"]}'
+        return (
+            f"{name:24} p50={r['p50_ms']:9.2f}ms  p95={r['p95_ms']:9.2f}ms  queries={r['queries']:3}  "
+            f"peak={r['alloc_peak_kb']}KB  status={r['status']}" + (f"  errors={r['errors']}" if r['errors'] else '')
+        )
+
+    def _compare(self, baseline, report, threshold):
+        regressions = []
+        base = baseline.get('scenarios', {})
+        self.stdout.write(
+            f"\nCompared with {baseline.get('meta', {}).get('commit') or 'baseline'} "
+            f"(threshold {threshold:.0f}% on p50, any increase in queries):"
+        )
+        for name, r in report['scenarios'].items():
+            old = base.get(name)
+            if not old or 'error' in old or 'error' in r:
+                continue
+            delta = (r['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+            flags = []
+            if delta > threshold:
+                flags.append('SLOWER')
+            if r['queries'] > old['queries']:
+                flags.append(f"QUERIES {old['queries']}->{r['queries']}")
+            if flags:
+                regressions.append(name)
+            line = f"  {name:24} p50 {old['p50_ms']:.2f} -> {r['p50_ms']:.2f}ms ({delta:+.1f}%)  {' '.join(flags)}"
+            self.stdout.write(self.style.ERROR(line) if flags else line)
+        return regressions
@@ -0,0 +1,133 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from catalog.models import Product
+
+# Connection settings compared, applied through the env vars read by core.settings
+MODES = {
+    'no-persist': {'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'true'},
+    'pool+prepared': {'DB_POOL': 'true', 'DB_SERVER_SIDE_BINDING': 'true', 'DB_PREPARE_THRESHOLD': '2'},
+}
+
+
+def default_paths():
+    paths = ['/api/categories/', '/api/products/']
+    product = Product.objects.only('id').first()
+    if product:
+        paths.append(f'/api/products/{product.pk}/')
+    return paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure API request latency against PostgreSQL with each connection mode "
+        f"({', '.join(MODES)}). Every mode runs in its own process so settings apply from scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=sorted(MODES), action='append', help='Mode(s) to run; default all')
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent request threads (server threads)')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--path', action='append', help='URL path(s) to request; default catalog endpoints')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--child', choices=sorted(MODES), help='Internal: run one mode in this process')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_db needs a PostgreSQL database (set DATABASE_URL or POSTGRES_*)')
+        if options['requests'] < 1 or options['threads'] < 1:
+            raise CommandError('--requests and --threads must be positive')
+        if options['child']:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                self.stdout.write(json.dumps(self._run(options)))
+            return
+
+        results = []
+        for mode in options['mode'] or list(MODES):
+            results.append(self._spawn(mode, options))
+
+        if options['json']:
+            self.stdout.write(json.dumps({'requests': options['requests'], 'threads': options['threads'], 'results': results}))
+            return
+        for r in results:
+            self.stdout.write(
+                f"{r['mode']:14} {r['throughput_rps']:8.1f} req/s  mean={r['mean_ms']}ms  "
+                f"p50={r['p50_ms']}ms  p95={r['p95_ms']}ms  errors={r['errors']}"
+            )
+
+    def _spawn(self, mode, options):
+        env = dict(os.environ, GUNICORN_THREADS=str(options['threads']), **MODES[mode])
+        cmd = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_db', '--child', mode,
+            '--requests', str(options['requests']), '--threads', str(options['threads']),
+            '--warmup', str(options['warmup']),
+        ]
+        for path in options['path'] or []:
+            cmd += ['--path', path]
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+        if proc.returncode != 0:
+            raise CommandError(f'{mode} run failed:\n{proc.stderr[-2000:]}')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def _run(self, options):
+        paths = options['path'] or default_paths()
+        # Sizes and settings are fixed at import time; close the probe connection used above
+        connections.close_all()
+        n, threads = options['requests'], options['threads']
+        # Warm up outside the timed window (first connections, URL resolver, templates)
+        warm = Client()
+        for i in range(options['warmup']):
+            warm.get(paths[i % len(paths)])
+        counter = iter(range(n))
+        lock = threading.Lock()
+        latencies, errors = [], []
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        return
+                    start = time.perf_counter()
+                    # The test client fires request_started/finished, so connections are
+                    # closed / returned to the pool exactly as under gunicorn
+                    resp = client.get(paths[i % len(paths)])
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        if resp.status_code != 200:
+                            errors.append(resp.status_code)
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for f in [pool.submit(worker) for _ in range(threads)]:
+                f.result()
+        wall = time.perf_counter() - start
+        ordered = sorted(latencies)
+        return {
+            'mode': options['child'],
+            'requests': len(ordered),
+            'errors': len(errors),
+            'throughput_rps': round(len(ordered) / wall, 1) if wall else 0,
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 2),
+            'p50_ms': round(statistics.median(ordered) * 1000, 2),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        }
@@ -0,0 +1,393 @@
+import datetime
+import itertools
+import json
+import queue
+import random
+import re
+import shlex
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from catalog import benchdata
+
+# Weighted actions per traffic mix; weights are relative shares of storefront actions
+MIXES = {
+    'storefront': {
+        'browse': 30, 'detail': 25, 'category': 15, 'search': 10, 'page': 8, 'visit': 10, 'offer': 1.5, 'contact': 0.5,
+    },
+    'browse': {'browse': 40, 'detail': 35, 'category': 15, 'search': 10},
+    'submit': {'detail': 40, 'visit': 20, 'offer': 30, 'contact': 10},
+}
+PAGES = ['/api/about/', '/api/contact/', '/api/footer/']
+# Gunicorn's default access_log_format: %(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
+ACCESS_LINE = re.compile(
+    r'(?P<host>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) \S+'
+)
+ACCESS_TIME = '%d/%b/%Y:%H:%M:%S %z'
+# Replayable without a request body (access logs do not record bodies)
+REPLAY_METHODS = ('GET', 'HEAD')
+REPLAY_POST_PATHS = ('/api/visit/track/', '/visit/track/')
+
+
+def parse_access_log(lines, exclude=None):
+    """[(seconds since the first request, method, path)] in log order, plus the number of lines skipped."""
+    entries, skipped, start = [], 0, None
+    for line in lines:
+        match = ACCESS_LINE.search(line)
+        if not match:
+            continue
+        method, path = match['method'], match['path']
+        replayable = method in REPLAY_METHODS or (method == 'POST' and urlsplit(path).path in REPLAY_POST_PATHS)
+        if not replayable or (exclude and exclude.search(path)):
+            skipped += 1
+            continue
+        try:
+            at = datetime.datetime.strptime(match['time'], ACCESS_TIME).timestamp()
+        except ValueError:
+            skipped += 1
+            continue
+        start = at if start is None else min(start, at)
+        entries.append((at, method, path))
+    entries.sort(key=lambda e: e[0])
+    # Timestamps have one-second resolution: spread each second's requests evenly over it
+    spread = []
+    for at, group in itertools.groupby(entries, key=lambda e: e[0]):
+        group = list(group)
+        spread += [(at - start + i / len(group), method, path) for i, (_, method, path) in enumerate(group)]
+    return spread, skipped
+
+
+_labels = {}
+
+
+def endpoint(method, path):
+    """'GET api:product-detail': the URL name the metrics use, so reports line up with /metrics."""
+    key = (method, urlsplit(path).path)
+    if key not in _labels:
+        try:
+            match = resolve(key[1])
+            name = match.view_name or match.route
+        except Resolver404:
+            name = re.sub(r'/\d+', '/<n>', key[1]) if not key[1].startswith(('/static/', '/media/')) else key[1].split('/')[1]
+        _labels[key] = f'{method} {name}'
+    return _labels[key]
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def summarize(samples, wall):
+    """{endpoint: stats} and overall totals from (endpoint, status, seconds) samples."""
+    grouped = defaultdict(list)
+    for name, status, seconds in samples:
+        grouped[name].append((status, seconds))
+    grouped['TOTAL'] = [(status, seconds) for _, status, seconds in samples]
+    report = {}
+    for name, rows in grouped.items():
+        ordered = sorted(seconds for _, seconds in rows)
+        errors = sum(1 for status, _ in rows if status == 0 or status >= 500)
+        report[name] = {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / wall, 1) if wall else 0,
+            'p50_ms': round(_percentile(ordered, 0.5) * 1000, 1),
+            'p90_ms': round(_percentile(ordered, 0.9) * 1000, 1),
+            'p99_ms': round(_percentile(ordered, 0.99) * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1),
+            'errors': errors,
+            'error_rate': round(errors / len(rows) * 100, 2),
+            'throttled': sum(1 for status, _ in rows if status == 429),
+            'client_errors': sum(1 for status, _ in rows if 400 <= status < 500 and status != 429),
+        }
+    return report
+
+
+class _Recorder:
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def request(self, session, base, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base + path, timeout=30, allow_redirects=False, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 0
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples.append((endpoint(method, path), status, elapsed))
+        return response
+
+
+class _Storefront:
+    """One simulated shopper: own connection pool, cookies and client IP."""
+
+    counter = itertools.count()
+
+    def __init__(self, base, recorder, catalog, mix, rng):
+        self.base, self.recorder, self.catalog, self.rng = base, recorder, catalog, rng
+        self.actions, self.weights = zip(*mix.items())
+        n = next(self.counter)
+        self.session = requests.Session()
+        # Honoured only when the server trusts X-Forwarded-For (DJANGO_NUM_PROXIES=1)
+        self.session.headers['X-Forwarded-For'] = f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+        self.session.headers['User-Agent'] = 'benchmark_http'
+
+    def get(self, path):
+        return self.recorder.request(self.session, self.base, 'GET', path)
+
+    def step(self):
+        getattr(self, f'_{self.rng.choices(self.actions, self.weights)[0]}')()
+
+    def _browse(self):
+        self.get(f"/api/products/?page={self.rng.randint(1, self.catalog['pages'])}")
+        self.get('/api/categories/')
+
+    def _detail(self):
+        self.get(f"/api/products/{self.rng.choice(self.catalog['products'])}/")
+
+    def _category(self):
+        self.get(f"/api/products/by-category/{self.rng.choice(self.catalog['categories'])}/")
+
+    def _search(self):
+        self.get(f'/api/products/?search={self.rng.choice(benchdata.WORDS)}')
+
+    def _page(self):
+        self.get(self.rng.choice(PAGES))
+
+    def _visit(self):
+        self.recorder.request(self.session, self.base, 'POST', '/api/visit/track/')
+
+    def _submission(self, path, payload):
+        i = self.rng.getrandbits(48)
+        payload.update({
+            'first_name': 'Bench', 'last_name': 'Load',
+            # Unique sender per submission; rows carry the benchmark marker so benchdata.clean removes them
+            'email': f'load{i:x}@{benchdata.EMAIL_DOMAIN}',
+        })
+        self.recorder.request(self.session, self.base, 'POST', path, json=payload)
+
+    def _offer(self):
+        self._submission('/api/offers/', {
+            'phone_number': f'+99450{self.rng.randrange(10_000_000):07d}', 'city': 'baku',
+            'product': self.rng.choice(self.catalog['products']), 'quantity': 1,
+        })
+
+    def _contact(self):
+        self._submission('/api/contact-messages/', {
+            'phone': f'+99455{self.rng.randrange(10_000_000):07d}', 'subject': 'other',
+            'message': 'load test', 'privacy_accepted': True,
+        })
+
+
+def _results(payload):
+    return payload.get('results', payload) if isinstance(payload, dict) else payload
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running (or --serve started) server over HTTP with a synthetic storefront traffic "
+        "mix or by replaying a gunicorn access log, and report throughput, latency percentiles and "
+        "error rates per endpoint. Use it to compare worker classes, pool sizes and caching setups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', choices=['synthetic', 'replay'])
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--serve', help='Command starting the server (run from the backend dir, stopped afterwards), '
+                                            'e.g. "gunicorn core.wsgi:application -w 4 -b 127.0.0.1:8000"')
+        parser.add_argument('--serve-log', help='File for the started server\'s output (default: discarded)')
+        parser.add_argument('--users', type=int, default=20, help='Concurrent clients')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--json', action='store_true', help='Print the JSON report instead of a table')
+        synthetic = parser.add_argument_group('synthetic')
+        synthetic.add_argument('--mix', choices=sorted(MIXES), default='storefront')
+        synthetic.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        synthetic.add_argument('--think', type=float, default=0.0,
+                               help='Mean pause between a user\'s actions in seconds (exponential); 0 = closed loop')
+        synthetic.add_argument('--seed', type=int, default=42)
+        replay = parser.add_argument_group('replay')
+        replay.add_argument('--log', help='Gunicorn access log (default format) to replay')
+        replay.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier (2 = twice as fast)')
+        replay.add_argument('--limit', type=int, help='Replay at most this many requests')
+        replay.add_argument('--exclude', help='Regex; matching paths are not replayed (e.g. "^/admin/")')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be positive')
+        if options['mode'] == 'replay':
+            if not options['log']:
+                raise CommandError('replay needs --log')
+            if options['speed'] <= 0:
+                raise CommandError('--speed must be positive')
+        base = options['url'].rstrip('/')
+        server = self._serve(options, base) if options['serve'] else None
+        try:
+            if options['mode'] == 'synthetic':
+                samples, wall, meta = self._synthetic(base, options)
+            else:
+                samples, wall, meta = self._replay(base, options)
+        finally:
+            if server:
+                server.terminate()
+                try:
+                    server.wait(15)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+        if not samples:
+            raise CommandError('No requests were made')
+
+        report = {
+            'meta': {
+                'mode': options['mode'], 'url': base, 'serve': options['serve'], 'users': options['users'],
+                'wall_s': round(wall, 2),
+                'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                **meta,
+            },
+            'endpoints': summarize(samples, wall),
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+
+    def _serve(self, options, base):
+        log = open(options['serve_log'], 'ab') if options['serve_log'] else subprocess.DEVNULL
+        server = subprocess.Popen(
+            shlex.split(options['serve']), cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Server exited with {server.returncode} before becoming ready')
+            try:
+                if requests.get(f'{base}/healthz/', timeout=2).status_code == 200:
+                    return server
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+        server.kill()
+        raise CommandError(f'Server did not answer {base}/healthz/ within 60s')
+
+    def _catalog(self, base):
+        """Product ids, category keys and page count, read through the API like a browser would."""
+        try:
+            first = requests.get(f'{base}/api/products/', timeout=30).json()
+            categories = requests.get(f'{base}/api/categories/', timeout=30).json()
+        except (requests.RequestException, ValueError) as ex:
+            raise CommandError(f'Could not read the catalog from {base}: {ex}')
+        products = [p['id'] for p in _results(first)]
+        if not products:
+            raise CommandError('The catalog is empty; run generate_benchmark_data on the server database first')
+        page_size = len(products)
+        count = first.get('count', page_size) if isinstance(first, dict) else page_size
+        # A few more pages of ids so details are not all served from the first page's rows
+        for page in range(2, min(6, -(-count // page_size) + 1)):
+            products += [p['id'] for p in _results(requests.get(f'{base}/api/products/?page={page}', timeout=30).json())]
+        return {
+            'products': products,
+            'categories': [c['key'] for c in _results(categories)] or ['none'],
+            'pages': max(1, min(50, -(-count // page_size))),
+        }
+
+    def _synthetic(self, base, options):
+        catalog = self._catalog(base)
+        recorder = _Recorder()
+        mix = MIXES[options['mix']]
+        deadline = time.monotonic() + options['duration']
+
+        def user(n):
+            rng = random.Random(options['seed'] + n)
+            shopper = _Storefront(base, recorder, catalog, mix, rng)
+            while time.monotonic() < deadline:
+                shopper.step()
+                if options['think']:
+                    time.sleep(min(rng.expovariate(1 / options['think']), max(0, deadline - time.monotonic())))
+
+        start = time.perf_counter()
+        self._run_threads(user, options['users'])
+        return recorder.samples, time.perf_counter() - start, {'mix': options['mix'], 'think_s': options['think']}
+
+    def _replay(self, base, options):
+        exclude = re.compile(options['exclude']) if options['exclude'] else None
+        with open(options['log'], encoding='utf-8', errors='replace') as f:
+            entries, skipped = parse_access_log(f, exclude)
+        entries = entries[:options['limit']] if options['limit'] else entries
+        if not entries:
+            raise CommandError(f"No replayable requests in {options['log']}")
+        recorder = _Recorder()
+        pending = queue.Queue()
+        lag = []
+        speed = options['speed']
+
+        def worker(n):
+            session = requests.Session()
+            session.headers['User-Agent'] = 'benchmark_http'
+            while True:
+                item = pending.get()
+                if item is None:
+                    return
+                due, method, path = item
+                # How far behind schedule the request went out (all workers busy = server saturated)
+                lag.append(time.perf_counter() - due)
+                recorder.request(session, base, method, path)
+
+        threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(options['users'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for offset, method, path in entries:
+            due = start + offset / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pending.put((due, method, path))
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        ordered = sorted(lag)
+        return recorder.samples, wall, {
+            'log': options['log'], 'speed': speed, 'replayed': len(entries), 'skipped': skipped,
+            'log_span_s': round(entries[-1][0], 1),
+            'schedule_lag_p99_ms': round(_percentile(ordered, 0.99) * 1000, 1),
+        }
+
+    def _run_threads(self, target, count):
+        threads = [threading.Thread(target=target, args=(n,), daemon=True) for n in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _print(self, report):
+        meta = report['meta']
+        extra = (
+            f"mix={meta['mix']}" if meta['mode'] == 'synthetic'
+            else f"speed={meta['speed']}x replayed={meta['replayed']} skipped={meta['skipped']} "
+                 f"lag p99={meta['schedule_lag_p99_ms']}ms"
+        )
+        self.stdout.write(f"{meta['mode']} against {meta['url']}: {meta['users']} users, {meta['wall_s']}s, {extra}")
+        self.stdout.write(
+            f"{'endpoint':44} {'req':>7} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'err%':>6} {'429':>5}"
+        )
+        rows = sorted(report['endpoints'].items(), key=lambda item: (item[0] == 'TOTAL', -item[1]['requests']))
+        for name, r in rows:
+            line = (
+                f"{name[:44]:44} {r['requests']:7} {r['throughput_rps']:8.1f} {r['p50_ms']:8.1f} {r['p90_ms']:8.1f} "
+                f"{r['p99_ms']:8.1f} {r['max_ms']:8.1f} {r['error_rate']:6.2f} {r['throttled']:5}"
+            )
+            self.stdout.write(self.style.ERROR(line) if r['errors'] else line)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from catalog import async_views, signals
+from catalog.models import Product, ProductOffer, ContactMessage
+
+MARKER_DOMAIN = 'bench.invalid'
+
+# Sync URLs under the project urlconf; async URLs under ASYNC_URLCONF (the async views alone)
+ASYNC_URLCONF = 'catalog.async_urls'
+ENDPOINTS = {
+    'offers': ('/api/offers/', '/offers/', ProductOffer),
+    'contact': ('/api/contact-messages/', '/contact-messages/', ContactMessage),
+}
+
+
+def _payload(endpoint, i, product_id):
+    phone = f"+99450{i % 10_000_000:07d}"
+    email = f"bench{i}@{MARKER_DOMAIN}"
+    if endpoint == 'offers':
+        return {
+            'first_name': 'Bench', 'last_name': 'Run', 'phone_number': phone, 'email': email,
+            'city': 'baku', 'product': product_id, 'quantity': 1,
+        }
+    return {
+        'first_name': 'Bench', 'last_name': 'Run', 'email': email, 'phone': phone,
+        'subject': 'other', 'message': 'benchmark', 'privacy_accepted': True,
+    }
+
+
+def _ip(i):
+    # Unique client per request so the IP throttle is not what gets measured
+    return f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+
+
+def _summary(name, latencies, wall, errors):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0
+    return {
+        'mode': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else 0,
+        'p50_ms': round(statistics.median(ordered) * 1000, 1) if ordered else 0,
+        'p95_ms': round(p95 * 1000, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync (WSGI) and async (ASGI) submission paths in-process under a simulated "
+        "slow notification backend. The WSGI run models a fixed pool of sync workers; the ASGI run "
+        "serves every client from one event loop. Rows created are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='offers')
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients')
+        parser.add_argument('--workers', type=int, default=4, help='Sync workers modelled for the WSGI run')
+        parser.add_argument('--notify-delay', type=float, default=0.2, help='Seconds each notification blocks')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1 or options['workers'] < 1:
+            raise CommandError('--requests, --concurrency and --workers must be positive')
+        if getattr(settings, 'ASYNC_SUBMISSIONS', False):
+            raise CommandError('Run with ASYNC_SUBMISSIONS off: the WSGI run needs the sync views on the public URLs')
+        product = Product.objects.only('id').first()
+        if options['endpoint'] == 'offers' and product is None:
+            raise CommandError('Need at least one Product to submit offers against')
+        sync_url, async_url, model = ENDPOINTS[options['endpoint']]
+        delay = options['notify_delay']
+
+        def slow_telegram(text):
+            time.sleep(delay)
+            return True
+
+        results = []
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            DEFAULT_NOTIFY_EMAIL=f'notify@{MARKER_DOMAIN}',
+            ALLOWED_HOSTS=['*'],
+        ), mock.patch.object(signals, 'send_telegram_message', slow_telegram), \
+                mock.patch.object(signals, 'telegram_configured', lambda: True):
+            try:
+                results.append(self._run_wsgi(sync_url, options, product))
+                with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+                    results.append(self._run_asgi(async_url, options, product))
+                # Let handed-off notifications finish before cleanup
+                async_views.wait_for_notifications()
+            finally:
+                deleted, _ = model.objects.filter(email__endswith=f'@{MARKER_DOMAIN}').delete()
+
+        if options['json']:
+            self.stdout.write(json.dumps({'endpoint': options['endpoint'], 'notify_delay': delay, 'results': results}))
+            return
+        for r in results:
+            self.stdout.write(
+                f"{r['mode']:5} {r['requests']} req  errors={r['errors']}  wall={r['wall_s']}s  "
+                f"{r['throughput_rps']} req/s  p50={r['p50_ms']}ms  p95={r['p95_ms']}ms"
+            )
+        wsgi, asgi = results
+        if wsgi['throughput_rps']:
+            self.stdout.write(self.style.SUCCESS(
+                f"ASGI/WSGI throughput: {asgi['throughput_rps'] / wsgi['throughput_rps']:.1f}x "
+                f"(cleaned up {deleted} rows)"
+            ))
+
+    def _run_wsgi(self, url, options, product):
+        n, clients = options['requests'], options['concurrency']
+        worker_slots = threading.Semaphore(options['workers'])
+        counter = iter(range(n))
+        lock = threading.Lock()
+        latencies, errors = [], []
+
+        def client_loop():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        return
+                    start = time.perf_counter()
+                    # A sync worker is held for the whole request, notifications included
+                    with worker_slots:
+                        resp = client.post(url, _payload(options['endpoint'], i, product and product.pk),
+                                           content_type='application/json', headers={'x-forwarded-for': _ip(i)})
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                        if resp.status_code != 201:
+                            errors.append(resp.status_code)
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            for f in [pool.submit(client_loop) for _ in range(clients)]:
+                f.result()
+        return _summary('wsgi', latencies, time.perf_counter() - start, len(errors))
+
+    def _run_asgi(self, url, options, product):
+        n, clients = options['requests'], options['concurrency']
+        offset = n  # distinct phones/emails/IPs from the WSGI run
+
+        async def run():
+            counter = iter(range(offset, offset + n))
+            latencies, errors = [], []
+
+            async def client_loop():
+                client = AsyncClient()
+                for i in counter:
+                    start = time.perf_counter()
+                    resp = await client.post(url, _payload(options['endpoint'], i, product and product.pk),
+                                             content_type='application/json', headers={'x-forwarded-for': _ip(i)})
+                    latencies.append(time.perf_counter() - start)
+                    if resp.status_code != 201:
+                        errors.append(resp.status_code)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client_loop() for _ in range(clients)))
+            return _summary('asgi', latencies, time.perf_counter() - start, len(errors))
+
+        return asyncio.run(run())
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from catalog import metrics
+
+
+def migration_state(executor):
+    """Hash of the migration graph on disk, plus the migrations not yet applied."""
+    leaves = sorted(executor.loader.graph.leaf_nodes())
+    digest = hashlib.sha1(repr(leaves).encode()).hexdigest()[:12]
+    plan = executor.migration_plan(leaves)
+    return digest, plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the web start-up steps (migrate + createcachetable, sync_default_media, ensure_superuser) in one process, "
+        "skipping the ones with nothing to do, then optionally exec the server given after `--`:\n"
+        "  python manage.py boot -- gunicorn core.wsgi:application --preload ..."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip', action='append', default=[], choices=['migrate', 'media', 'superuser'],
+                            help='Step to skip entirely; may be repeated')
+        parser.add_argument('server', nargs='*', help='Command to exec once booted (after --)')
+
+    def handle(self, *args, **options):
+        skip = set(options['skip'])
+        started = time.perf_counter()
+
+        if 'migrate' not in skip:
+            self._step('migrate', self._migrate)
+            # Table for CACHE_BACKEND=db; a no-op for other backends or when it exists
+            self._step('cachetable', lambda: call_command('createcachetable'))
+        if 'media' not in skip:
+            self._step('media', lambda: call_command('sync_default_media', stdout=self.stdout))
+        if 'superuser' not in skip:
+            self._step('superuser', lambda: call_command('ensure_superuser', stdout=self.stdout))
+        if settings.CATALOG_STORE:
+            # Workers map it from their first request instead of each triggering a rebuild
+            self._step('catalog-store', lambda: call_command('build_catalog_store', stdout=self.stdout))
+
+        self.stdout.write(self.style.SUCCESS(f'boot: ready in {time.perf_counter() - started:.2f}s'))
+
+        server = options['server']
+        if server:
+            executable = shutil.which(server[0])
+            if not executable:
+                raise CommandError(f'boot: {server[0]} not found on PATH')
+            self.stdout.flush()
+            # Drop DB connections opened by the steps; the server process must not inherit them
+            connection.close()
+            # Worker snapshots from the previous server run would otherwise be summed in
+            metrics.clear_dir()
+            os.execv(executable, server)
+
+    def _step(self, name, fn):
+        t = time.perf_counter()
+        fn()
+        self.stdout.write(f'boot: {name} {(time.perf_counter() - t) * 1000:.0f}ms')
+
+    def _migrate(self):
+        executor = MigrationExecutor(connection)
+        digest, plan = migration_state(executor)
+        if not plan:
+            self.stdout.write(f'boot: migrations up to date (state {digest}); skipping migrate')
+            return
+        self.stdout.write(f'boot: applying {len(plan)} migration(s) (state {digest})')
+        call_command('migrate', interactive=False, stdout=self.stdout)
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from catalog import catalog_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the memory-mapped catalog snapshot served by the product and category endpoints "
+        "(CATALOG_STORE) and publish it atomically at CATALOG_STORE_PATH. Workers rebuild it on "
+        "their own after catalog writes; this is for start-up and manual runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Write here instead of CATALOG_STORE_PATH')
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild even if the published snapshot is current')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['path']:
+            result = catalog_store.build(options['path'])
+        elif options['force']:
+            result = catalog_store.build()
+        else:
+            result = catalog_store.publish()
+        path = options['path'] or settings.CATALOG_STORE_PATH
+        if result is None:
+            self.stdout.write(f'Catalog store at {path} is current')
+            return
+        products, categories, size = result
+        self.stdout.write(self.style.SUCCESS(
+            f'Catalog store: {products} products, {categories} categories, {size / 1024:.0f} KB '
+            f'at {path} in {time.perf_counter() - started:.2f}s'
+        ))
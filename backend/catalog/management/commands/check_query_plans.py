@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the catalog/analytics hot queries against this database and fail if any of them "
+        "can only be served by a sequential scan of its main table (the same check as the "
+        "QueryPlanTests in catalog.tests, on real data)."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            results = query_plans.check()
+        except ValueError as ex:
+            raise CommandError(str(ex))
+        failures = []
+        for label, bad, summary in results:
+            if bad:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'SEQ  {label}: {summary}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK   {label}: {summary}'))
+        if failures:
+            raise CommandError(f"Sequential scans in: {', '.join(failures)}")
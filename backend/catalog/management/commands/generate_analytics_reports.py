@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from catalog import reports
+from catalog.models import AnalyticsReport
+
+SCHEDULES = {
+    'weekly': ('day', 7),
+    'monthly': ('day', 30),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-generate scheduled analytics PDFs (run from cron) and render any queued jobs "
+        "left behind by recycled web workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=sorted(SCHEDULES), action='append',
+            help='Scheduled report(s) to generate; may be repeated. Defaults to all.',
+        )
+        parser.add_argument('--pending', action='store_true', help='Also render queued ad-hoc jobs')
+
+    def handle(self, *args, **options):
+        for kind in options.get('kind') or sorted(SCHEDULES):
+            granularity, days = SCHEDULES[kind]
+            report = reports.request_report(granularity, days, kind=kind, background=False)
+            self.stdout.write(f"{kind}: report #{report.pk} {report.status}")
+
+        if options['pending']:
+            for report in AnalyticsReport.objects.filter(status='pending').order_by('created_at'):
+                reports.generate(report)
+                self.stdout.write(f"queued: report #{report.pk} {report.status}")
+
+        self.stdout.write(self.style.SUCCESS('generate_analytics_reports done'))
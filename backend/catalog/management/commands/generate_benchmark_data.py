@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import benchdata
+
+# products, offers, contact messages, visits
+SIZES = {
+    '1k': (1_000, 10_000, 2_000, 100_000),
+    '10k': (10_000, 100_000, 20_000, 1_000_000),
+    '100k': (100_000, 1_000_000, 100_000, 5_000_000),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic catalog (products with images, specs, features, highlights), offers, "
+        "contact messages and site visits for benchmarks, then rebuild the analytics rollups. "
+        "Generated rows are tagged (bench- ids, @bench.invalid emails) and removed with --clean. "
+        "Never run against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=sorted(SIZES), default='1k', help='Preset data set size')
+        parser.add_argument('--products', type=int, help='Override the preset product count')
+        parser.add_argument('--offers', type=int)
+        parser.add_argument('--contacts', type=int)
+        parser.add_argument('--visits', type=int)
+        parser.add_argument('--days', type=int, default=365, help='History window offers/messages/visits are spread over')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clean', action='store_true', help='Delete existing benchmark data first')
+        parser.add_argument('--clean-only', action='store_true', help='Delete benchmark data and exit')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be positive')
+        if options['clean'] or options['clean_only']:
+            deleted = benchdata.clean()
+            benchdata.rebuild_rollups(options['days'])
+            self.stdout.write(f"Deleted: {', '.join(f'{k}={v}' for k, v in deleted.items())}")
+            if options['clean_only']:
+                return
+        elif benchdata.counts()['products']:
+            raise CommandError('Benchmark data already present; pass --clean to regenerate it')
+
+        products, offers, contacts, visits = SIZES[options['size']]
+        products = options['products'] if options['products'] is not None else products
+        offers = options['offers'] if options['offers'] is not None else offers
+        contacts = options['contacts'] if options['contacts'] is not None else contacts
+        visits = options['visits'] if options['visits'] is not None else visits
+        seed, days = options['seed'], options['days']
+        log = self.stdout.write
+
+        started = time.perf_counter()
+        steps = [
+            ('catalog', lambda: benchdata.generate_catalog(products, seed=seed, log=log)),
+            ('offers', lambda: benchdata.generate_offers(offers, days=days, seed=seed, log=log)),
+            ('contact messages', lambda: benchdata.generate_contact_messages(contacts, days=days, seed=seed, log=log)),
+            ('visits', lambda: benchdata.generate_visits(visits, days=days, seed=seed, log=log)),
+            ('rollups', lambda: benchdata.rebuild_rollups(days)),
+        ]
+        for label, step in steps:
+            t = time.perf_counter()
+            step()
+            self.stdout.write(f'{label}: done in {time.perf_counter() - t:.1f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f"Benchmark data ready in {time.perf_counter() - started:.1f}s: "
+            + ', '.join(f'{k}={v}' for k, v in benchdata.counts().items())
+        ))
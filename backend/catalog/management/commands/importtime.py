@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'wsgi': 'import core.wsgi',
+    'asgi': 'import core.asgi',
+    'setup': 'import django; django.setup()',
+}
+
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        except ValueError:
+            continue
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((stripped, int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the web app in a fresh interpreter under `python -X importtime` and report where "
+        "start-up time goes: heaviest packages and heaviest single modules (self time)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='wsgi')
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TARGETS[options['target']]],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f'Import failed:\n{proc.stderr[-2000:]}')
+
+        rows = parse_importtime(proc.stderr)
+        total_ms = sum(r[2] for r in rows if r[3] == 0) / 1000
+        limit = options['limit']
+        # Self time summed per top-level package: what each dependency costs at start-up
+        packages = {}
+        for name, self_us, _, _ in rows:
+            root = name.split('.', 1)[0]
+            packages[root] = packages.get(root, 0) + self_us
+        by_package = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        by_self = sorted(rows, key=lambda r: r[1], reverse=True)[:limit]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'target': options['target'],
+                'modules': len(rows),
+                'total_ms': round(total_ms, 1),
+                'top_packages': [{'package': n, 'ms': round(us / 1000, 1)} for n, us in by_package],
+                'top_self': [{'module': n, 'ms': round(s / 1000, 1)} for n, s, _, _ in by_self],
+            }))
+            return
+
+        self.stdout.write(f"{options['target']}: {len(rows)} modules imported in {total_ms:.0f}ms")
+        self.stdout.write('\nHeaviest packages (self time of all their modules):')
+        for name, us in by_package:
+            self.stdout.write(f'  {us / 1000:8.1f}ms  {name}')
+        self.stdout.write('\nHeaviest modules (self):')
+        for name, self_us, _, _ in by_self:
+            self.stdout.write(f'  {self_us / 1000:8.1f}ms  {name}')
@@ -0,0 +1,55 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from catalog import rollups
+from catalog.models import SiteVisit
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold raw SiteVisit rows older than the retention window into the daily visit rollup "
+        "(counts + HyperLogLog sketches) and delete them, one day at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Keep this many days of raw visits (default: settings.SITE_VISIT_RETENTION_DAYS)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        keep = options['days'] if options['days'] is not None else getattr(settings, 'SITE_VISIT_RETENTION_DAYS', 120)
+        if keep < 1:
+            raise CommandError('--days must be positive')
+        cutoff = timezone.localdate() - datetime.timedelta(days=keep)
+
+        first = SiteVisit.objects.aggregate(v=Min('date'))['v']
+        if first is None or first >= cutoff:
+            self.stdout.write(self.style.SUCCESS(f'Nothing older than {cutoff}; nothing to prune'))
+            return
+
+        last = cutoff - datetime.timedelta(days=1)
+        if options['dry_run']:
+            n = SiteVisit.objects.filter(date__lt=cutoff).count()
+            self.stdout.write(f'Would downsample {first}..{last} and delete {n} visit rows')
+            return
+
+        # Make sure every day about to lose its raw rows has an up-to-date rollup
+        rollups.rebuild_visit_stats(first, last)
+
+        deleted = 0
+        day = first
+        while day < cutoff:
+            # Per-day deletes keep transactions short and walk the (date, session_key) index
+            n, _ = SiteVisit.objects.filter(date=day).delete()
+            deleted += n
+            day += datetime.timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Downsampled {first}..{last} into VisitDailyStat and deleted {deleted} visit rows'
+        ))
@@ -0,0 +1,35 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from catalog import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild daily analytics rollups from raw offers, contact messages and visits. "
+        "Without options the whole history is backfilled; use --days for a periodic reconcile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only rebuild the last N days (including today)')
+        parser.add_argument('--since', help='Rebuild from this date (YYYY-MM-DD) up to today')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = None
+        if options.get('days'):
+            if options['days'] < 1:
+                raise CommandError('--days must be positive')
+            start = today - datetime.timedelta(days=options['days'] - 1)
+        elif options.get('since'):
+            try:
+                start = datetime.date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM-DD')
+
+        result = rollups.rebuild_all(start=start, end=today)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups rebuilt: offers={result['offers']}, contacts={result['contacts']}, visits={result['visits']}"
+        ))
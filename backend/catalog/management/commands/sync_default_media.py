@@ -1,11 +1,57 @@
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from pathlib import Path
+import hashlib
+import json
 import shutil
 
+MANIFEST_NAME = '.default_media_manifest.json'
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_manifest(src, previous):
+    """{relative path: [size, mtime_ns, sha1]} for the repo media folder.
+
+    Files whose size and mtime match the previous manifest reuse its hash, so an
+    unchanged tree costs one stat per file; a fresh checkout (new mtimes) is
+    re-hashed once but not re-copied.
+    """
+    manifest = {}
+    for path in src.rglob('*'):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(src).as_posix()
+        st = path.stat()
+        old = previous.get(rel)
+        if old and old[:2] == [st.st_size, st.st_mtime_ns]:
+            manifest[rel] = old
+        else:
+            manifest[rel] = [st.st_size, st.st_mtime_ns, _sha1(path)]
+    return manifest
+
+
+def load_manifest(dst):
+    try:
+        return json.loads((dst / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
 
 class Command(BaseCommand):
-    help = "Copy default media from repo 'media' folder into MEDIA_ROOT if missing."
+    help = (
+        "Copy default media from repo 'media' folder into MEDIA_ROOT. Files already copied "
+        "(per the manifest written into MEDIA_ROOT) are skipped unless they changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Copy every file regardless of the manifest')
 
     def handle(self, *args, **options):
         src = Path(settings.BASE_DIR) / 'media'
@@ -17,20 +63,33 @@ class Command(BaseCommand):
 
         dst.mkdir(parents=True, exist_ok=True)
 
+        previous = {} if options['force'] else load_manifest(dst)
+        current = source_manifest(src, previous)
+
         copied = 0
-        for path in src.rglob('*'):
-            rel = path.relative_to(src)
+        failed = False
+        for rel, meta in current.items():
             target = dst / rel
-            if path.is_dir():
-                target.mkdir(parents=True, exist_ok=True)
+            # Keep repo media in sync: copy when new, changed, or deleted from MEDIA_ROOT
+            old = previous.get(rel)
+            if old and old[0] == meta[0] and old[2:] == meta[2:] and target.exists():
                 continue
             try:
                 target.parent.mkdir(parents=True, exist_ok=True)
-                # Always overwrite to keep repo media in sync
-                shutil.copy2(path, target)
+                shutil.copy2(src / rel, target)
                 copied += 1
             except Exception as e:
-                self.stdout.write(self.style.WARNING(f"Failed to copy {path} -> {target}: {e}"))
+                failed = True
+                self.stdout.write(self.style.WARNING(f"Failed to copy {src / rel} -> {target}: {e}"))
+
+        if not failed:
+            (dst / MANIFEST_NAME).write_text(json.dumps(current, sort_keys=True))
+
+        if not copied:
+            self.stdout.write(self.style.SUCCESS(
+                f"sync_default_media: {len(current)} files unchanged; nothing to copy"
+            ))
+            return
 
         # Log a quick summary of known subfolders for debug
         cats = (dst / 'categories')
@@ -0,0 +1,268 @@
+"""Prometheus-compatible metrics without a client library.
+
+Metrics are module-level Counter / Gauge / Histogram objects updated in
+process. With METRICS_DIR set, every process periodically (at most once per
+METRICS_FLUSH_INTERVAL seconds, on update) writes a snapshot of its values to
+`METRICS_DIR/metrics_<pid>.json`; the /metrics view merges its own live values
+with the other workers' files, so any gunicorn worker can answer a scrape.
+Counters and histograms are summed over all files, dead workers included, so
+totals never go backwards when a worker is recycled; gauges only count live
+processes. `boot` clears the directory before the server starts.
+
+Without METRICS_DIR the endpoint reports the answering process only, which is
+exact for a single worker.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_lock = threading.Lock()
+_registry = {}
+_last_flush = 0.0
+_dirty = False
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        _updated()
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = value
+        _updated()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Per-bucket (non-cumulative) counts, then +Inf, sum, count
+        index = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with _lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [0] * (len(self.buckets) + 3)
+            entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+        _updated()
+
+
+REQUEST_LATENCY = Histogram(
+    'depod_http_request_duration_seconds', 'Request latency by URL name.', ('view', 'method', 'status'),
+)
+DB_QUERIES = Counter('depod_db_queries_total', 'SQL queries executed, by URL name.', ('view',))
+DB_TIME = Counter('depod_db_query_seconds_total', 'Time spent in SQL queries, by URL name.', ('view',))
+CACHE_REQUESTS = Counter(
+    'depod_cache_requests_total', 'Cache lookups by tier (local LRU/shared) and result (hit/miss).', ('tier', 'result'),
+)
+CACHE_EVICTIONS = Counter('depod_cache_local_evictions_total', 'Entries evicted from the in-process LRU.')
+CACHE_COALESCED = Counter(
+    'depod_cache_coalesced_total',
+    'Cache misses served by another caller\'s computation, by scope (process/shared) and outcome (result/timeout).',
+    ('scope', 'outcome'),
+)
+NOTIFY_LATENCY = Histogram(
+    'depod_notification_duration_seconds', 'Notification delivery time by channel.', ('channel',),
+)
+NOTIFY_FAILURES = Counter('depod_notification_failures_total', 'Failed notification deliveries.', ('channel',))
+VISIT_BACKLOG = Gauge('depod_visit_buffer_pending', 'Visits buffered in memory, not yet flushed.')
+VISIT_FLUSH_FAILURES = Counter('depod_visit_flush_failures_total', 'Visit buffer flushes that failed.')
+
+
+def _metrics_dir():
+    return getattr(settings, 'METRICS_DIR', '') if enabled() else ''
+
+
+def _snapshot():
+    with _lock:
+        return {name: [[list(k), v] for k, v in m.values.items()] for name, m in _registry.items() if m.values}
+
+
+def _updated():
+    global _dirty
+    _dirty = True
+    if _metrics_dir() and time.monotonic() - _last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+        flush()
+
+
+def flush():
+    """Write this process's snapshot for the other workers to read (atomic replace)."""
+    global _last_flush, _dirty
+    directory = _metrics_dir()
+    if not directory or not _dirty:
+        return
+    _last_flush = time.monotonic()
+    _dirty = False
+    path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({'pid': os.getpid(), 'metrics': _snapshot()}, f)
+        os.replace(f'{path}.tmp', path)
+    except OSError:
+        _dirty = True
+
+
+def clear_dir():
+    if not _metrics_dir():
+        return
+    for path in glob.glob(os.path.join(_metrics_dir(), 'metrics_*.json*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _reset_after_fork():
+    # A preloaded master must not hand its counts to every worker
+    global _dirty
+    for metric in _registry.values():
+        metric.values.clear()
+    _dirty = False
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(flush)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(into, key, value):
+    current = into.get(key)
+    if current is None:
+        into[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        into[key] = [a + b for a, b in zip(current, value)]
+    else:
+        into[key] = current + value
+
+
+def collect():
+    """{name: {labelvalues: value}} merged over this process and the other workers' files."""
+    merged = {name: {} for name in _registry}
+    snapshots = [_snapshot()]
+    directory = _metrics_dir()
+    if directory:
+        own = os.getpid()
+        for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data.get('pid') == own:
+                continue
+            live = _alive(data.get('pid', 0))
+            snapshot = {
+                name: samples for name, samples in data.get('metrics', {}).items()
+                if name in _registry and (live or _registry[name].kind != 'gauge')
+            }
+            snapshots.append(snapshot)
+    for snapshot in snapshots:
+        for name, samples in snapshot.items():
+            for key, value in samples:
+                _merge(merged[name], tuple(key), value)
+    return merged
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _fmt(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name, values in collect().items():
+        metric = _registry[name]
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key, value in sorted(values.items()):
+            if metric.kind != 'histogram':
+                lines.append(f'{name}{_labels(metric.labelnames, key)} {_fmt(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ('+Inf',), value[:-2]):
+                cumulative += count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                lines.append(f'{name}_bucket{_labels(metric.labelnames, key, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(metric.labelnames, key)} {_fmt(float(value[-2]))}')
+            lines.append(f'{name}_count{_labels(metric.labelnames, key)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    if not enabled():
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+def observe_request(request, response, request_metrics, duration):
+    match = getattr(request, 'resolver_match', None)
+    view = (match.url_name or match.view_name) if match else 'unmatched'
+    REQUEST_LATENCY.observe(duration, view=view, method=request.method, status=response.status_code)
+    if request_metrics.queries:
+        DB_QUERIES.inc(request_metrics.queries, view=view)
+        DB_TIME.inc(request_metrics.db, view=view)
@@ -1,14 +1,11 @@
-from django.utils import timezone
-from .models import SiteVisit
+from django.utils.deprecation import MiddlewareMixin
 
 
-class SiteVisitMiddleware:
-    """Records one SiteVisit per session per day. Skips /admin and /static."""
+class SiteVisitMiddleware(MiddlewareMixin):
+    """Formerly recorded one SiteVisit per session per day; now a pass-through.
 
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-    # Switched to explicit per-tab tracking via /api/visit/track/.
-    # Avoid creating sessions on GET to prevent over-counting on refresh.
-        return self.get_response(request)
+    Switched to explicit per-tab tracking via /api/visit/track/ to avoid creating
+    sessions on GET (over-counting on refresh). MiddlewareMixin keeps it
+    async-capable, so it adds no sync/async switch of its own under ASGI (the
+    chain still starts on a thread while WhiteNoiseMiddleware is installed).
+    """
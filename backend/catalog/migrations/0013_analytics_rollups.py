@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    ProductOffer = apps.get_model('catalog', 'ProductOffer')
+    ContactMessage = apps.get_model('catalog', 'ContactMessage')
+    SiteVisit = apps.get_model('catalog', 'SiteVisit')
+    OfferDailyStat = apps.get_model('catalog', 'OfferDailyStat')
+    ContactDailyStat = apps.get_model('catalog', 'ContactDailyStat')
+    VisitDailyStat = apps.get_model('catalog', 'VisitDailyStat')
+
+    offers = (
+        ProductOffer.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'product_id', 'product__category_id', 'city', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    OfferDailyStat.objects.bulk_create([
+        OfferDailyStat(
+            date=r['day'], product_id=r['product_id'], category_id=r['product__category_id'],
+            city=r['city'], status=r['status'], count=r['n'],
+        )
+        for r in offers
+    ], batch_size=1000)
+
+    contacts = (
+        ContactMessage.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'subject')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    ContactDailyStat.objects.bulk_create([
+        ContactDailyStat(date=r['day'], subject=r['subject'], count=r['n']) for r in contacts
+    ], batch_size=1000)
+
+    visits = SiteVisit.objects.values('date').annotate(n=Count('id')).order_by()
+    VisitDailyStat.objects.bulk_create([
+        VisitDailyStat(date=r['date'], visits=r['n']) for r in visits
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_alter_aboutpage_options_alter_category_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('visits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Gündəlik Ziyarət Statistikası',
+                'verbose_name_plural': 'Gündəlik Ziyarət Statistikaları',
+            },
+        ),
+        migrations.CreateModel(
+            name='ContactDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('subject', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Gündəlik Mesaj Statistikası',
+                'verbose_name_plural': 'Gündəlik Mesaj Statistikaları',
+                'constraints': [models.UniqueConstraint(fields=('date', 'subject'), name='uniq_contact_daily_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OfferDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('city', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_offer_stats', to='catalog.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_offer_stats', to='catalog.product')),
+            ],
+            options={
+                'verbose_name': 'Gündəlik Təklif Statistikası',
+                'verbose_name_plural': 'Gündəlik Təklif Statistikaları',
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'city', 'status'), name='uniq_offer_daily_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+from catalog.hll import HyperLogLog
+
+
+def backfill_sketches(apps, schema_editor):
+    SiteVisit = apps.get_model('catalog', 'SiteVisit')
+    VisitDailyStat = apps.get_model('catalog', 'VisitDailyStat')
+    sketches = {}
+    for day, key in SiteVisit.objects.values_list('date', 'session_key').iterator(chunk_size=5000):
+        sketches.setdefault(day, HyperLogLog()).add(key)
+    for day, sketch in sketches.items():
+        VisitDailyStat.objects.filter(date=day).update(sketch=sketch.to_bytes())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visitdailystat',
+            name='sketch',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_visitdailystat_sketch'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sitevisit',
+            name='catalog_sit_date_29743a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sitevisit',
+            name='catalog_sit_session_d00beb_idx',
+        ),
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='session_key',
+            field=models.CharField(max_length=40),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_sitevisit_index_cleanup'),
+    ]
+
+    operations = [
+        # Build the composite indexes before dropping the single-column FK indexes they replace
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at'], name='contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['status', '-created_at'], name='contact_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(condition=models.Q(('status', 'new')), fields=['-created_at'], name='contact_new_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'name'], name='product_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productfeature',
+            index=models.Index(fields=['product', 'order', 'id'], name='feature_product_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producthighlight',
+            index=models.Index(fields=['product', 'order', 'id'], name='highlight_product_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['product', 'order', 'id'], name='image_product_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoffer',
+            index=models.Index(fields=['-created_at'], name='offer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoffer',
+            index=models.Index(fields=['status', '-created_at'], name='offer_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoffer',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at'], name='offer_pending_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productspec',
+            index=models.Index(fields=['product', 'order', 'id'], name='spec_product_order_idx'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='products', to='catalog.category'),
+        ),
+        migrations.AlterField(
+            model_name='productfeature',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='features', to='catalog.product'),
+        ),
+        migrations.AlterField(
+            model_name='producthighlight',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='highlights', to='catalog.product'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='images', to='catalog.product'),
+        ),
+        migrations.AlterField(
+            model_name='productspec',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='specs', to='catalog.product'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:11
+
+import catalog.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('adhoc', 'Tələb üzrə'), ('weekly', 'Həftəlik'), ('monthly', 'Aylıq')], default='adhoc', max_length=20, verbose_name='Növ')),
+                ('granularity', models.CharField(default='day', max_length=10)),
+                ('days', models.PositiveIntegerField(default=30)),
+                ('cache_key', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Gözləyir'), ('running', 'Hazırlanır'), ('done', 'Hazırdır'), ('failed', 'Xəta')], default='pending', max_length=20, verbose_name='Status')),
+                ('file', models.FileField(blank=True, storage=catalog.models.report_storage, upload_to='reports/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaradılma tarixi')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Hazır olma tarixi')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Analitika Hesabatı',
+                'verbose_name_plural': 'Analitika Hesabatları',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
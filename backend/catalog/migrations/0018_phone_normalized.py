@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0017_analyticsreport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=16, verbose_name='Telefon (E.164)'),
+        ),
+        migrations.AddField(
+            model_name='productoffer',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=16, verbose_name='Telefon (E.164)'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['phone_normalized', '-created_at'], name='contact_phone_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoffer',
+            index=models.Index(fields=['phone_normalized', '-created_at'], name='offer_phone_created_idx'),
+        ),
+    ]
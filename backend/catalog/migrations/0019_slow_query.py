@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0018_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=16, verbose_name='Barmaq izi')),
+                ('sql', models.TextField(verbose_name='Normallaşdırılmış SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Parametrlər')),
+                ('duration_ms', models.FloatField(verbose_name='Müddət (ms)')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='View')),
+                ('origin', models.CharField(blank=True, max_length=300, verbose_name='Mənbə')),
+                ('plan', models.TextField(blank=True, verbose_name='EXPLAIN planı')),
+                ('database', models.CharField(default='default', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Tarix')),
+            ],
+            options={
+                'verbose_name': 'Yavaş Sorğu',
+                'verbose_name_plural': 'Yavaş Sorğular',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
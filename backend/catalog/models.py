@@ -1,7 +1,11 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.db.models import Q
 from django.utils.text import slugify
 
+from .phones import normalize_phone
+
 
 class Category(models.Model):
     key = models.SlugField(max_length=50, unique=True, help_text='Identifier used in frontend (e.g., earphone)')
@@ -20,7 +24,8 @@ class Category(models.Model):
 class Product(models.Model):
     id = models.SlugField(primary_key=True, max_length=100, editable=False, help_text='Auto-generated from name (e.g., peak-black)')
     name = models.CharField(max_length=200)
-    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='products')
+    # Indexed through (category, name) below
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='products', db_index=False)
     description = models.TextField(blank=True)
     # prices optional; keep nullable since current frontend hides price
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -31,6 +36,10 @@ class Product(models.Model):
         verbose_name = "Məhsul"
         verbose_name_plural = "Məhsullar"
         ordering = ['name']
+        indexes = [
+            # ?category=<key> listings ordered by name
+            models.Index(fields=['category', 'name'], name='product_category_name_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -51,7 +60,7 @@ class Product(models.Model):
 
 
 class ProductImage(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images', db_index=False)
     image = models.ImageField(upload_to='products/')
     is_main = models.BooleanField(default=False)
     alt = models.CharField(max_length=255, blank=True)
@@ -59,35 +68,51 @@ class ProductImage(models.Model):
 
     class Meta:
         ordering = ['order', 'id']
+        indexes = [
+            # Prefetch: product_id IN (...) ORDER BY order, id
+            models.Index(fields=['product', 'order', 'id'], name='image_product_order_idx'),
+        ]
 
 
 class ProductFeature(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='features')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='features', db_index=False)
     text = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['order', 'id']
+        indexes = [
+            # Prefetch: product_id IN (...) ORDER BY order, id
+            models.Index(fields=['product', 'order', 'id'], name='feature_product_order_idx'),
+        ]
 
 
 class ProductSpec(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='specs')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='specs', db_index=False)
     label = models.CharField(max_length=100)
     value = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['order', 'id']
+        indexes = [
+            # Prefetch: product_id IN (...) ORDER BY order, id
+            models.Index(fields=['product', 'order', 'id'], name='spec_product_order_idx'),
+        ]
 
 
 class ProductHighlight(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='highlights')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='highlights', db_index=False)
     number = models.CharField(max_length=50)
     text = models.CharField(max_length=100)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['order', 'id']
+        indexes = [
+            # Prefetch: product_id IN (...) ORDER BY order, id
+            models.Index(fields=['product', 'order', 'id'], name='highlight_product_order_idx'),
+        ]
 
 
 # Editable About Page model
@@ -364,6 +389,8 @@ class ProductOffer(models.Model):
     first_name = models.CharField(max_length=100, verbose_name='Ad')
     last_name = models.CharField(max_length=100, verbose_name='Soyad')
     phone_number = models.CharField(max_length=20, verbose_name='Telefon nömrəsi')
+    # E.164 form of phone_number, used for exact repeat-customer lookups
+    phone_normalized = models.CharField(max_length=16, blank=True, editable=False, verbose_name='Telefon (E.164)')
     city = models.CharField(max_length=50, choices=AZERBAIJAN_CITIES, verbose_name='Şəhər')
     email = models.EmailField(blank=True, null=True, verbose_name='Email (İstəyə görə)')
     quantity = models.PositiveIntegerField(default=1, verbose_name='Miqdar (ədəd)')
@@ -376,10 +403,24 @@ class ProductOffer(models.Model):
         verbose_name = 'Məhsul Təklifi'
         verbose_name_plural = 'Məhsul Təklifləri'
         ordering = ['-created_at']
+        indexes = [
+            # Recent offers, rollup rebuilds by day range, default admin ordering
+            models.Index(fields=['-created_at'], name='offer_created_idx'),
+            # Admin changelist filtered by status
+            models.Index(fields=['status', '-created_at'], name='offer_status_created_idx'),
+            # Pending inbox stays tiny even when history is large
+            models.Index(fields=['-created_at'], condition=Q(status='pending'), name='offer_pending_created_idx'),
+            # Customer history: all offers for one phone, newest first
+            models.Index(fields=['phone_normalized', '-created_at'], name='offer_phone_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.product.name}"
 
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone_number) or ''
+        super().save(*args, **kwargs)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -409,6 +450,7 @@ class ContactMessage(models.Model):
     last_name = models.CharField(max_length=100, verbose_name="Soyad")
     email = models.EmailField(verbose_name="E-poçt")
     phone = models.CharField(max_length=30, blank=True, verbose_name="Telefon")
+    phone_normalized = models.CharField(max_length=16, blank=True, editable=False, verbose_name="Telefon (E.164)")
     subject = models.CharField(max_length=50, choices=SUBJECT_CHOICES, verbose_name="Mövzu")
     message = models.TextField(verbose_name="Mesaj")
     privacy_accepted = models.BooleanField(default=False, verbose_name="Məxfilik qəbul edildi")
@@ -420,25 +462,151 @@ class ContactMessage(models.Model):
         verbose_name = "Əlaqə Mesajı"
         verbose_name_plural = "Əlaqə Mesajları"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="contact_created_idx"),
+            models.Index(fields=["status", "-created_at"], name="contact_status_created_idx"),
+            models.Index(fields=["-created_at"], condition=Q(status="new"), name="contact_new_created_idx"),
+            models.Index(fields=["phone_normalized", "-created_at"], name="contact_phone_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name} - {self.get_subject_display()}"
 
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone) or ""
+        super().save(*args, **kwargs)
+
 
-# Simple unique daily site visits (per session)
+# Simple unique daily site visits (per visitor). Raw rows are short-lived:
+# prune_site_visits folds them into VisitDailyStat and deletes old days.
 class SiteVisit(models.Model):
-    date = models.DateField(db_index=True)
-    session_key = models.CharField(max_length=40, db_index=True)
+    date = models.DateField()
+    session_key = models.CharField(max_length=40)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # The (date, session_key) unique index serves every lookup we make:
+        # per-day counts, per-visitor checks, rollup rebuilds and date-range pruning.
         unique_together = ("date", "session_key")
-        indexes = [
-            models.Index(fields=["date"]),
-            models.Index(fields=["session_key"]),
-        ]
         verbose_name = "Sayt Ziyarəti"
         verbose_name_plural = "Sayt Ziyarətləri"
 
     def __str__(self) -> str:
         return f"{self.date} - {self.session_key}"
+
+
+# Daily analytics rollups (maintained by catalog.rollups; read by analytics_stats)
+class OfferDailyStat(models.Model):
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_offer_stats')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_offer_stats')
+    city = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Gündəlik Təklif Statistikası"
+        verbose_name_plural = "Gündəlik Təklif Statistikaları"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product", "city", "status"],
+                name="uniq_offer_daily_stat",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.date} - {self.product_id} - {self.status}: {self.count}"
+
+
+class ContactDailyStat(models.Model):
+    date = models.DateField()
+    subject = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Gündəlik Mesaj Statistikası"
+        verbose_name_plural = "Gündəlik Mesaj Statistikaları"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "subject"],
+                name="uniq_contact_daily_stat",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.date} - {self.subject}: {self.count}"
+
+
+class VisitDailyStat(models.Model):
+    date = models.DateField(unique=True)
+    visits = models.PositiveIntegerField(default=0)
+    # HyperLogLog registers of the day's visitor ids (see catalog.hll)
+    sketch = models.BinaryField(default=b'', editable=False)
+
+    class Meta:
+        verbose_name = "Gündəlik Ziyarət Statistikası"
+        verbose_name_plural = "Gündəlik Ziyarət Statistikaları"
+
+    def __str__(self) -> str:
+        return f"{self.date}: {self.visits}"
+
+
+def report_storage():
+    # Reports contain customer data, so keep them out of the publicly served MEDIA_ROOT
+    return FileSystemStorage(location=settings.REPORTS_ROOT)
+
+
+class AnalyticsReport(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Gözləyir"),
+        ("running", "Hazırlanır"),
+        ("done", "Hazırdır"),
+        ("failed", "Xəta"),
+    ]
+    KIND_CHOICES = [
+        ("adhoc", "Tələb üzrə"),
+        ("weekly", "Həftəlik"),
+        ("monthly", "Aylıq"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default="adhoc", verbose_name="Növ")
+    granularity = models.CharField(max_length=10, default="day")
+    days = models.PositiveIntegerField(default=30)
+    # sha256 of (granularity, days, analytics data version); equal keys render identical PDFs
+    cache_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending", verbose_name="Status")
+    file = models.FileField(upload_to="reports/", storage=report_storage, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaradılma tarixi")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Hazır olma tarixi")
+
+    class Meta:
+        verbose_name = "Analitika Hesabatı"
+        verbose_name_plural = "Analitika Hesabatları"
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+
+# Ring buffer of sampled slow queries (written by catalog.slow_queries, capped at SLOW_QUERY_CAPACITY rows)
+class SlowQuery(models.Model):
+    # sha1 of the normalized SQL; equal fingerprints are the same statement with different literals
+    fingerprint = models.CharField(max_length=16, db_index=True, verbose_name="Barmaq izi")
+    sql = models.TextField(verbose_name="Normallaşdırılmış SQL")
+    params = models.TextField(blank=True, verbose_name="Parametrlər")
+    duration_ms = models.FloatField(verbose_name="Müddət (ms)")
+    view = models.CharField(max_length=200, blank=True, verbose_name="View")
+    origin = models.CharField(max_length=300, blank=True, verbose_name="Mənbə")
+    plan = models.TextField(blank=True, verbose_name="EXPLAIN planı")
+    database = models.CharField(max_length=50, default="default")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Tarix")
+
+    class Meta:
+        verbose_name = "Yavaş Sorğu"
+        verbose_name_plural = "Yavaş Sorğular"
+        ordering = ["-id"]
+
+    def __str__(self) -> str:
+        return f"{self.fingerprint} {self.duration_ms:.0f}ms"
@@ -1,10 +1,13 @@
 import logging
-import requests
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
+def telegram_configured() -> bool:
+    return bool(getattr(settings, 'TELEGRAM_BOT_TOKEN', '') and getattr(settings, 'TELEGRAM_CHAT_ID', ''))
+
+
 def send_telegram_message(text: str) -> bool:
     token = getattr(settings, 'TELEGRAM_BOT_TOKEN', '')
     chat_id = getattr(settings, 'TELEGRAM_CHAT_ID', '')
@@ -17,6 +20,8 @@ def send_telegram_message(text: str) -> bool:
         "parse_mode": "HTML",
         "disable_web_page_preview": True,
     }
+    # Imported here: `requests` is only needed when a notification is actually sent
+    import requests
     try:
         resp = requests.post(url, json=payload, timeout=10)
         if resp.ok:
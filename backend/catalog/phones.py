@@ -0,0 +1,42 @@
+"""Phone number normalization to E.164.
+
+Numbers are typed in many shapes (`+994 50 123 45 67`, `0501234567`,
+`(050) 123-45-67`, `00994501234567`). `normalize_phone` maps them to one
+canonical `+<country><number>` string so offers and messages from the same
+customer can be matched with an exact, indexed lookup.
+"""
+import re
+
+DEFAULT_COUNTRY_CODE = '994'
+NATIONAL_NUMBER_LENGTH = 9  # Azerbaijan: 2-digit operator/area code + 7 digits
+
+_SEPARATORS = re.compile(r'[\s\-\(\)\.]')
+
+
+def normalize_phone(value, country_code=DEFAULT_COUNTRY_CODE):
+    """Return `value` as E.164 (`+994501234567`), or None if it is not a phone number."""
+    if not value:
+        return None
+    raw = _SEPARATORS.sub('', str(value).strip())
+    if raw.startswith('+'):
+        digits = raw[1:]
+    elif raw.startswith('00'):
+        digits = raw[2:]
+    else:
+        digits = raw
+        if len(digits) == NATIONAL_NUMBER_LENGTH + 1 and digits.startswith('0'):
+            # National trunk prefix: 0501234567
+            digits = country_code + digits[1:]
+        elif len(digits) == NATIONAL_NUMBER_LENGTH:
+            # Without trunk prefix: 501234567
+            digits = country_code + digits
+        elif not digits.startswith(country_code):
+            return None
+    if not digits.isdigit():
+        return None
+    if digits.startswith(country_code) and len(digits) != len(country_code) + NATIONAL_NUMBER_LENGTH:
+        return None
+    # E.164: at most 15 digits; shortest real numbers are around 8
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return '+' + digits
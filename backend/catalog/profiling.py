@@ -0,0 +1,315 @@
+"""Staff-only on-demand profiling of a single request.
+
+Append `?__profile=<mode>` to any URL while logged in as staff and the
+response is replaced by a report about that request:
+
+- `cpu`: a sampling profiler (stdlib thread reading the request thread's
+  stack every PROFILE_SAMPLE_INTERVAL seconds) rendered as a flame graph;
+  `&__format=folded` returns the collapsed stacks instead (speedscope /
+  flamegraph.pl input).
+- `calls`: deterministic cProfile, listed by cumulative time.
+- `sql`: every query with its duration, grouped into exact duplicates (same
+  SQL and params) and similar queries (same SQL, different params).
+- `mem`: tracemalloc diff of the request, top allocation sites by line.
+
+Everyone else, and the parameter on any other value, gets the normal response.
+Off unless REQUEST_PROFILING is set. The middleware is sync-only: under ASGI
+async views are profiled only as far as their synchronous parts. tracemalloc
+is process-wide, so `mem` reports include allocations made by concurrent
+requests in the same worker.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+from html import escape
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+PARAM = '__profile'
+MODES = ('cpu', 'calls', 'sql', 'mem')
+FLAME_WIDTH = 1200
+FLAME_ROW = 16
+
+# Requests currently passing through the middleware in this process
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _short_path(filename):
+    for marker in ('site-packages/', 'backend/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+class _Sampler(threading.Thread):
+    """Collects the stacks of one thread as {'root;...;leaf': samples}."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        labels = {}
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if codes:
+                self.stacks[tuple(reversed(codes))] += 1
+        # Label frames once per distinct code object, after sampling, to keep each sample cheap
+        for codes in list(self.stacks):
+            names = []
+            for code in codes:
+                if code not in labels:
+                    labels[code] = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+                names.append(labels[code])
+            self.stacks[';'.join(names)] += self.stacks.pop(codes)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _flame_tree(stacks):
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['value'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'name': name, 'value': 0, 'children': {}})
+            node['value'] += count
+    return root
+
+
+def flame_svg(stacks):
+    """Flame graph (root at the bottom) as inline SVG; hover a frame for its name and share."""
+    root = _flame_tree(stacks)
+    total = root['value'] or 1
+    rects = []
+    depth_max = 0
+
+    def walk(node, x, depth):
+        nonlocal depth_max
+        width = node['value'] / total * FLAME_WIDTH
+        if width < 0.5:
+            return
+        depth_max = max(depth_max, depth)
+        rects.append((x, depth, width, node))
+        offset = x
+        for child in sorted(node['children'].values(), key=lambda n: n['name']):
+            walk(child, offset, depth + 1)
+            offset += child['value'] / total * FLAME_WIDTH
+
+    walk(root, 0.0, 0)
+    height = (depth_max + 1) * FLAME_ROW
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAME_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+    ]
+    for x, depth, width, node in rects:
+        y = height - (depth + 1) * FLAME_ROW
+        share = node['value'] / total * 100
+        # Warm palette, varied by name so neighbouring frames are distinguishable
+        hue = 10 + sum(map(ord, node['name'])) % 45
+        label = escape(node['name'])
+        parts.append(
+            f'<g><title>{label} — {node["value"]} samples ({share:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FLAME_ROW - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>'
+        )
+        chars = int(width / 7)
+        if chars > 3:
+            text = node['name'] if len(node['name']) <= chars else node['name'][:chars - 2] + '..'
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + 11}">{escape(text)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        global _in_flight
+        with _in_flight_lock:
+            _in_flight += 1
+        try:
+            return self._handle(request)
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+    def _handle(self, request):
+        mode = request.GET.get(PARAM)
+        user = getattr(request, 'user', None)
+        if mode not in MODES or not (user and user.is_active and user.is_staff):
+            return self.get_response(request)
+        # Hide our parameters from the view (admin changelists reject unknown ones)
+        fmt = request.GET.get('__format')
+        params = request.GET.copy()
+        params.pop(PARAM, None)
+        params.pop('__format', None)
+        request.GET = params
+        request.META['QUERY_STRING'] = params.urlencode()
+        if mode == 'cpu':
+            return self._profile_cpu(request, folded=fmt == 'folded')
+        return getattr(self, f'_profile_{mode}')(request)
+
+    def _run(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        # Render lazy responses and drain streamed ones (exports) inside the profiled window
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            response.close()
+        else:
+            size = len(response.content)
+        return response, time.perf_counter() - start, size
+
+    def _report(self, request, response, elapsed, size, mode, **context):
+        context.update({
+            'mode': mode,
+            'modes': MODES,
+            'path': request.get_full_path(),
+            'query': request.GET.urlencode(),
+            'method': request.method,
+            'status': response.status_code,
+            'size': size,
+            'elapsed_ms': round(elapsed * 1000, 2),
+        })
+        html = render_to_string('admin/profile_report.html', context, request=request)
+        return HttpResponse(html)
+
+    def _profile_cpu(self, request, folded=False):
+        interval = getattr(settings, 'PROFILE_SAMPLE_INTERVAL', 0.001)
+        sampler = _Sampler(threading.get_ident(), interval)
+        # The sampler needs the GIL to take a sample; by default a busy request thread only
+        # yields it every 5ms, so shorten the switch interval for the duration of the profile.
+        # It is process-wide: only when this worker is serving no other request
+        with _in_flight_lock:
+            alone = _in_flight == 1
+        switch_interval = sys.getswitchinterval()
+        if alone:
+            sys.setswitchinterval(min(switch_interval, interval / 2))
+        sampler.start()
+        try:
+            response, elapsed, size = self._run(request)
+        finally:
+            sampler.stop()
+            if alone:
+                sys.setswitchinterval(switch_interval)
+        if folded:
+            body = '\n'.join(f'{stack} {count}' for stack, count in sampler.stacks.most_common())
+            return HttpResponse(body + '\n', content_type='text/plain; charset=utf-8')
+        self_time = Counter()
+        for stack, count in sampler.stacks.items():
+            self_time[stack.rsplit(';', 1)[-1]] += count
+        samples = sum(sampler.stacks.values())
+        return self._report(
+            request, response, elapsed, size, 'cpu',
+            samples=samples,
+            flame_svg=flame_svg(sampler.stacks),
+            hot=[(name, count, round(count / samples * 100, 1)) for name, count in self_time.most_common(25)],
+        )
+
+    def _profile_calls(self, request):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response, elapsed, size = self._run(request)
+        finally:
+            profiler.disable()
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats('cumulative').print_stats(80)
+        out.write('\n')
+        stats.sort_stats('tottime').print_stats(30)
+        return self._report(request, response, elapsed, size, 'calls', text=out.getvalue())
+
+    def _profile_sql(self, request):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((context['connection'].alias, sql, repr(params), time.perf_counter() - start))
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(capture))
+            response, elapsed, size = self._run(request)
+
+        duplicates = Counter((alias, sql, params) for alias, sql, params, _ in queries)
+        similar = {}
+        for alias, sql, params, duration in queries:
+            group = similar.setdefault((alias, sql), {'sql': sql, 'alias': alias, 'count': 0, 'ms': 0.0})
+            group['count'] += 1
+            group['ms'] += duration * 1000
+        return self._report(
+            request, response, elapsed, size, 'sql',
+            queries=[
+                {'alias': a, 'sql': s, 'params': p, 'ms': round(d * 1000, 2), 'duplicates': duplicates[(a, s, p)]}
+                for a, s, p, d in queries
+            ],
+            total_ms=round(sum(q[3] for q in queries) * 1000, 2),
+            duplicate_count=sum(n - 1 for n in duplicates.values()),
+            similar=sorted(
+                ({**g, 'ms': round(g['ms'], 2)} for g in similar.values() if g['count'] > 1),
+                key=lambda g: g['count'], reverse=True,
+            ),
+        )
+
+    def _profile_mem(self, request):
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(getattr(settings, 'PROFILE_TRACEMALLOC_FRAMES', 10))
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        try:
+            response, elapsed, size = self._run(request)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+        return self._report(
+            request, response, elapsed, size, 'mem',
+            peak_kb=round(peak / 1024, 1),
+            net_kb=round(sum(s.size_diff for s in diff) / 1024, 1),
+            allocations=[
+                {
+                    'site': f'{_short_path(s.traceback[0].filename)}:{s.traceback[0].lineno}',
+                    'kb': round(s.size_diff / 1024, 1),
+                    'count': s.count_diff,
+                }
+                for s in diff[:30]
+            ],
+        )
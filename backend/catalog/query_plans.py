@@ -0,0 +1,76 @@
+"""EXPLAIN checks for the catalog/analytics hot queries.
+
+Each hot query must be able to reach its main table through an index.
+Sequential scans are disabled while planning (PostgreSQL) so small datasets,
+where a seq scan would be cheaper, still show whether an index path exists.
+Used by catalog.tests and the check_query_plans command.
+"""
+import datetime
+import json
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Product, ProductImage, ProductFeature, ProductSpec, ProductHighlight,
+    ProductOffer, ContactMessage, OfferDailyStat, SiteVisit,
+)
+
+VENDORS = ('postgresql', 'sqlite')
+
+
+def hot_queries():
+    """(label, queryset, table that must be reached through an index)."""
+    today = timezone.localdate()
+    since = timezone.now() - datetime.timedelta(days=7)
+    ids = ['peak-black', 'peak-white']
+    return [
+        ('products by category', Product.objects.filter(category__key='earphone').order_by('name'), Product._meta.db_table),
+        ('image prefetch', ProductImage.objects.filter(product_id__in=ids), ProductImage._meta.db_table),
+        ('feature prefetch', ProductFeature.objects.filter(product_id__in=ids), ProductFeature._meta.db_table),
+        ('spec prefetch', ProductSpec.objects.filter(product_id__in=ids), ProductSpec._meta.db_table),
+        ('highlight prefetch', ProductHighlight.objects.filter(product_id__in=ids), ProductHighlight._meta.db_table),
+        ('recent offers', ProductOffer.objects.filter(created_at__gte=since).order_by('-created_at')[:100], ProductOffer._meta.db_table),
+        ('pending offers', ProductOffer.objects.filter(status='pending').order_by('-created_at')[:100], ProductOffer._meta.db_table),
+        ('new contact messages', ContactMessage.objects.filter(status='new').order_by('-created_at')[:100], ContactMessage._meta.db_table),
+        ('offer rollup window', OfferDailyStat.objects.filter(date__gte=today - datetime.timedelta(days=90)), OfferDailyStat._meta.db_table),
+        ('visits today', SiteVisit.objects.filter(date=today), SiteVisit._meta.db_table),
+    ]
+
+
+def _pg_seq_scans(plan, table):
+    found = []
+    node = plan
+    if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') == table:
+        found.append(node)
+    for child in node.get('Plans', []):
+        found.extend(_pg_seq_scans(child, table))
+    return found
+
+
+def check():
+    """[(label, seq_scan, plan summary)] for every hot query."""
+    vendor = connection.vendor
+    if vendor not in VENDORS:
+        raise ValueError(f'Unsupported database vendor: {vendor}')
+    results = []
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            for label, qs, table in hot_queries():
+                sql, params = qs.query.sql_with_params()
+                if vendor == 'postgresql':
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    bad = bool(_pg_seq_scans(plan[0]['Plan'], table))
+                    summary = plan[0]['Plan']['Node Type']
+                else:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                    details = [row[-1] for row in cursor.fetchall()]
+                    bad = any(d.startswith(f'SCAN {table}') and 'INDEX' not in d for d in details)
+                    summary = '; '.join(details)
+                results.append((label, bad, summary))
+    return results
@@ -0,0 +1,261 @@
+"""Analytics PDF reports.
+
+Rendering runs outside the request: `request_report` returns an
+AnalyticsReport job and hands the work to a small per-process thread pool
+(or to `generate_analytics_reports` from cron). Artifacts are keyed by the
+request parameters plus a hash of the analytics payload, so repeated clicks
+on unchanged data download the existing file instead of rendering again.
+"""
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import analytics, charts
+from .models import AnalyticsReport, ProductOffer
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics-report')
+
+JOB_TIMEOUT = 10 * 60
+
+
+class ReportUnavailable(Exception):
+    """Neither WeasyPrint nor ReportLab could render the report."""
+
+
+def data_version(data):
+    """Stable hash of an analytics payload; changes whenever the numbers do."""
+    raw = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+def report_key(granularity, days, version):
+    return hashlib.sha256(f"{granularity}:{days}:{version}".encode()).hexdigest()
+
+
+# -------- Rendering ---------
+@functools.lru_cache(maxsize=1)
+def _unicode_font():
+    """Register a Unicode TTF with ReportLab once per process (Azerbaijani/Turkish glyphs)."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font_candidates = [
+        os.path.join(settings.BASE_DIR, 'static', 'fonts', 'DejaVuSans.ttf'),
+        os.path.join(settings.BASE_DIR, 'static', 'fonts', 'NotoSans-Regular.ttf'),
+        '/Library/Fonts/Arial Unicode.ttf',
+        '/Library/Fonts/Arial Unicode MS.ttf',
+        '/System/Library/Fonts/Supplemental/NotoSans-Regular.ttf',
+    ]
+    found_path = next((p for p in font_candidates if os.path.exists(p)), None)
+    if not found_path:
+        return None
+    try:
+        pdfmetrics.registerFont(TTFont('CustomUnicode', found_path))
+        return 'CustomUnicode'
+    except Exception:
+        # Ignore and fall back to Helvetica (may miss some glyphs)
+        return None
+
+
+def _render_weasyprint(data, base_url):
+    from weasyprint import HTML  # type: ignore
+    context = {
+        'generated_at': timezone.now(),
+        'line': data['line'],
+        'pie': data['pie'],
+        'widgets': data['widgets'],
+        'recent_offers': data['recent_offers'],
+        **charts.chart_svgs(data),
+    }
+    html = render_to_string('admin/analytics_pdf.html', context)
+    return HTML(string=html, base_url=base_url).write_pdf()
+
+
+def _render_reportlab(data, days):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    )
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buf,
+        pagesize=A4,
+        title="Analytics",
+        leftMargin=1.5*cm,
+        rightMargin=1.5*cm,
+        topMargin=1.2*cm,
+        bottomMargin=1.2*cm,
+    )
+    styles = getSampleStyleSheet()
+    font_name = _unicode_font()
+    if font_name:
+        styles['Normal'].fontName = font_name
+        styles['Title'].fontName = font_name
+    styles['Title'].fontSize = 20
+    styles['Normal'].fontSize = 10
+
+    story = []
+    story.append(Paragraph("Depod Analytics", styles['Title']))
+    story.append(Paragraph(timezone.localtime().strftime('%Y-%m-%d %H:%M'), styles['Normal']))
+    story.append(Spacer(1, 0.6*cm))
+
+    w = data.get('widgets', {})
+    story.append(Paragraph(
+        f"Son 90 gün: Təkliflər: <b>{w.get('offers_90',0)}</b> · "
+        f"Mesajlar: <b>{w.get('contacts_90',0)}</b> · "
+        f"Ziyarətlər: <b>{w.get('visits_90',0)}</b>",
+        styles['Normal']
+    ))
+    story.append(Spacer(1, 0.5*cm))
+
+    # Charts drawn from the same series as the dashboard
+    line_chart, pie_chart = charts.reportlab_drawings(data, width=17*cm, pie_size=5*cm)
+    story.append(line_chart)
+    story.append(Spacer(1, 0.5*cm))
+    story.append(pie_chart)
+    story.append(Spacer(1, 0.5*cm))
+
+    # Recent offers table (top 30)
+    rec = data.get('recent_offers', [])[:30]
+    # If empty, broaden the window to the selected 'days' to avoid empty PDF tables
+    if not rec:
+        since_fb = timezone.now() - timezone.timedelta(days=days)
+        rec = list(
+            ProductOffer.objects.filter(created_at__gte=since_fb)
+            .values('id', 'first_name', 'last_name', 'product__name', 'quantity', 'status', 'created_at')
+            .order_by('-created_at')[:30]
+        )
+    table_data = [["ID", "Müştəri", "Məhsul", "Miqdar", "Status", "Tarix"]]
+    for r in rec:
+        created = r.get('created_at','')
+        # Format date as YYYY-MM-DD only
+        if hasattr(created, 'date'):
+            created_str = created.date().isoformat()
+        else:
+            created_str = str(created)[:10]
+        table_data.append([
+            r.get('id',''),
+            f"{r.get('first_name','')} {r.get('last_name','')}",
+            r.get('product__name','') or '',
+            r.get('quantity',''),
+            r.get('status',''),
+            created_str,
+        ])
+
+    if len(table_data) == 1:
+        table_data.append(["—","—","—","—","—","—"])
+
+    col_widths = [1.5*cm, 3.5*cm, 4.5*cm, 1.8*cm, 2.5*cm, 3.0*cm]
+    tbl = Table(table_data, colWidths=col_widths, repeatRows=1)
+    header_font = font_name or 'Helvetica-Bold'
+    body_font = font_name or 'Helvetica'
+    tbl.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f0f0f0')),
+        ('TEXTCOLOR',(0,0),(-1,0), colors.black),
+        ('FONTNAME',(0,0),(-1,0), header_font),
+        ('FONTSIZE',(0,0),(-1,0),10),
+        ('ALIGN',(0,0),(-1,0),'LEFT'),
+        ('FONTNAME',(0,1),(-1,-1), body_font),
+        ('FONTSIZE',(0,1),(-1,-1),9),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#fafafa')]),
+        ('INNERGRID',(0,0),(-1,-1),0.25,colors.grey),
+        ('BOX',(0,0),(-1,-1),0.25,colors.grey),
+        ('VALIGN',(0,0),(-1,-1),'TOP'),
+    ]))
+    story.append(tbl)
+
+    doc.build(story)
+    pdf_bytes = buf.getvalue()
+    buf.close()
+    return pdf_bytes
+
+
+def render_pdf(data, days, base_url=None):
+    """Render analytics as PDF bytes.
+    Prefers WeasyPrint; falls back to ReportLab if system libs are missing.
+    """
+    try:
+        return _render_weasyprint(data, base_url)
+    except Exception:
+        pass
+    try:
+        return _render_reportlab(data, days)
+    except Exception as ex:
+        raise ReportUnavailable(str(ex)) from ex
+
+
+# -------- Jobs ---------
+def generate(report):
+    """Render `report` synchronously and store the PDF on it."""
+    report.status = 'running'
+    report.save(update_fields=['status'])
+    try:
+        data = analytics.get_stats(report.granularity, report.days)
+        # Key the file by the data it actually shows: stats may have moved on since the request was keyed
+        report.cache_key = report_key(report.granularity, report.days, data_version(data))
+        pdf = render_pdf(data, report.days)
+        report.file.save(f"analytics-{report.kind}-{report.pk}.pdf", ContentFile(pdf), save=False)
+        report.status = 'done'
+        report.error = ''
+    except Exception as ex:
+        logger.exception("Analytics report %s failed", report.pk)
+        report.status = 'failed'
+        report.error = str(ex)[:1000]
+    report.finished_at = timezone.now()
+    report.save(update_fields=['status', 'cache_key', 'file', 'error', 'finished_at'])
+    return report
+
+
+def _run_in_background(report_id):
+    close_old_connections()
+    try:
+        report = AnalyticsReport.objects.filter(pk=report_id, status='pending').first()
+        if report:
+            generate(report)
+    finally:
+        close_old_connections()
+
+
+def request_report(granularity, days, user=None, kind='adhoc', background=True):
+    """Return a report for these parameters, reusing one built from the same data if present."""
+    data = analytics.get_stats(granularity, days)
+    key = report_key(granularity, days, data_version(data))
+    # Jobs stuck in pending/running (e.g. the worker was recycled) stop blocking new requests
+    cutoff = timezone.now() - timezone.timedelta(seconds=JOB_TIMEOUT)
+    existing = (
+        AnalyticsReport.objects.filter(cache_key=key)
+        .filter(Q(status='done') | Q(status__in=['pending', 'running'], created_at__gte=cutoff))
+        .order_by('-created_at')
+        .first()
+    )
+    if existing:
+        return existing
+    report = AnalyticsReport.objects.create(
+        kind=kind,
+        granularity=granularity,
+        days=days,
+        cache_key=key,
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+    if background:
+        _executor.submit(_run_in_background, report.pk)
+    else:
+        generate(report)
+    return report
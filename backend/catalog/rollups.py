@@ -0,0 +1,205 @@
+"""Daily analytics rollups.
+
+The dashboard reads pre-aggregated per-day rows instead of scanning raw
+offers/messages/visits. A day is always rebuilt from its raw rows, so the same
+helpers serve the incremental path (signals, one day at a time) and the
+backfill command (whole history in one grouped query per source).
+"""
+import datetime
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .hll import HyperLogLog, union_count
+from .models import (
+    ProductOffer, ContactMessage, SiteVisit,
+    OfferDailyStat, ContactDailyStat, VisitDailyStat,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _day_bounds(start, end):
+    """Aware datetimes covering local days start..end (end inclusive)."""
+    tz = timezone.get_current_timezone()
+    lo = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min), tz)
+    hi = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min), tz)
+    return lo, hi
+
+
+def _replace_rows(model, start, end, rows, key_fields, value_fields):
+    """Upsert `rows` and delete rollup rows in [start, end] that no longer exist in the source."""
+    with transaction.atomic():
+        if rows:
+            model.objects.bulk_create(
+                [model(**r) for r in rows],
+                update_conflicts=True,
+                unique_fields=key_fields,
+                update_fields=value_fields,
+                batch_size=1000,
+            )
+        keep = {tuple(r[f] for f in key_fields) for r in rows}
+        stale = [
+            pk for pk, *key in model.objects.filter(date__range=(start, end)).values_list('pk', *key_fields)
+            if tuple(key) not in keep
+        ]
+        if stale:
+            model.objects.filter(pk__in=stale).delete()
+    return len(rows)
+
+
+def rebuild_offer_stats(start, end):
+    lo, hi = _day_bounds(start, end)
+    qs = (
+        ProductOffer.objects.filter(created_at__gte=lo, created_at__lt=hi)
+        .annotate(date=TruncDate('created_at'))
+        .values('date', 'product_id', 'product__category_id', 'city', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    rows = [
+        {
+            'date': r['date'],
+            'product_id': r['product_id'],
+            'category_id': r['product__category_id'],
+            'city': r['city'],
+            'status': r['status'],
+            'count': r['count'],
+        }
+        for r in qs
+    ]
+    return _replace_rows(
+        OfferDailyStat, start, end, rows,
+        key_fields=['date', 'product_id', 'city', 'status'],
+        value_fields=['category_id', 'count'],
+    )
+
+
+def rebuild_contact_stats(start, end):
+    lo, hi = _day_bounds(start, end)
+    qs = (
+        ContactMessage.objects.filter(created_at__gte=lo, created_at__lt=hi)
+        .annotate(date=TruncDate('created_at'))
+        .values('date', 'subject')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    rows = [{'date': r['date'], 'subject': r['subject'], 'count': r['count']} for r in qs]
+    return _replace_rows(
+        ContactDailyStat, start, end, rows,
+        key_fields=['date', 'subject'],
+        value_fields=['count'],
+    )
+
+
+def _visit_rows(start, end):
+    qs = (
+        SiteVisit.objects.filter(date__range=(start, end))
+        .values('date')
+        .annotate(visits=Count('id'))
+        .order_by()
+    )
+    return {r['date']: r['visits'] for r in qs}
+
+
+def rebuild_visit_stats(start, end):
+    # Raw visits older than the retention window are pruned, so days before the
+    # first remaining raw row only live in the rollup and must not be rebuilt.
+    first_raw = SiteVisit.objects.aggregate(v=Min('date'))['v']
+    if first_raw is None or first_raw > end:
+        return 0
+    start = max(start, first_raw)
+    counts = _visit_rows(start, end)
+    sketches = {}
+    visitors = SiteVisit.objects.filter(date__range=(start, end)).values_list('date', 'session_key')
+    for day, key in visitors.iterator(chunk_size=5000):
+        sketches.setdefault(day, HyperLogLog()).add(key)
+    rows = [
+        {'date': day, 'visits': n, 'sketch': sketches[day].to_bytes() if day in sketches else b''}
+        for day, n in counts.items()
+    ]
+    return _replace_rows(
+        VisitDailyStat, start, end, rows,
+        key_fields=['date'],
+        value_fields=['visits', 'sketch'],
+    )
+
+
+def apply_visit_batch(pairs):
+    """Fold freshly inserted (day, visitor) pairs into the visit rollup.
+
+    Counts are re-read from SiteVisit (an index-only count per day) while the
+    sketches are merged incrementally, so a flush never rescans a day's ids.
+    Missing day rows are inserted first (ON CONFLICT DO NOTHING) so that
+    concurrent flushes of a new day serialize on the row lock instead of both
+    creating it and one losing its sketch update.
+    """
+    by_day = {}
+    for day, visitor in pairs:
+        by_day.setdefault(day, []).append(visitor)
+    if not by_day:
+        return
+    with transaction.atomic():
+        VisitDailyStat.objects.bulk_create([VisitDailyStat(date=day) for day in by_day], ignore_conflicts=True)
+        rows = list(VisitDailyStat.objects.select_for_update().filter(date__in=list(by_day)))
+        # Read under the lock: includes the visits of any flush that committed before us
+        counts = _visit_rows(min(by_day), max(by_day))
+        for row in rows:
+            sketch = HyperLogLog.from_bytes(bytes(row.sketch))
+            sketch.update(by_day[row.date])
+            row.visits = counts.get(row.date, 0)
+            row.sketch = sketch.to_bytes()
+        VisitDailyStat.objects.bulk_update(rows, ['visits', 'sketch'])
+
+
+def visit_sketches(start, end):
+    """(date, sketch bytes) for local days [start, end]."""
+    rows = VisitDailyStat.objects.filter(date__range=(start, end)).values_list('date', 'sketch')
+    return [(day, bytes(sketch)) for day, sketch in rows]
+
+
+def unique_visitors(start, end):
+    """Estimated distinct visitors over local days [start, end] from the daily sketches."""
+    return union_count(sketch for _, sketch in visit_sketches(start, end))
+
+
+def earliest_source_date():
+    """First local day that has any raw analytics data, or None."""
+    candidates = []
+    for model in (ProductOffer, ContactMessage):
+        first = model.objects.aggregate(v=Min('created_at'))['v']
+        if first:
+            candidates.append(timezone.localdate(first))
+    first_visit = SiteVisit.objects.aggregate(v=Min('date'))['v']
+    if first_visit:
+        candidates.append(first_visit)
+    return min(candidates) if candidates else None
+
+
+def rebuild_all(start=None, end=None):
+    """Rebuild every rollup for [start, end]; defaults to the full history up to today."""
+    end = end or timezone.localdate()
+    start = start or earliest_source_date() or end
+    return {
+        'offers': rebuild_offer_stats(start, end),
+        'contacts': rebuild_contact_stats(start, end),
+        'visits': rebuild_visit_stats(start, end),
+    }
+
+
+def refresh_offer_days(queryset):
+    """Re-roll the days touched by a queryset (used after bulk `update()` calls that skip signals)."""
+    days = list(queryset.dates('created_at', 'day'))
+    if days:
+        rebuild_offer_stats(min(days), max(days))
+
+
+def safe_refresh(rebuild, day):
+    """Rebuild a single day, never letting rollup errors break the write path."""
+    try:
+        rebuild(day, day)
+    except Exception:
+        logger.exception("Analytics rollup refresh failed for %s (%s)", day, rebuild.__name__)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Category, Product, ProductImage, ProductFeature, ProductSpec, ProductHighlight, ProductOffer, ContactMessage
+from .phones import normalize_phone
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -62,7 +63,9 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     def get_main_image(self, obj):
         request = self.context.get('request')
-        img = obj.images.filter(is_main=True).first() or obj.images.first()
+        # Pick from the prefetched images; .filter() would issue a query per product
+        images = list(obj.images.all())
+        img = next((i for i in images if i.is_main), None) or (images[0] if images else None)
         if not img:
             return None
         url = img.image.url
@@ -192,14 +195,12 @@ class ProductOfferSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("Telefon nömrəsi tələb olunur.")
         
-        # Daha elastik telefon nömrəsi validasiyası
-        import re
         # Allow various formats: +994501234567, +994 50 123 45 67, 0501234567, etc.
-        phone_pattern = r'^[\+]?[0-9\s\-\(\)]{10,20}$'
-        if not re.match(phone_pattern, value.strip()):
+        # Stored as E.164 so repeat customers match exactly (phone_normalized keeps the index)
+        normalized = normalize_phone(value)
+        if not normalized:
             raise serializers.ValidationError("Düzgün telefon nömrəsi formatında daxil edin.")
-        
-        return value.strip()
+        return normalized
     
     def validate_first_name(self, value):
         """Müştəri adının uzunluğunu yoxlayır"""
@@ -250,10 +251,10 @@ class ContactMessageSerializer(serializers.ModelSerializer):
     def validate_phone(self, value):
         if not value:
             return ""
-        import re
-        if not re.match(r"^[\+\d\s\-\(\)]{7,20}$", value.strip()):
+        normalized = normalize_phone(value)
+        if not normalized:
             raise serializers.ValidationError("Düzgün telefon nömrəsi daxil edin.")
-        return value.strip()
+        return normalized
 
     def validate_privacy_accepted(self, value):
         if value is not True:
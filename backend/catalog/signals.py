@@ -1,11 +1,20 @@
+import time
+
+from django.apps import apps
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import ProductOffer, ContactMessage
-from .notifiers import send_telegram_message
+from .models import (
+    ProductOffer, ContactMessage, SiteVisit, Category, Product, ProductImage, ProductFeature, ProductSpec,
+    ProductHighlight, AboutPage, AboutValue, AboutTeamMember, AboutTechFeature, AboutTechStat, FooterSettings,
+    ContactPage, ContactWorkingHour, ContactFAQ,
+)
+from .notifiers import send_telegram_message, telegram_configured
+from . import caching, metrics, rollups
 
 
 def _admin_emails():
@@ -20,10 +29,27 @@ def _admin_emails():
     return []
 
 
+def _deliver(channel, send):
+    """Run one notification send, recording its latency and failure in catalog.metrics."""
+    start = time.perf_counter()
+    try:
+        ok = send()
+    except Exception:
+        ok = False
+    metrics.NOTIFY_LATENCY.observe(time.perf_counter() - start, channel=channel)
+    if not ok:
+        metrics.NOTIFY_FAILURES.inc(channel=channel)
+
+
 @receiver(post_save, sender=ProductOffer)
 def notify_new_product_offer(sender, instance: ProductOffer, created, **kwargs):
-    if not created:
+    if not created or getattr(instance, '_defer_notifications', False):
         return
+    send_product_offer_notifications(instance)
+
+
+def send_product_offer_notifications(instance: ProductOffer):
+    """Email + Telegram for a new offer. Blocking network I/O; async views run it off the request."""
     recipients = _admin_emails()
     if not recipients:
         return
@@ -56,15 +82,12 @@ def notify_new_product_offer(sender, instance: ProductOffer, created, **kwargs):
         f"Tarix: {instance.created_at:%Y-%m-%d %H:%M}\n"
     )
     html_body = render_to_string("email/product_offer.html", context)
-    try:
-        msg = EmailMultiAlternatives(subject, text_body, settings.SERVER_EMAIL, recipients)
-        msg.attach_alternative(html_body, "text/html")
-        msg.send(fail_silently=True)
-    except Exception:
-        pass
+    msg = EmailMultiAlternatives(subject, text_body, settings.SERVER_EMAIL, recipients)
+    msg.attach_alternative(html_body, "text/html")
+    _deliver('email', lambda: msg.send(fail_silently=True))
     # Telegram notification
-    try:
-        send_telegram_message(
+    if telegram_configured():
+        _deliver('telegram', lambda: send_telegram_message(
             (
                 f"<b>Yeni Məhsul Təklifi</b>\n"
                 f"Müştəri: {instance.first_name} {instance.last_name}\n"
@@ -73,15 +96,17 @@ def notify_new_product_offer(sender, instance: ProductOffer, created, **kwargs):
                 f"Məhsul: {instance.product.name or '-'} — Miqdar: {instance.quantity or '-'}"
                 f"\nMətn: {instance.offer_text or '-'}\n"
             )
-        )
-    except Exception:
-        pass
+        ))
 
 
 @receiver(post_save, sender=ContactMessage)
 def notify_new_contact_message(sender, instance: ContactMessage, created, **kwargs):
-    if not created:
+    if not created or getattr(instance, '_defer_notifications', False):
         return
+    send_contact_message_notifications(instance)
+
+
+def send_contact_message_notifications(instance: ContactMessage):
     recipients = _admin_emails()
     if not recipients:
         return
@@ -110,15 +135,12 @@ def notify_new_contact_message(sender, instance: ContactMessage, created, **kwar
         f"Tarix: {instance.created_at:%Y-%m-%d %H:%M}\n"
     )
     html_body = render_to_string("email/contact_message.html", context)
-    try:
-        msg = EmailMultiAlternatives(subject, text_body, settings.SERVER_EMAIL, recipients)
-        msg.attach_alternative(html_body, "text/html")
-        msg.send(fail_silently=True)
-    except Exception:
-        pass
+    msg = EmailMultiAlternatives(subject, text_body, settings.SERVER_EMAIL, recipients)
+    msg.attach_alternative(html_body, "text/html")
+    _deliver('email', lambda: msg.send(fail_silently=True))
     # Telegram notification
-    try:
-        send_telegram_message(
+    if telegram_configured():
+        _deliver('telegram', lambda: send_telegram_message(
             (
                 f"<b>Yeni Əlaqə Mesajı</b>\n"
                 f"Müştəri: {instance.first_name or '-'} {instance.last_name or '-'}\n"
@@ -127,6 +149,49 @@ def notify_new_contact_message(sender, instance: ContactMessage, created, **kwar
                 f"Mövzu: {instance.get_subject_display() or '-'}\n"
                 f"Mesaj: {instance.message or '-'}\n"
             )
-        )
-    except Exception:
-        pass
+        ))
+
+
+# -------- Analytics rollups ---------
+@receiver(post_save, sender=ProductOffer)
+@receiver(post_delete, sender=ProductOffer)
+def refresh_offer_rollup(sender, instance: ProductOffer, **kwargs):
+    # Status edits change the (day, product, city, status) buckets too, so re-roll on every save
+    if instance.created_at:
+        rollups.safe_refresh(rollups.rebuild_offer_stats, timezone.localdate(instance.created_at))
+
+
+@receiver(post_save, sender=ContactMessage)
+@receiver(post_delete, sender=ContactMessage)
+def refresh_contact_rollup(sender, instance: ContactMessage, created=True, **kwargs):
+    if created and instance.created_at:
+        rollups.safe_refresh(rollups.rebuild_contact_stats, timezone.localdate(instance.created_at))
+
+
+# No post_delete hook: pruning old raw visits must keep their rollups (and lets deletes stay fast)
+@receiver(post_save, sender=SiteVisit)
+def refresh_visit_rollup(sender, instance: SiteVisit, created, **kwargs):
+    if created:
+        rollups.safe_refresh(rollups.rebuild_visit_stats, instance.date)
+
+
+# -------- Response cache invalidation ---------
+# Cached API responses (catalog.views.CachedReadMixin) per namespace. Receivers are connected per
+# model (sitecontent proxies included) rather than globally, so every other model keeps fast deletes
+CACHE_NAMESPACES = {
+    Category: 'catalog', Product: 'catalog', ProductImage: 'catalog', ProductFeature: 'catalog',
+    ProductSpec: 'catalog', ProductHighlight: 'catalog',
+    AboutPage: 'pages', AboutValue: 'pages', AboutTeamMember: 'pages', AboutTechFeature: 'pages',
+    AboutTechStat: 'pages', FooterSettings: 'pages', ContactPage: 'pages', ContactWorkingHour: 'pages',
+    ContactFAQ: 'pages',
+}
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    caching.invalidate_on_commit(CACHE_NAMESPACES[sender._meta.concrete_model])
+
+
+for _model in apps.get_models():
+    if _model._meta.concrete_model in CACHE_NAMESPACES:
+        post_save.connect(invalidate_cached_responses, sender=_model, dispatch_uid=f'cache-{_model._meta.label}')
+        post_delete.connect(invalidate_cached_responses, sender=_model, dispatch_uid=f'cache-{_model._meta.label}')
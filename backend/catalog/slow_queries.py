@@ -0,0 +1,165 @@
+"""Sampled slow-query capture.
+
+With SLOW_QUERY_CAPTURE on, the request instrumentation hands every query
+slower than SLOW_QUERY_MS to `maybe_capture`. A capture is kept only if it
+passes a random SLOW_QUERY_SAMPLE_RATE draw and the per-process budget of
+SLOW_QUERY_MAX_PER_MINUTE, so a slow endpoint under load cannot turn into a
+flood of EXPLAINs and inserts. Captured queries get an EXPLAIN (plan only,
+never ANALYZE) on the same connection, run inside a savepoint so a failing
+EXPLAIN cannot poison the request's transaction, and are written after the
+response in one bulk insert. The table is a ring buffer: after each write
+rows beyond SLOW_QUERY_CAPACITY are deleted, oldest first.
+"""
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_EXPLAINABLE = ('SELECT', 'WITH')
+# Capture machinery and middleware wrap every query; they are never its origin
+_SKIP = (
+    'catalog/instrumentation.py', 'catalog/slow_queries.py', 'catalog/profiling.py', 'catalog/middleware.py',
+)
+
+_lock = threading.Lock()
+_window_start = 0.0
+_window_count = 0
+
+
+def normalize(sql):
+    """SQL with literals and placeholders replaced by `?` and IN lists collapsed."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _SPACE.sub(' ', sql.replace('%s', '?')).strip()
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _take_slot():
+    """Per-process rate limit: at most SLOW_QUERY_MAX_PER_MINUTE captures per minute."""
+    global _window_start, _window_count
+    now = time.monotonic()
+    with _lock:
+        if now - _window_start >= 60:
+            _window_start, _window_count = now, 0
+        if _window_count >= getattr(settings, 'SLOW_QUERY_MAX_PER_MINUTE', 6):
+            return False
+        _window_count += 1
+        return True
+
+
+def origin():
+    """'catalog/views.py:123 in analytics_stats': the innermost project frame that issued the query.
+
+    Generic DRF/admin views have no project frame on the stack; for those the
+    innermost library frame outside Django's ORM is reported instead.
+    """
+    base = str(settings.BASE_DIR).rstrip('/') + '/'
+    stack = traceback.extract_stack()
+    for frame in reversed(stack):
+        if not frame.filename.startswith(base) or 'site-packages' in frame.filename:
+            continue
+        relative = frame.filename[len(base):]
+        if relative.endswith(_SKIP):
+            continue
+        return f'{relative}:{frame.lineno} in {frame.name}'[:300]
+    for frame in reversed(stack):
+        _, marker, relative = frame.filename.rpartition('site-packages/')
+        if marker and not relative.startswith(('django/db/', 'django/utils/')):
+            return f'{relative}:{frame.lineno} in {frame.name}'[:300]
+    return ''
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception as exc:
+        return f'EXPLAIN failed: {exc}'
+    # PostgreSQL returns one text line per row; SQLite (id, parent, notused, detail)
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def maybe_capture(connection, sql, params, duration, view):
+    """A SlowQuery (unsaved) for this query, or None if it was not sampled."""
+    if random.random() >= getattr(settings, 'SLOW_QUERY_SAMPLE_RATE', 0.1) or not _take_slot():
+        return None
+    from .models import SlowQuery
+
+    normalized = normalize(sql)
+    return SlowQuery(
+        fingerprint=fingerprint(normalized),
+        sql=normalized,
+        params=repr(params)[:2000],
+        duration_ms=round(duration * 1000, 2),
+        view=(view or '')[:200],
+        origin=origin(),
+        plan=explain(connection, sql, params),
+        database=connection.alias,
+    )
+
+
+def store(entries):
+    """Write captured queries and trim the table back to SLOW_QUERY_CAPACITY rows."""
+    from .models import SlowQuery
+
+    try:
+        SlowQuery.objects.bulk_create(entries)
+        capacity = getattr(settings, 'SLOW_QUERY_CAPACITY', 2000)
+        boundary = SlowQuery.objects.order_by('-id').values_list('id', flat=True)[capacity:capacity + 1]
+        if boundary:
+            SlowQuery.objects.filter(id__lte=boundary[0]).delete()
+    except Exception:
+        logger.exception("Could not store %s slow queries", len(entries))
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def groups():
+    """Captured queries grouped by fingerprint, slowest p95 first."""
+    from .models import SlowQuery
+
+    grouped = {}
+    for fp, sql, duration, view, created_at in SlowQuery.objects.values_list(
+        'fingerprint', 'sql', 'duration_ms', 'view', 'created_at'
+    ).order_by('id'):
+        group = grouped.setdefault(fp, {'fingerprint': fp, 'sql': sql, 'durations': [], 'views': set()})
+        group['durations'].append(duration)
+        group['last_seen'] = created_at
+        if view:
+            group['views'].add(view)
+    result = []
+    for group in grouped.values():
+        durations = group.pop('durations')
+        group.update({
+            'count': len(durations),
+            'p95_ms': round(percentile(durations, 0.95), 1),
+            'max_ms': round(max(durations), 1),
+            'views': ', '.join(sorted(group['views'])),
+        })
+        result.append(group)
+    return sorted(result, key=lambda g: g['p95_ms'], reverse=True)
@@ -0,0 +1,226 @@
+import datetime
+import multiprocessing
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import analytics, benchdata, exports, query_plans, rollups, throttling
+from .hll import STANDARD_ERROR, HyperLogLog, union_count
+from .models import SiteVisit, VisitDailyStat
+
+
+class UniqueVisitorSketchTests(TestCase):
+    """Sketch estimates against exact COUNT(DISTINCT) on a known visitor population."""
+
+    VISITORS = 20000
+    DAYS = 400
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        rows = []
+        # Deterministic population: every visitor comes back on a few days spread over the history,
+        # so the windows overlap heavily and merging (not summing) is what keeps them right
+        for n in range(cls.VISITORS):
+            for step in (0, 1 + n % 5, 7 + n % 23, 31 + n % 97):
+                offset = (n * 7919 + step * 37) % cls.DAYS
+                rows.append(SiteVisit(date=cls.today - datetime.timedelta(days=offset), session_key=f'visitor-{n}'))
+        SiteVisit.objects.bulk_create(rows, ignore_conflicts=True, batch_size=5000)
+        rollups.rebuild_visit_stats(cls.today - datetime.timedelta(days=cls.DAYS), cls.today)
+
+    def exact(self, window):
+        since = self.today - datetime.timedelta(days=window)
+        return SiteVisit.objects.filter(date__gt=since).values('session_key').distinct().count()
+
+    def test_window_estimates_within_standard_error(self):
+        windows = analytics.compute_stats('day', 30)['unique_visitors']['windows']
+        errors = []
+        for window in analytics.UNIQUE_VISITOR_WINDOWS:
+            with self.subTest(window=window):
+                exact = self.exact(window)
+                self.assertGreater(exact, 1000)
+                errors.append(abs(windows[str(window)] - exact) / exact)
+                # STANDARD_ERROR is one sigma: a single window may exceed it, never by this much
+                self.assertLessEqual(errors[-1], 3 * STANDARD_ERROR)
+        self.assertLessEqual(sum(errors) / len(errors), STANDARD_ERROR)
+
+    def test_union_is_not_the_sum_of_days(self):
+        sketches = [sketch for _, sketch in rollups.visit_sketches(self.today - datetime.timedelta(days=89), self.today)]
+        daily_total = sum(HyperLogLog(sketch).count() for sketch in sketches)
+        self.assertLess(union_count(sketches), daily_total)
+
+
+class ApplyVisitBatchTests(TestCase):
+    """The incremental flush path must end up where a full rebuild does."""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - datetime.timedelta(days=1)
+
+    def flush(self, pairs):
+        SiteVisit.objects.bulk_create(
+            [SiteVisit(date=day, session_key=vid) for day, vid in pairs], ignore_conflicts=True,
+        )
+        rollups.apply_visit_batch(pairs)
+
+    def test_creates_missing_days_and_merges_batches(self):
+        first = [(self.today, f'a-{n}') for n in range(300)] + [(self.yesterday, f'b-{n}') for n in range(50)]
+        # Overlaps the first batch: duplicates must not be counted twice
+        second = [(self.today, f'a-{n}') for n in range(200, 600)]
+        self.flush(first)
+        self.flush(second)
+
+        incremental = {row.date: (row.visits, bytes(row.sketch)) for row in VisitDailyStat.objects.all()}
+        self.assertEqual(incremental[self.today][0], 600)
+        self.assertEqual(incremental[self.yesterday][0], 50)
+
+        rollups.rebuild_visit_stats(self.yesterday, self.today)
+        rebuilt = {row.date: (row.visits, bytes(row.sketch)) for row in VisitDailyStat.objects.all()}
+        self.assertEqual(incremental, rebuilt)
+
+    def test_flush_keeps_existing_sketch(self):
+        self.flush([(self.today, f'a-{n}') for n in range(1000)])
+        self.flush([(self.today, 'late')])
+        estimate = HyperLogLog(bytes(VisitDailyStat.objects.get(date=self.today).sketch)).count()
+        self.assertLessEqual(abs(estimate - 1001) / 1001, STANDARD_ERROR)
+
+
+class ExportFormulaTests(SimpleTestCase):
+    def test_formula_like_text_is_quoted_in_csv(self):
+        row = ['=HYPERLINK("http://x")', '+cmd|x', '-2+3', '@SUM(A1)', '\tA', '\rB', 'Salam', -5]
+        csv_line = list(exports._csv_chunks(['h'], [row]))[1]
+        self.assertTrue(csv_line.startswith('"\'=HYPERLINK('))
+        for text in ("'+cmd|x", "'-2+3", "'@SUM(A1)", "'\tA", "'\rB", ',Salam,', ',-5'):
+            self.assertIn(text, csv_line)
+
+    def test_phone_numbers_are_not_quoted(self):
+        row = ['+994501234567', '+994 (50) 123-45-67', '-12.5']
+        self.assertEqual(list(exports._csv_chunks(['h'], [row]))[1], '+994501234567,+994 (50) 123-45-67,-12.5\r\n')
+
+    def test_xlsx_keeps_text_verbatim(self):
+        xml = exports._xlsx_row(['=HYPERLINK("http://x")', '+994501234567', -5])
+        self.assertIn('<c t="inlineStr"><is><t xml:space="preserve">=HYPERLINK("http://x")</t>', xml)
+        self.assertIn('<t xml:space="preserve">+994501234567</t>', xml)
+        self.assertNotIn("'", xml)
+        self.assertIn('<v>-5</v>', xml)
+
+
+class QueryPlanTests(TestCase):
+    """The hot queries must keep an index path (catalog.query_plans)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        benchdata.generate_catalog(300)
+        benchdata.generate_offers(2000, days=120)
+        benchdata.generate_contact_messages(1000, days=120)
+        benchdata.generate_visits(3000, days=120)
+        benchdata.rebuild_rollups(120)
+
+    def test_no_sequential_scans(self):
+        for label, seq_scan, summary in query_plans.check():
+            with self.subTest(label):
+                self.assertFalse(seq_scan, f'{label}: {summary}')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'}},
+    THROTTLE_CACHE='default',
+)
+class SubmissionThrottleTests(SimpleTestCase):
+    def allow(self, ip='203.0.113.7'):
+        throttle = throttling.SubmissionIPThrottle()
+        request = SimpleNamespace(META={'REMOTE_ADDR': ip}, headers={})
+        return throttle, throttle.allow_request(request, SimpleNamespace(throttle_scope='offers'))
+
+    def test_concurrent_flood_stays_within_limit(self):
+        limit = throttling.SubmissionIPThrottle().parse_rate(
+            throttling.SubmissionIPThrottle.THROTTLE_RATES['offers_ip'])[0]
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.allow()[1])) for _ in range(limit * 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), limit)
+
+        throttle, allowed = self.allow()
+        self.assertFalse(allowed)
+        self.assertGreater(throttle.wait(), 0)
+        self.assertTrue(self.allow(ip='203.0.113.8')[1])
+
+    def test_base_class_has_no_idents(self):
+        throttle = throttling._ScopedSubmissionThrottle()
+        self.assertEqual(throttle.get_idents(SimpleNamespace()), [])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-throttle-tests'}},
+    THROTTLE_CACHE='default',
+)
+class AsyncSubmissionThrottleTests(TestCase):
+    """A throttled async submission answers exactly as the sync viewset does."""
+
+    payload = {
+        'first_name': 'Test', 'last_name': 'User', 'email': 'throttle@example.com', 'phone': '+994501234567',
+        'subject': 'other', 'message': 'test', 'privacy_accepted': True,
+    }
+
+    def post_until_throttled(self, client, url):
+        for _ in range(50):
+            response = client.post(url, self.payload, content_type='application/json')
+            if response.status_code == 429:
+                return response
+        self.fail(f'{url} was never throttled')
+
+    @mock.patch.object(throttling._ScopedSubmissionThrottle, 'timer', lambda self: 1_000_000.0)
+    def test_429_matches_sync_viewset(self):
+        sync = self.post_until_throttled(Client(), '/api/contact-messages/')
+        caches['default'].clear()
+        with override_settings(ROOT_URLCONF='catalog.async_urls'):
+            async_ = self.post_until_throttled(Client(), '/contact-messages/')
+        self.assertEqual(async_.json(), sync.json())
+        self.assertEqual(async_['Retry-After'], sync['Retry-After'])
+
+def _flood(ip, attempts, results):
+    throttle_class = throttling.SubmissionIPThrottle
+    request = SimpleNamespace(META={'REMOTE_ADDR': ip}, headers={})
+    view = SimpleNamespace(throttle_scope='offers')
+    results.put(sum(throttle_class().allow_request(request, view) for _ in range(attempts)))
+
+
+@unittest.skipIf(throttling.fcntl is None, 'needs fcntl')
+class FileCacheThrottleTests(SimpleTestCase):
+    """Gunicorn workers share the file cache: the limit must hold across processes, not just threads."""
+
+    PROCESSES = 6
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                'LOCATION': directory.name}},
+            THROTTLE_CACHE='default',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(caches['default'].close)
+
+    def test_concurrent_processes_stay_within_limit(self):
+        limit = throttling.SubmissionIPThrottle().parse_rate(
+            throttling.SubmissionIPThrottle.THROTTLE_RATES['offers_ip'])[0]
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [context.Process(target=_flood, args=('203.0.113.9', limit * 2, results))
+                   for _ in range(self.PROCESSES)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sum(results.get(timeout=5) for _ in workers), limit)
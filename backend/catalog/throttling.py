@@ -0,0 +1,173 @@
+"""Throttles for the public offer/contact submission endpoints.
+
+Both endpoints are AllowAny and every accepted POST fans out into an insert,
+an email and a Telegram call, so they are limited twice: per client IP and
+per sender (normalized phone and/or email from the payload). Limits are DRF
+rates ("5/hour") under REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], keyed by
+the view's `throttle_scope` plus `_ip` / `_sender`, and counted in fixed
+windows of the rate's period. Counters live in the cache named by
+settings.THROTTLE_CACHE, which must be shared by all workers for the limits
+to hold across processes.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from rest_framework.throttling import SimpleRateThrottle
+
+from .phones import normalize_phone
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: increments are serialized within the process only
+    fcntl = None
+
+_increment_lock = threading.Lock()
+INCREMENT_LOCK_FILE = 'throttle.lock'
+
+
+@contextmanager
+def _serialized(cache):
+    """Exclusive section for a get + set increment.
+
+    A file cache is shared by every worker on the host, so it is locked with
+    flock on a file in the cache directory (one open per call, which also
+    excludes other threads); other caches fall back to a process-local lock.
+    """
+    if fcntl is None or not isinstance(cache, FileBasedCache):
+        with _increment_lock:
+            yield
+        return
+    os.makedirs(cache._dir, exist_ok=True)
+    with open(os.path.join(cache._dir, INCREMENT_LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+class _ScopedSubmissionThrottle(SimpleRateThrottle):
+    """Fixed-window counter per ident: one atomic increment per request, no read-modify-write of a history.
+
+    Counters live under `<scope>:<ident>:<window>`; every attempt counts,
+    rejected ones included. Backends with a native incr (redis, memcached,
+    locmem) increment atomically; the file cache is serialized across the
+    host's workers with a lock file (see _serialized).
+    """
+    scope_suffix = None
+
+    def __init__(self):
+        # Rate is resolved per view in allow_request (scope depends on the view)
+        pass
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def get_idents(self, request):
+        return []
+
+    def _increment(self, key):
+        cache = self.cache
+        if type(cache).incr is BaseCache.incr:
+            # Generic incr is get + set with the default timeout; keep the window's instead
+            with _serialized(cache):
+                count = cache.get(key, 0) + 1
+                cache.set(key, count, self.duration)
+            return count
+        cache.add(key, 0, self.duration)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Expired between add and incr
+            cache.add(key, 1, self.duration)
+            return 1
+
+    def allow_request(self, request, view):
+        base = getattr(view, 'throttle_scope', None)
+        if not base:
+            return True
+        self.scope = f"{base}_{self.scope_suffix}"
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        self.exceeded = False
+        for ident in self.get_idents(request):
+            key = f"{self.cache_format % {'scope': self.scope, 'ident': ident}}:{window}"
+            if self._increment(key) > self.num_requests:
+                self.exceeded = True
+                return False
+        return True
+
+    def get_rate(self):
+        return self.THROTTLE_RATES.get(self.scope)
+
+    def wait(self):
+        if not getattr(self, 'exceeded', False):
+            return None
+        return max(self.window_end - self.timer(), 0)
+
+
+class SubmissionIPThrottle(_ScopedSubmissionThrottle):
+    """Per client IP (X-Forwarded-For aware through REST_FRAMEWORK['NUM_PROXIES'])."""
+    scope_suffix = 'ip'
+
+    def get_idents(self, request):
+        return [self.get_ident(request)]
+
+
+class SubmissionSenderThrottle(_ScopedSubmissionThrottle):
+    """Per sender: normalized phone and lower-cased email, each counted separately."""
+    scope_suffix = 'sender'
+    phone_fields = ('phone_number', 'phone')
+
+    def get_idents(self, request):
+        data = request.data
+        if not hasattr(data, 'get'):
+            return []
+        idents = []
+        for field in self.phone_fields:
+            phone = normalize_phone(data.get(field))
+            if phone:
+                idents.append(f"phone:{phone}")
+                break
+        email = str(data.get('email') or '').strip().lower()
+        if email:
+            idents.append(f"email:{email}")
+        return idents
+
+
+class ThrottledSubmissionMixin:
+    """Stop at the first exceeded throttle.
+
+    DRF evaluates every throttle even after one has failed; here the IP check
+    runs first and a flood is rejected before the request body is parsed.
+    """
+    throttle_classes = [SubmissionIPThrottle, SubmissionSenderThrottle]
+
+    def check_throttles(self, request):
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
+
+
+def submission_throttle_wait(request, scope, data):
+    """Run the submission throttles for a plain Django view (e.g. the async ones).
+
+    Returns None when the request is allowed, otherwise the seconds to wait.
+    """
+    view = SimpleNamespace(throttle_scope=scope)
+    shim = SimpleNamespace(META=request.META, headers=request.headers, data=data)
+    for throttle_class in ThrottledSubmissionMixin.throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(shim, view):
+            return throttle.wait() or 0
+    return None
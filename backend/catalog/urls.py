@@ -1,4 +1,5 @@
 from rest_framework.routers import DefaultRouter
+from django.conf import settings
 from django.urls import path, include
 from .views import (
     CategoryViewSet,
@@ -11,6 +12,11 @@ from .views import (
     admin_dashboard_view,
     analytics_stats,
     analytics_export_pdf,
+    analytics_report_status,
+    analytics_report_download,
+    export_offers,
+    export_contact_messages,
+    customer_history,
     track_site_visit,
     visit_debug,
     seed_demo,
@@ -25,7 +31,12 @@ router.register(r'footer', FooterSettingsViewSet, basename='footer')
 router.register(r'offers', ProductOfferViewSet, basename='offer')
 router.register(r'contact-messages', ContactMessageViewSet, basename='contact-message')
 
-urlpatterns = [
+async_submission_urls = []
+if getattr(settings, 'ASYNC_SUBMISSIONS', False):
+    # Async views (catalog.async_urls) take over the public URLs the frontend posts to; must precede the router
+    async_submission_urls.append(path('', include('catalog.async_urls')))
+
+urlpatterns = async_submission_urls + [
     path('', include(router.urls)),
     # Demo seed (DEV only)
     path('seed/demo/', seed_demo, name='seed_demo'),
@@ -34,6 +45,13 @@ urlpatterns = [
     # Analytics endpoints
     path('dashboard/analytics/stats/', analytics_stats, name='admin_analytics_stats'),
     path('dashboard/analytics/export-pdf/', analytics_export_pdf, name='admin_analytics_export_pdf'),
+    path('dashboard/analytics/reports/<int:pk>/', analytics_report_status, name='admin_analytics_report_status'),
+    path('dashboard/analytics/reports/<int:pk>/download/', analytics_report_download, name='admin_analytics_report_download'),
+    # Streaming exports (staff only)
+    path('dashboard/exports/offers/', export_offers, name='admin_export_offers'),
+    path('dashboard/exports/contact-messages/', export_contact_messages, name='admin_export_contact_messages'),
+    # Repeat-customer lookup by normalized phone
+    path('dashboard/customers/', customer_history, name='admin_customer_history'),
     # Site visit tracking (per tab/day)
     path('visit/track/', track_site_visit, name='track_site_visit'),
     path('visit/debug/', visit_debug, name='visit_debug'),
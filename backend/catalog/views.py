@@ -2,18 +2,18 @@ from rest_framework import viewsets, filters, status
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
-from django.db.models import Count
-from django.shortcuts import render
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from django.shortcuts import render, get_object_or_404
+from django.http import HttpResponse, FileResponse, Http404
+from django.http.request import split_domain_port, validate_host
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.core.cache import cache
 from django.http import JsonResponse
 
-from .models import Category, Product, AboutPage, ContactPage, FooterSettings, ProductOffer, ContactMessage, SiteVisit, ProductFeature, ProductSpec, ProductHighlight
+from .models import Category, Product, AboutPage, ContactPage, FooterSettings, ProductOffer, ContactMessage, SiteVisit, ProductFeature, ProductSpec, ProductHighlight, AnalyticsReport
 from .serializers import (
     CategorySerializer,
     ProductListSerializer,
@@ -26,9 +26,68 @@ from .serializers import (
 )
 from django.conf import settings
 from django.db import transaction
+from . import analytics, caching, catalog_store, exports, reports, visits
+from .phones import normalize_phone
+from .throttling import ThrottledSubmissionMixin
+
+
+def _detach(data):
+    """Serializer output as plain containers, without the ReturnDict/ReturnList link to its serializer."""
+    if isinstance(data, list):
+        return list(data)
+    if isinstance(data, dict):
+        return {key: _detach(value) if isinstance(value, (ReturnDict, ReturnList)) else value for key, value in data.items()}
+    return data
+
+
+class CachedReadMixin:
+    """Serve list/retrieve data through catalog.caching, keyed by scheme, host, path and known parameters.
+
+    Serializers build absolute image URLs, so scheme and host are part of the
+    key; hosts outside CATALOG_CACHE_HOSTS and query parameters outside
+    `cache_params` skip the cache, so junk URLs cannot flood it. Saving any
+    model of `cache_namespace` invalidates it (catalog.signals).
+    """
+    cache_namespace = None
+    # Query parameters the view reads
+    cache_params = ('page', 'format')
+
+    def _cache_key(self, request):
+        """Key for this request, or None when it must not be cached."""
+        if not set(request.query_params) <= set(self.cache_params):
+            return None
+        domain, port = split_domain_port(request.get_host())
+        if not validate_host(domain, getattr(settings, 'CATALOG_CACHE_HOSTS', [])):
+            return None
+        # An explicit port must be the one we listen on (proxies send none)
+        if port not in ('', request.META.get('SERVER_PORT')):
+            return None
+        params = sorted((name, value) for name in request.query_params for value in request.query_params.getlist(name))
+        return caching.versioned(self.cache_namespace, request.scheme, domain.lower(), port, request.path, params)
+
+    def _cached_response(self, request, respond):
+        key = self._cache_key(request)
+        if key is None:
+            return respond()
+
+        def compute():
+            response = respond()
+            return response.status_code, _detach(response.data)
+
+        status_code, data = caching.cached(key, compute, ttl=getattr(settings, 'CATALOG_CACHE_TTL', 300))
+        return Response(data, status=status_code)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
+
+
 # AboutPage API viewset
 from rest_framework import viewsets
-class AboutPageViewSet(viewsets.ReadOnlyModelViewSet):
+class AboutPageViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'pages'
     serializer_class = AboutPageSerializer
 
     def get_queryset(self):
@@ -41,7 +100,8 @@ class AboutPageViewSet(viewsets.ReadOnlyModelViewSet):
         return qs[:1]
 
 
-class ContactPageViewSet(viewsets.ReadOnlyModelViewSet):
+class ContactPageViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'pages'
     serializer_class = ContactPageSerializer
 
     def get_queryset(self):
@@ -52,7 +112,8 @@ class ContactPageViewSet(viewsets.ReadOnlyModelViewSet):
         return qs[:1]
 
 
-class FooterSettingsViewSet(viewsets.ReadOnlyModelViewSet):
+class FooterSettingsViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'pages'
     serializer_class = FooterSettingsSerializer
 
     def get_queryset(self):
@@ -62,13 +123,22 @@ class FooterSettingsViewSet(viewsets.ReadOnlyModelViewSet):
             return active
         return qs[:1]
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'catalog'
     queryset = Category.objects.all().order_by('name')
     serializer_class = CategorySerializer
     lookup_field = 'key'
 
+    def list(self, request, *args, **kwargs):
+        return catalog_store.category_list(request) or super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return catalog_store.category_detail(request, kwargs['key']) or super().retrieve(request, *args, **kwargs)
+
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'catalog'
+    cache_params = ('page', 'format', 'category', 'search')
     queryset = Product.objects.select_related('category').prefetch_related(
         'images', 'features', 'specs', 'highlights'
     )
@@ -88,22 +158,37 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(category__key=category)
         return qs
 
+    # The shared catalog snapshot (catalog.catalog_store) answers first when enabled and current
+    def list(self, request, *args, **kwargs):
+        return catalog_store.product_list(request) or super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return catalog_store.product_detail(request, kwargs['id']) or super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'], url_path='by-category/(?P<category>[^/.]+)')
     def by_category(self, request, category=None):
-        qs = self.get_queryset().filter(category__key=category)
-        page = self.paginate_queryset(qs)
-        serializer = ProductListSerializer(page or qs, many=True, context={'request': request})
-        if page is not None:
-            return self.get_paginated_response(serializer.data)
-        return Response(serializer.data)
+        stored = catalog_store.products_by_category(request, category)
+        if stored is not None:
+            return stored
+
+        def respond():
+            qs = self.get_queryset().filter(category__key=category)
+            page = self.paginate_queryset(qs)
+            serializer = ProductListSerializer(page or qs, many=True, context={'request': request})
+            if page is not None:
+                return self.get_paginated_response(serializer.data)
+            return Response(serializer.data)
 
+        return self._cached_response(request, respond)
 
-class ProductOfferViewSet(viewsets.ModelViewSet):
+
+class ProductOfferViewSet(ThrottledSubmissionMixin, viewsets.ModelViewSet):
     queryset = ProductOffer.objects.all()
     serializer_class = ProductOfferSerializer
     http_method_names = ['post']  # Yalnız POST metoduna icazə verir
     authentication_classes = []  # No Session auth -> no CSRF required
     permission_classes = [AllowAny]
+    throttle_scope = 'offers'
     
     def create(self, request, *args, **kwargs):
         """Yeni məhsul təklifi yaradır"""
@@ -122,12 +207,13 @@ class ProductOfferViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ContactMessageViewSet(ThrottledSubmissionMixin, viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     http_method_names = ["post"]
     authentication_classes = []  # No Session auth -> no CSRF required
     permission_classes = [AllowAny]
+    throttle_scope = "contact_messages"
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -159,325 +245,139 @@ def analytics_stats(request):
     Returns JSON for charts and widgets.
     Query params:
     - range: day|week|month (granularity for the line chart)
-    - days: integer window size (default 30)
+    - days: integer window size (default 30, clamped to 1..365)
+    Results are cached briefly per (range, days); see catalog.analytics.get_stats.
     """
-    granularity = request.GET.get('range', 'day')
-    days = int(request.GET.get('days', '30'))
-    now = timezone.now()
-    since = now - timezone.timedelta(days=days)
-
-    # Line chart: ProductOffer count grouped by day/week/month
-    if granularity == 'month':
-        trunc = TruncMonth('created_at')
-    elif granularity == 'week':
-        trunc = TruncWeek('created_at')
-    else:
-        trunc = TruncDay('created_at')
-
-    offers_qs = (
-        ProductOffer.objects.filter(created_at__gte=since)
-        .annotate(period=trunc)
-        .values('period')
-        .order_by('period')
-        .annotate(count=Count('id'))
-    )
-    # Build continuous series with zeros
-    from datetime import date
-    def daterange(start, end, step='day'):
-        cur = start
-        while cur <= end:
-            yield cur
-            if step == 'month':
-                # increment month
-                y = cur.year + (cur.month // 12)
-                m = 1 if cur.month == 12 else cur.month + 1
-                cur = cur.replace(year=y, month=m, day=1)
-            elif step == 'week':
-                cur = cur + timezone.timedelta(weeks=1)
-            else:
-                cur = cur + timezone.timedelta(days=1)
-
-    counts_map = { (o['period'].date() if hasattr(o['period'], 'date') else o['period']): o['count'] for o in offers_qs }
-    step = 'day' if granularity == 'day' else ('week' if granularity == 'week' else 'month')
-    start_boundary = since.date().replace(day=1) if step == 'month' else since.date()
-    end_boundary = now.date()
-    line_labels = []
-    line_values = []
-    for d in daterange(start_boundary, end_boundary, step):
-        key = d
-        line_labels.append(d.isoformat())
-        line_values.append(int(counts_map.get(key, 0)))
-
-    # Pie chart: by category
-    by_category = (
-        ProductOffer.objects.filter(created_at__gte=since)
-        .values('product__category__name')
-        .annotate(count=Count('id'))
-        .order_by('-count')
-    )
-    pie_labels = [r['product__category__name'] or 'Digər' for r in by_category]
-    pie_values = [r['count'] for r in by_category]
-
-    # Widgets last 90 days
-    last90 = now - timezone.timedelta(days=90)
-    total_offers_90 = ProductOffer.objects.filter(created_at__gte=last90).count()
-    total_contacts_90 = ContactMessage.objects.filter(created_at__gte=last90).count()
-    total_visits_90 = SiteVisit.objects.filter(date__gte=last90.date()).count()
-
-    # Recent offers (last 7 days)
-    last7 = now - timezone.timedelta(days=7)
-    recent_offers = list(
-        ProductOffer.objects.filter(created_at__gte=last7)
-        .select_related('product__category')
-        .values('id', 'first_name', 'last_name', 'product__name', 'quantity', 'status', 'created_at')
-        .order_by('-created_at')[:100]
-    )
-
-    # Status counts for tabs (based on last 7 days)
-    status_counts_qs = (
-        ProductOffer.objects.filter(created_at__gte=last7)
-        .values('status')
-        .annotate(count=Count('id'))
-    )
-    status_counts = {r['status']: r['count'] for r in status_counts_qs}
-    status_counts['all'] = sum(status_counts.values())
-
-    return Response({
-        'line': {'labels': line_labels, 'values': line_values},
-        'pie': {'labels': pie_labels, 'values': pie_values},
-        'widgets': {
-            'offers_90': total_offers_90,
-            'contacts_90': total_contacts_90,
-            'visits_90': total_visits_90,
-        },
-    'recent_offers': recent_offers,
-    'status_counts': status_counts,
-    })
+    granularity, days = analytics.normalize_params(request.GET.get('range'), request.GET.get('days'))
+    return Response(analytics.get_stats(granularity, days))
 
 
 @csrf_exempt
 def track_site_visit(request):
-    """Record one visit per session per day, once per tab.
-    Client should call this once per tab using sessionStorage flag; we also guard with cache.
+    """Record one visit per visitor per day.
+    Visitors are identified by a signed cookie (no DB session); visits are deduplicated
+    through the cache and written in batches by catalog.visits.
     """
     if request.method != 'POST':
         return HttpResponse(status=405)
+    response = HttpResponse(status=204)
     try:
-        if not request.session.session_key:
-            request.session.save()
-        session_key = request.session.session_key
-        tab_id = request.POST.get('tab_id') or request.headers.get('X-Tab-Id') or 'default'
-        today = timezone.localdate()
-        # Cache key to prevent duplicates per tab per day
-        cache_key = f"visit:{today}:{session_key}:{tab_id}"
-        if not cache.get(cache_key):
-            SiteVisit.objects.get_or_create(date=today, session_key=session_key)
-            # Mark as seen for 1 day
-            cache.set(cache_key, True, 60 * 60 * 24)
-        return HttpResponse(status=204)
+        visitor_id, is_new = visits.get_visitor_id(request)
+        visits.record(timezone.localdate(), visitor_id)
+        if is_new:
+            visits.set_visitor_cookie(response, visitor_id)
     except Exception:
         # Never block; still 204
-        return HttpResponse(status=204)
+        pass
+    return response
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def visit_debug(request):
-    """Return today's visit counts for current session and overall (for quick testing)."""
-    if not request.session.session_key:
-        request.session.save()
-    session_key = request.session.session_key
+    """Return today's visit counts for the current visitor and overall (for quick testing).
+    Counts only include flushed visits; `pending` is this worker's unflushed buffer.
+    """
+    visitor_id, _ = visits.get_visitor_id(request)
     today = timezone.localdate()
-    per_session = SiteVisit.objects.filter(date=today, session_key=session_key).count()
+    per_visitor = SiteVisit.objects.filter(date=today, session_key=visitor_id).count()
     total_today = SiteVisit.objects.filter(date=today).count()
     return Response({
         'today': str(today),
-        'session_key': session_key,
-        'per_session_today': per_session,
+        'visitor_id': visitor_id,
+        'per_session_today': per_visitor,
         'total_today': total_today,
+        'pending': visits.pending(),
     })
 
 
+def _report_payload(report):
+    return {
+        'id': report.pk,
+        'status': report.status,
+        'kind': report.kind,
+        'range': report.granularity,
+        'days': report.days,
+        'error': report.error,
+        'created_at': report.created_at,
+        'finished_at': report.finished_at,
+        'status_url': reverse('api:admin_analytics_report_status', args=[report.pk]),
+        'download_url': reverse('api:admin_analytics_report_download', args=[report.pk]) if report.status == 'done' else None,
+    }
+
+
 @staff_member_required
+@require_POST
 def analytics_export_pdf(request):
-    """Render analytics as PDF.
-    Prefers WeasyPrint; falls back to ReportLab if system libs are missing.
+    """Queue an analytics PDF and return its job status (202) or a ready artifact (200).
+    Identical parameters on unchanged data reuse the existing PDF.
     """
-    import base64, io, os
+    granularity, days = analytics.normalize_params(request.POST.get('range'), request.POST.get('days'))
+    report = reports.request_report(granularity, days, user=request.user)
+    return JsonResponse(
+        _report_payload(report),
+        status=200 if report.status == 'done' else 202,
+    )
 
-    # Gather data (reuse analytics endpoint logic)
-    data = analytics_stats(request).data
 
-    line_img = request.POST.get('line_image', '')
-    pie_img = request.POST.get('pie_image', '')
+@staff_member_required
+def analytics_report_status(request, pk):
+    report = get_object_or_404(AnalyticsReport, pk=pk)
+    return JsonResponse(_report_payload(report))
 
-    # Preferred: WeasyPrint (HTML/CSS fidelity)
-    try:
-        from weasyprint import HTML  # type: ignore
-        context = {
-            'generated_at': timezone.now(),
-            'line': data['line'],
-            'pie': data['pie'],
-            'widgets': data['widgets'],
-            'recent_offers': data['recent_offers'],
-            'line_image': line_img,
-            'pie_image': pie_img,
-        }
-        html = render_to_string('admin/analytics_pdf.html', context)
-        pdf = HTML(string=html, base_url=request.build_absolute_uri('/')).write_pdf()
-        resp = HttpResponse(pdf, content_type='application/pdf')
-        resp['Content-Disposition'] = 'attachment; filename="analytics.pdf"'
-        return resp
-    except Exception:
-        # Fallback: ReportLab (pure Python)
-        try:
-            from django.conf import settings
-            from reportlab.lib.pagesizes import A4
-            from reportlab.lib import colors
-            from reportlab.lib.units import cm
-            from reportlab.platypus import (
-                SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-            )
-            from reportlab.lib.styles import getSampleStyleSheet
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-
-            buf = io.BytesIO()
-            doc = SimpleDocTemplate(
-                buf,
-                pagesize=A4,
-                title="Analytics",
-                leftMargin=1.5*cm,
-                rightMargin=1.5*cm,
-                topMargin=1.2*cm,
-                bottomMargin=1.2*cm,
-            )
-            styles = getSampleStyleSheet()
-
-            # Optional: register a Unicode font (Azerbaijani/Turkish glyphs)
-            font_registered = False
-            registered_font_name = 'Helvetica'
-            try:
-                font_candidates = [
-                    os.path.join(settings.BASE_DIR, 'static', 'fonts', 'DejaVuSans.ttf'),
-                    os.path.join(settings.BASE_DIR, 'static', 'fonts', 'NotoSans-Regular.ttf'),
-                    '/Library/Fonts/Arial Unicode.ttf',
-                    '/Library/Fonts/Arial Unicode MS.ttf',
-                    '/System/Library/Fonts/Supplemental/NotoSans-Regular.ttf',
-                ]
-                found_path = next((p for p in font_candidates if os.path.exists(p)), None)
-                if found_path:
-                    registered_font_name = 'CustomUnicode'
-                    pdfmetrics.registerFont(TTFont(registered_font_name, found_path))
-                    styles['Normal'].fontName = registered_font_name
-                    styles['Title'].fontName = registered_font_name
-                    font_registered = True
-            except Exception:
-                # Ignore and fall back to Helvetica (may miss some glyphs)
-                pass
-
-            styles['Title'].fontSize = 20
-            styles['Normal'].fontSize = 10
-
-            story = []
-            story.append(Paragraph("Depod Analytics", styles['Title']))
-            story.append(Paragraph(timezone.now().strftime('%Y-%m-%d %H:%M'), styles['Normal']))
-            story.append(Spacer(1, 0.6*cm))
-
-            w = data.get('widgets', {})
-            story.append(Paragraph(
-                f"Son 90 gün: Təkliflər: <b>{w.get('offers_90',0)}</b> · "
-                f"Mesajlar: <b>{w.get('contacts_90',0)}</b> · "
-                f"Ziyarətlər: <b>{w.get('visits_90',0)}</b>",
-                styles['Normal']
-            ))
-            story.append(Spacer(1, 0.5*cm))
-
-            # Charts (if provided)
-            def add_data_url_image(data_url: str, width_cm: float):
-                if not data_url:
-                    return
-                try:
-                    b64 = data_url.split(',', 1)[1] if ',' in data_url else data_url
-                    img_bytes = base64.b64decode(b64)
-                    bio = io.BytesIO(img_bytes)
-                    img = Image(bio)
-                    # Preserve aspect ratio
-                    ratio = float(getattr(img, 'imageHeight', 1)) / float(getattr(img, 'imageWidth', 1) or 1)
-                    img.drawWidth = width_cm
-                    img.drawHeight = width_cm * ratio
-                    story.append(img)
-                    story.append(Spacer(1, 0.5*cm))
-                except Exception:
-                    pass
-
-            add_data_url_image(line_img, 17*cm)
-            add_data_url_image(pie_img, 12*cm)
-
-            # Recent offers table (top 30)
-            rec = data.get('recent_offers', [])[:30]
-            # If empty, broaden the window to selected 'days' or 30 days to avoid empty PDF tables
-            if not rec:
-                try:
-                    fallback_days = int(request.POST.get('recent_days') or request.POST.get('days') or 30)
-                except Exception:
-                    fallback_days = 30
-                since_fb = timezone.now() - timezone.timedelta(days=fallback_days)
-                rec = list(
-                    ProductOffer.objects.filter(created_at__gte=since_fb)
-                    .values('id', 'first_name', 'last_name', 'product__name', 'quantity', 'status', 'created_at')
-                    .order_by('-created_at')[:30]
-                )
-            table_data = [["ID", "Müştəri", "Məhsul", "Miqdar", "Status", "Tarix"]]
-            for r in rec:
-                created = r.get('created_at','')
-                # Format date as YYYY-MM-DD only
-                if hasattr(created, 'date'):
-                    created_str = created.date().isoformat()
-                else:
-                    created_str = str(created)[:10]
-                table_data.append([
-                    r.get('id',''),
-                    f"{r.get('first_name','')} {r.get('last_name','')}",
-                    r.get('product__name','') or '',
-                    r.get('quantity',''),
-                    r.get('status',''),
-                    created_str,
-                ])
-
-            if len(table_data) == 1:
-                table_data.append(["—","—","—","—","—","—"])
-
-            col_widths = [1.5*cm, 3.5*cm, 4.5*cm, 1.8*cm, 2.5*cm, 3.0*cm]
-            tbl = Table(table_data, colWidths=col_widths, repeatRows=1)
-            header_font = registered_font_name if font_registered else 'Helvetica-Bold'
-            body_font = registered_font_name if font_registered else 'Helvetica'
-            tbl.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f0f0f0')),
-                ('TEXTCOLOR',(0,0),(-1,0), colors.black),
-                ('FONTNAME',(0,0),(-1,0), header_font),
-                ('FONTSIZE',(0,0),(-1,0),10),
-                ('ALIGN',(0,0),(-1,0),'LEFT'),
-                ('FONTNAME',(0,1),(-1,-1), body_font),
-                ('FONTSIZE',(0,1),(-1,-1),9),
-                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#fafafa')]),
-                ('INNERGRID',(0,0),(-1,-1),0.25,colors.grey),
-                ('BOX',(0,0),(-1,-1),0.25,colors.grey),
-                ('VALIGN',(0,0),(-1,-1),'TOP'),
-            ]))
-            story.append(tbl)
-
-            doc.build(story)
-            pdf_bytes = buf.getvalue()
-            buf.close()
-            resp = HttpResponse(pdf_bytes, content_type='application/pdf')
-            resp['Content-Disposition'] = 'attachment; filename="analytics.pdf"'
-            return resp
-        except Exception:
-            return HttpResponse(
-                "PDF export hazır deyil: WeasyPrint sistem asılılıqları quraşdırılmayıb və ReportLab da mövcud deyil.",
-                status=503,
-            )
+
+@staff_member_required
+def analytics_report_download(request, pk):
+    report = get_object_or_404(AnalyticsReport, pk=pk, status='done')
+    if not report.file:
+        raise Http404
+    return FileResponse(report.file.open('rb'), as_attachment=True, filename='analytics.pdf', content_type='application/pdf')
+
+
+@staff_member_required
+def export_offers(request):
+    """Stream offers matching ?status=&city=&product=&from=&to= as CSV (or ?format=xlsx)."""
+    qs = exports.filter_offers(request.GET)
+    return exports.export_offers(qs, request.GET.get('format', 'csv'))
+
+
+@staff_member_required
+def export_contact_messages(request):
+    """Stream contact messages matching ?status=&subject=&from=&to= as CSV (or ?format=xlsx)."""
+    qs = exports.filter_contact_messages(request.GET)
+    return exports.export_contact_messages(qs, request.GET.get('format', 'csv'))
+
+
+CUSTOMER_HISTORY_LIMIT = 200
+
+
+@staff_member_required
+def customer_history(request):
+    """All offers and contact messages from one phone number (?phone=, any format).
+    Both lookups are exact matches on the (phone_normalized, created_at) indexes.
+    """
+    query = (request.GET.get('phone') or '').strip()
+    phone = normalize_phone(query)
+    offers, contact_messages = [], []
+    if phone:
+        offers = list(
+            ProductOffer.objects.filter(phone_normalized=phone)
+            .select_related('product')
+            .order_by('-created_at')[:CUSTOMER_HISTORY_LIMIT + 1]
+        )
+        contact_messages = list(
+            ContactMessage.objects.filter(phone_normalized=phone)
+            .order_by('-created_at')[:CUSTOMER_HISTORY_LIMIT + 1]
+        )
+    truncated = len(offers) > CUSTOMER_HISTORY_LIMIT or len(contact_messages) > CUSTOMER_HISTORY_LIMIT
+    return render(request, 'admin/customer_history.html', {
+        'query': query,
+        'phone': phone,
+        'offers': offers[:CUSTOMER_HISTORY_LIMIT],
+        'contact_messages': contact_messages[:CUSTOMER_HISTORY_LIMIT],
+        'truncated': truncated,
+        'limit': CUSTOMER_HISTORY_LIMIT,
+    })
 
 
 # -------- Demo Seed Endpoint (DEV only) ---------
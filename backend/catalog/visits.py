@@ -0,0 +1,146 @@
+"""Write-buffered unique-visit tracking.
+
+Visitors are identified by a signed cookie (no DB session row), duplicates
+within a day are dropped with `cache.add` on the VISIT_CACHE alias, and accepted (day, visitor) pairs
+are kept in a per-process buffer. The buffer is written with a single
+`bulk_create(ignore_conflicts=True)` once it grows past VISIT_FLUSH_SIZE, by
+a background thread every VISIT_FLUSH_INTERVAL seconds (started lazily in
+each process, so quiet workers do not sit on visits), and on worker exit. The unique (date, session_key) constraint makes flushes from different
+workers idempotent.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.core.cache import caches
+
+from .models import SiteVisit
+from . import metrics, rollups
+
+logger = logging.getLogger(__name__)
+
+COOKIE_SALT = 'catalog.visits'
+COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+_lock = threading.Lock()
+_buffer = set()
+_oldest = None
+_flusher_pid = None
+
+
+def _cookie_name():
+    return getattr(settings, 'VISIT_COOKIE_NAME', 'depod_vid')
+
+
+def get_visitor_id(request):
+    """Return (visitor_id, is_new). Tampered or missing cookies yield a fresh id."""
+    try:
+        vid = request.get_signed_cookie(_cookie_name(), salt=COOKIE_SALT)
+        if vid:
+            return vid, False
+    except (KeyError, signing.BadSignature):
+        pass
+    return uuid.uuid4().hex, True
+
+
+def set_visitor_cookie(response, visitor_id):
+    response.set_signed_cookie(
+        _cookie_name(),
+        visitor_id,
+        salt=COOKIE_SALT,
+        max_age=COOKIE_MAX_AGE,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite=settings.SESSION_COOKIE_SAMESITE,
+    )
+
+
+def record(day, visitor_id):
+    """Buffer one visit; returns True if it was the visitor's first visit of the day."""
+    global _oldest
+    dedupe = caches[getattr(settings, 'VISIT_CACHE', 'default')]
+    if not dedupe.add(f"visit:{day}:{visitor_id}", True, 60 * 60 * 24):
+        return False
+    if _flusher_pid != os.getpid():
+        _start_flusher()
+    with _lock:
+        _buffer.add((day, visitor_id))
+        if _oldest is None:
+            _oldest = time.monotonic()
+        due = (
+            len(_buffer) >= getattr(settings, 'VISIT_FLUSH_SIZE', 200)
+            or time.monotonic() - _oldest >= getattr(settings, 'VISIT_FLUSH_INTERVAL', 30)
+        )
+        backlog = len(_buffer)
+    metrics.VISIT_BACKLOG.set(backlog)
+    if due:
+        flush()
+    return True
+
+
+def _start_flusher():
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='visit-flush', daemon=True).start()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(getattr(settings, 'VISIT_FLUSH_INTERVAL', 30))
+        if pending():
+            flush()
+            # Reconnect on the next round instead of holding a connection per worker
+            connections.close_all()
+
+
+def pending():
+    with _lock:
+        return len(_buffer)
+
+
+def flush():
+    """Write buffered visits in one batch and refresh the visit rollup. Returns rows attempted."""
+    global _buffer, _oldest
+    with _lock:
+        if not _buffer:
+            return 0
+        batch, _buffer, _oldest = _buffer, set(), None
+    metrics.VISIT_BACKLOG.set(0)
+    try:
+        SiteVisit.objects.bulk_create(
+            [SiteVisit(date=day, session_key=vid) for day, vid in batch],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        rollups.apply_visit_batch(batch)
+    except Exception:
+        logger.exception("Visit flush failed; re-queueing %s entries", len(batch))
+        metrics.VISIT_FLUSH_FAILURES.inc()
+        with _lock:
+            # Keep the buffer bounded if the database stays unavailable
+            if len(_buffer) < getattr(settings, 'VISIT_FLUSH_SIZE', 200) * 10:
+                _buffer |= batch
+                _oldest = _oldest or time.monotonic()
+            backlog = len(_buffer)
+        metrics.VISIT_BACKLOG.set(backlog)
+        return 0
+    return len(batch)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -1,6 +1,12 @@
 import os
+from importlib import import_module
+
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Same warm-up as core.wsgi (see deploy/gunicorn_asgi.py: preload_app)
+import_module(settings.ROOT_URLCONF)
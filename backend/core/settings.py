@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 
@@ -33,6 +34,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Per-request Server-Timing / query budgets / metrics / slow-query capture (catalog.instrumentation);
+    # removes itself unless REQUEST_TIMING, METRICS_ENABLED or SLOW_QUERY_CAPTURE is on
+    'catalog.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -44,6 +48,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # Analytics visit tracker (must be after Session & Auth middleware)
     'catalog.middleware.SiteVisitMiddleware',
+    # Staff-only ?__profile=cpu|calls|sql|mem (catalog.profiling); after Auth, innermost
+    'catalog.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -85,6 +91,34 @@ else:
         }
     }
 
+# Connections: persistent per thread (DB_CONN_MAX_AGE, health-checked before reuse), or with
+# DB_POOL=true a psycopg3 pool per process sized from the server's threads
+# (WEB_CONCURRENCY processes x GUNICORN_THREADS threads each hold at most one connection).
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '1'))
+DB_POOL = os.getenv('DB_POOL', 'false').lower() == 'true'
+_db = DATABASES['default']
+_db['CONN_HEALTH_CHECKS'] = True
+_db_options = _db.setdefault('OPTIONS', {})
+if DB_POOL:
+    # Pooled connections are returned after each request; Django requires CONN_MAX_AGE=0 here
+    _db['CONN_MAX_AGE'] = 0
+    _db_options['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        # Request threads + report/notification background threads
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', str(GUNICORN_THREADS + 2))),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+    }
+else:
+    _db['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+# Server-side binding lets psycopg3 prepare statements that repeat (catalog list/detail queries).
+# Not compatible with PgBouncer in transaction mode.
+if os.getenv('DB_SERVER_SIDE_BINDING', 'false').lower() == 'true':
+    _db_options['server_side_binding'] = True
+    # Executions of the same query before psycopg prepares it server-side (psycopg default: 5)
+    if os.getenv('DB_PREPARE_THRESHOLD'):
+        _db_options['prepare_threshold'] = int(os.environ['DB_PREPARE_THRESHOLD'])
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -117,6 +151,11 @@ if not DEBUG and SERVE_MEDIA and not os.getenv('DJANGO_MEDIA_ROOT'):
         MEDIA_ROOT = '/tmp/depod_media'
         Path(MEDIA_ROOT).mkdir(parents=True, exist_ok=True)
 
+# Generated analytics PDFs (private: served only through the staff download view)
+REPORTS_ROOT = os.getenv('DJANGO_REPORTS_ROOT', str(BASE_DIR / 'private'))
+if not DEBUG and not os.getenv('DJANGO_REPORTS_ROOT'):
+    REPORTS_ROOT = '/var/tmp/depod_reports'
+
 # Use a writable temp directory for file uploads in production
 if not DEBUG:
     FILE_UPLOAD_TEMP_DIR = '/var/tmp'
@@ -132,7 +171,88 @@ CORS_ALLOW_CREDENTIALS = True
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Public submission limits (catalog.throttling): <view throttle_scope>_ip / _sender
+    'DEFAULT_THROTTLE_RATES': {
+        'offers_ip': os.getenv('THROTTLE_OFFERS_IP', '20/hour'),
+        'offers_sender': os.getenv('THROTTLE_OFFERS_SENDER', '5/hour'),
+        'contact_messages_ip': os.getenv('THROTTLE_CONTACT_IP', '10/hour'),
+        'contact_messages_sender': os.getenv('THROTTLE_CONTACT_SENDER', '3/hour'),
+    },
+    # Proxies in front of Django (Render: 1); client IP is taken from X-Forwarded-For accordingly
+    'NUM_PROXIES': int(os.environ['DJANGO_NUM_PROXIES']) if os.getenv('DJANGO_NUM_PROXIES') else None,
+}
+# Shared cache (visit dedupe, throttles, analytics, catalog responses) seen by every worker.
+# CACHE_BACKEND: file (default; one directory per host), redis (default when CACHE_LOCATION is a
+# redis:// URL), memcached, locmem (per process; only for single-worker dev) or db. CACHE_LOCATION
+# is the directory/URL for file/redis/memcached.
+# db (table created by `boot`/createcachetable) is opt-in only: every get/add/set is several SQL
+# statements (cull count, transaction, select, insert), so visit dedupe and throttles never use
+# it and get the `counters` file cache below instead
+_CACHE_BACKENDS = {
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache') if DEBUG else '/var/tmp/depod_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'depod'),
+}
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'redis' if os.getenv('CACHE_LOCATION', '').startswith(('redis://', 'rediss://')) else 'file'
+)
+_cache_backend, _cache_location = _CACHE_BACKENDS[CACHE_BACKEND]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.getenv('CACHE_LOCATION', _cache_location),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'depod'),
+    },
 }
+if CACHE_BACKEND in ('db', 'file', 'locmem'):
+    # Culling limit of Django's own backends (redis/memcached evict by themselves)
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000'))}
+# Per-request counters (visit dedupe, submission throttles): the shared cache unless that is the database
+CACHES['counters'] = CACHES['default'] if CACHE_BACKEND != 'db' else {
+    'BACKEND': _CACHE_BACKENDS['file'][0],
+    'LOCATION': os.getenv('COUNTER_CACHE_LOCATION', f"{_CACHE_BACKENDS['file'][1]}/counters"),
+    'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'depod'),
+    'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000'))},
+}
+# In-process LRU in front of the shared cache (catalog.caching): max keys per worker, and the
+# longest a worker serves its local copy (bounds staleness across workers after a write)
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', '1000'))
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', '5'))
+# Invalidation bus (catalog.invalidation) telling other workers about writes: notify (PostgreSQL
+# LISTEN/NOTIFY), poll (re-read generations every CACHE_INVALIDATION_POLL_INTERVAL s), off, or auto
+CACHE_INVALIDATION = os.getenv('CACHE_INVALIDATION', 'auto')
+CACHE_INVALIDATION_CHANNEL = os.getenv('CACHE_INVALIDATION_CHANNEL', 'depod_cache')
+CACHE_INVALIDATION_POLL_INTERVAL = float(os.getenv('CACHE_INVALIDATION_POLL_INTERVAL', '1'))
+# Local lifetime of invalidated-on-write data while the bus is connected (safety net for lost messages)
+CACHE_LOCAL_SYNCED_TTL = float(os.getenv('CACHE_LOCAL_SYNCED_TTL', '300'))
+# Cache misses are computed once per key (catalog.caching.single_flight + shared lock); other
+# callers wait up to CACHE_COALESCE_WAIT s for the result, then compute themselves
+CACHE_COALESCE_WAIT = float(os.getenv('CACHE_COALESCE_WAIT', '5'))
+CACHE_LOCK_TIMEOUT = int(os.getenv('CACHE_LOCK_TIMEOUT', '30'))
+# Public catalog and page responses (catalog.views.CachedReadMixin); writes invalidate them
+CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '300'))
+# Hosts (ALLOWED_HOSTS syntax) whose responses are cached; others are served uncached so forged
+# Host headers cannot fill the cache. Defaults to ALLOWED_HOSTS without '*' (localhost in DEBUG)
+CATALOG_CACHE_HOSTS = [h.strip() for h in os.getenv('CATALOG_CACHE_HOSTS', '').split(',') if h.strip()] or [
+    h for h in ALLOWED_HOSTS if h != '*'
+] or (['.localhost', '127.0.0.1', '[::1]'] if DEBUG else [])
+# Read-only catalog snapshot memory-mapped by every worker (catalog.catalog_store); built by `boot`
+# or build_catalog_store and rebuilt in the background after catalog writes. Needs a local path
+# all workers of the host can read
+CATALOG_STORE = os.getenv('CATALOG_STORE', 'false').lower() == 'true'
+CATALOG_STORE_PATH = os.getenv(
+    'CATALOG_STORE_PATH', str(BASE_DIR / '.cache' / 'catalog.store') if DEBUG else '/var/tmp/depod_catalog.store'
+)
+
+# Cache aliases for visit dedupe and throttle counters; must be shared across workers and must
+# not be a DatabaseCache (see CACHES)
+VISIT_CACHE = os.getenv('VISIT_CACHE', 'counters')
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', 'counters')
+for _alias in (VISIT_CACHE, THROTTLE_CACHE):
+    if CACHES[_alias]['BACKEND'] == _CACHE_BACKENDS['db'][0]:
+        raise ImproperlyConfigured(f"Cache alias {_alias!r} is a DatabaseCache; use a file, redis or memcached cache")
 
 # Log server errors to stdout so Render logs capture stack traces when DEBUG=False
 LOGGING = {
@@ -163,9 +283,50 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        # One JSON line per request when REQUEST_TIMING is on (budget overruns at WARNING)
+        'catalog.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
 
+# Request instrumentation (catalog.instrumentation): Server-Timing header + structured log.
+# Budgets are max queries per URL name, e.g. "api:product-list=10,api:product-detail=15"
+REQUEST_TIMING = os.getenv('REQUEST_TIMING', 'false').lower() == 'true'
+REQUEST_QUERY_BUDGETS = {
+    name: int(limit)
+    for name, _, limit in (
+        item.strip().partition('=') for item in os.getenv('REQUEST_QUERY_BUDGETS', '').split(',')
+    )
+    if name and limit.isdigit()
+}
+REQUEST_QUERY_BUDGET_DEFAULT = int(os.getenv('REQUEST_QUERY_BUDGET_DEFAULT', '0'))
+
+# Slow-query capture (catalog.slow_queries): queries over SLOW_QUERY_MS are sampled at
+# SLOW_QUERY_SAMPLE_RATE (max SLOW_QUERY_MAX_PER_MINUTE per process), EXPLAINed and kept
+# in a SLOW_QUERY_CAPACITY-row table browsable in the admin
+SLOW_QUERY_CAPTURE = os.getenv('SLOW_QUERY_CAPTURE', 'false').lower() == 'true'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', '0.1'))
+SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv('SLOW_QUERY_MAX_PER_MINUTE', '6'))
+SLOW_QUERY_CAPACITY = int(os.getenv('SLOW_QUERY_CAPACITY', '2000'))
+
+# Prometheus text endpoint at /metrics (catalog.metrics). With several workers set METRICS_DIR
+# to a directory they share; each writes its snapshot there every METRICS_FLUSH_INTERVAL seconds
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Optional bearer token required by /metrics
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Staff-only request profiling via ?__profile= (catalog.profiling); the middleware is sync-only, so it
+# is only installed when REQUEST_PROFILING is on
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', 'false').lower() == 'true'
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.001'))
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', '10'))
+
 # Email configuration
 EMAIL_BACKEND = os.getenv('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
@@ -189,6 +350,22 @@ ADMIN_BASE_URL = os.getenv('ADMIN_BASE_URL', 'localhost')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
 
+# Dashboard analytics cache (seconds): fresh window, then extra stale-while-revalidate window
+ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '60'))
+ANALYTICS_CACHE_STALE_TTL = int(os.getenv('ANALYTICS_CACHE_STALE_TTL', '300'))
+
+# Visit tracking: signed visitor cookie + buffered bulk inserts (see catalog.visits)
+VISIT_COOKIE_NAME = os.getenv('VISIT_COOKIE_NAME', 'depod_vid')
+VISIT_FLUSH_INTERVAL = int(os.getenv('VISIT_FLUSH_INTERVAL', '30'))
+VISIT_FLUSH_SIZE = int(os.getenv('VISIT_FLUSH_SIZE', '200'))
+# Raw SiteVisit rows kept by prune_site_visits; older days survive only as daily rollups
+SITE_VISIT_RETENTION_DAYS = int(os.getenv('SITE_VISIT_RETENTION_DAYS', '120'))
+
+# ASGI profile: route POST /api/offers/ and /api/contact-messages/ to the async views
+# (catalog.async_views); notification I/O then runs on NOTIFY_WORKERS background threads
+ASYNC_SUBMISSIONS = os.getenv('ASYNC_SUBMISSIONS', 'false').lower() == 'true'
+NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', '4'))
+
 # Jazzmin configuration (optional branding)
 JAZZMIN_SETTINGS = {
     "site_title": "Depod Admin",
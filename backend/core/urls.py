@@ -4,11 +4,14 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 
+from catalog.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(('catalog.urls', 'api'), namespace='api')),
     path('', include('catalog.urls')),
-    path('healthz/', lambda r: HttpResponse('ok')),
+    path('healthz/', lambda r: HttpResponse('ok'), name='healthz'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 if settings.DEBUG or getattr(settings, 'SERVE_MEDIA', False):
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
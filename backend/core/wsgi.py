@@ -1,6 +1,13 @@
 import os
+from importlib import import_module
+
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf (views, serializers, DRF) up front so `gunicorn --preload`
+# does it once in the master and forks warm workers
+import_module(settings.ROOT_URLCONF)
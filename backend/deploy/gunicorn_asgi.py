@@ -0,0 +1,22 @@
+"""Gunicorn profile for serving core.asgi with uvicorn workers.
+
+    ASYNC_SUBMISSIONS=true gunicorn core.asgi:application -c deploy/gunicorn_asgi.py
+
+Each uvicorn worker runs one event loop, so a single process keeps accepting
+offer/contact submissions while earlier ones wait on the database; sync views
+(admin, DRF read endpoints) still run, on Django's per-request thread.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Give in-flight requests time to finish on deploys/restarts
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+# Import the app once in the master and fork warm workers
+preload_app = True
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')